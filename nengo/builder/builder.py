@@ -20,15 +20,24 @@ class Model(object):
         A name or description to differentiate models.
     decoder_cache : DecoderCache, optional (Default: ``NoDecoderCache()``)
         Interface to a cache for expensive parts of the build process.
+    executor : concurrent.futures.Executor, optional (Default: None)
+        If not None, decoders are solved for in parallel with this executor
+        (see `.presolve_decoders`).
 
     Attributes
     ----------
+    activities : dict
+        Mapping from ensembles to their activities at their evaluation
+        points, shared by the connections from them while the connections
+        of a network are built (see `.get_shared_activities`).
     config : Config or None
         Build functions can set a config object here to affect sub-builders.
     decoder_cache : DecoderCache
         Interface to a cache for expensive parts of the build process.
     dt : float
         The length of each timestep, in seconds.
+    executor : concurrent.futures.Executor or None
+        Executor used to solve for decoders in parallel, if any.
     label : str or None
         A name or description to differentiate models.
     operators : list
@@ -37,6 +46,9 @@ class Model(object):
     params : dict
         Mapping from objects to namedtuples containing parameters generated
         in the build process.
+    presolved : dict
+        Mapping from connections to futures of their decoders, for
+        connections whose decoders are being solved for in parallel.
     probes : list
         List of all probes. Probes must be added to this list in the build
         process, as this list is used by Simulator.
@@ -63,22 +75,26 @@ class Model(object):
         or for the network builder to determine if it is the top-level network.
     """
 
-    def __init__(self, dt=0.001, label=None, decoder_cache=None, builder=None):
+    def __init__(self, dt=0.001, label=None, decoder_cache=None, builder=None,
+                 executor=None):
         self.dt = dt
         self.label = label
         self.decoder_cache = (NoDecoderCache() if decoder_cache is None
                               else decoder_cache)
+        self.executor = executor
 
         # Will be filled in by the network builder
         self.toplevel = None
         self.config = None
 
         # Resources used by the build process
+        self.activities = {}
         self.operators = []
         self.params = {}
         self.probes = []
         self.seeds = {}
         self.seeded = {}
+        self.presolved = {}
 
         self.sig = collections.defaultdict(dict)
         self.sig['common'][0] = Signal(0., readonly=True, name='ZERO')
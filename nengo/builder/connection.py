@@ -3,7 +3,8 @@ import collections
 import numpy as np
 
 from nengo.builder import Builder, Signal
-from nengo.builder.ensemble import gen_eval_points, get_activities
+from nengo.builder.ensemble import (
+    gen_eval_points, get_activities, get_rates)
 from nengo.builder.node import SimPyFunc
 from nengo.builder.operator import Copy, ElementwiseInc
 from nengo.connection import Connection
@@ -14,6 +15,7 @@ from nengo.neurons import Direct
 from nengo.node import Node
 from nengo.solvers import NoSolver, Solver
 from nengo.utils.compat import is_iterable, itervalues
+from nengo.utils.functions import is_vectorized
 
 built_attrs = ['eval_points', 'solver_info', 'weights', 'transform']
 
@@ -73,6 +75,8 @@ def get_targets(conn, eval_points):
         targets = eval_points[:, conn.pre_slice]
     elif isinstance(conn.function, np.ndarray):
         targets = conn.function
+    elif is_vectorized(conn.function):
+        targets = get_vectorized_targets(conn, eval_points[:, conn.pre_slice])
     else:
         targets = np.zeros((len(eval_points), conn.size_mid))
         for i, ep in enumerate(eval_points[:, conn.pre_slice]):
@@ -85,6 +89,27 @@ def get_targets(conn, eval_points):
     return targets
 
 
+def get_vectorized_targets(conn, eval_points):
+    out = conn.function(eval_points)
+    if out is None:
+        raise BuildError("Building %s: Connection function returned "
+                         "None. Cannot solve for decoders." % (conn,))
+
+    shape = (len(eval_points), conn.size_mid)
+    targets = np.array(out, dtype=np.float64)
+    if targets.shape == shape[:1] and conn.size_mid == 1:
+        targets = targets.reshape(shape)
+    if targets.shape != shape or (len(eval_points) > 0 and not np.allclose(
+            targets[0], np.ravel(conn.function(eval_points[0])))):
+        raise BuildError(
+            "Building %s: Vectorized connection function does not give the "
+            "same results for an array of points of shape %s as for each "
+            "point separately. Remove the 'vectorized' decorator from "
+            "%r if it does not accept arrays of points."
+            % (conn, eval_points.shape, conn.function))
+    return targets
+
+
 def build_linear_system(model, conn, rng):
     eval_points = get_eval_points(model, conn, rng)
     ens = conn.pre_obj
@@ -121,16 +146,39 @@ def build_decoders(model, conn, rng):
         targets = np.dot(targets, post_enc.T[conn.post_slice])
 
     x = np.dot(eval_points, encoders.T / conn.pre_obj.radius)
+    solver_kwargs = {}
+    if conn.eval_points is None:
+        # connections using the evaluation points of the ensemble share its
+        # activities, so that solvers can reuse work done for the same
+        # activities (see `.cholesky_factor`)
+        solver_kwargs['activities'] = lambda: get_shared_activities(
+            model, conn.pre_obj, x, gain, bias)
     wrapped_solver = (model.decoder_cache.wrap_solver(solve_for_decoders)
                       if model.seeded[conn] else solve_for_decoders)
     decoders, solver_info = wrapped_solver(
-        conn, gain, bias, x, targets, rng=rng)
+        conn, gain, bias, x, targets, rng=rng, **solver_kwargs)
 
     return eval_points, decoders.T, solver_info
 
 
-def solve_for_decoders(conn, gain, bias, x, targets, rng):
-    activities = conn.pre_obj.neuron_type.rates(x, gain, bias)
+def get_shared_activities(model, ens, x, gain, bias):
+    """Returns the activities of ``ens`` at its evaluation points.
+
+    The activities are computed once and stored read-only in
+    ``model.activities``, until the connections of the network being built
+    have been built.
+    """
+    activities = model.activities.get(ens)
+    if activities is None:
+        activities = get_rates(ens.neuron_type, x, gain, bias)
+        activities.setflags(write=False)
+        activities = model.activities.setdefault(ens, activities)
+    return activities
+
+
+def solve_for_decoders(conn, gain, bias, x, targets, rng, activities=None):
+    activities = (get_rates(conn.pre_obj.neuron_type, x, gain, bias)
+                  if activities is None else activities())
     if np.count_nonzero(activities) == 0:
         raise BuildError(
             "Building %s: 'activities' matrix is all zero for %s. "
@@ -164,8 +212,61 @@ def slice_signal(model, signal, sl):
         return sliced_signal
 
 
+def presolve_decoders(model, conns):
+    """Starts solving for the decoders of several connections in parallel.
+
+    For each decoded connection in ``conns`` whose ensembles have been built,
+    ``build_decoders`` is submitted to ``model.executor``, and the future is
+    stored in ``model.presolved``. When the connection is built,
+    ``build_solver`` uses the result of the future instead of solving again.
+    Each solve uses its own random number generator, seeded as in
+    `.build_connection`, so the results are the same as when solving
+    serially. Connections with custom build functions are left alone.
+
+    Parameters
+    ----------
+    model : Model
+        The model to build into. Nothing is done if ``model.executor``
+        is None.
+    conns : iterable of Connection
+        The connections about to be built.
+    """
+    if model.executor is None:
+        return
+
+    for conn in conns:
+        if (conn in model.params or conn in model.presolved
+                or not isinstance(conn.pre_obj, Ensemble)
+                or isinstance(conn.pre_obj.neuron_type, Direct)
+                or conn.pre_obj not in model.params
+                or not _builds_with(model, conn, build_connection)
+                or not _builds_with(model, conn.solver, build_solver)):
+            continue
+        if conn.solver.weights and not (isinstance(conn.post_obj, Ensemble)
+                                        and conn.post_obj in model.params):
+            continue
+
+        rng = np.random.RandomState(model.seeds[conn])
+        future = model.executor.submit(build_decoders, model, conn, rng)
+        model.presolved[conn] = (future, rng)
+
+
+def _builds_with(model, obj, build_fn):
+    for obj_cls in type(obj).__mro__:
+        if obj_cls in model.builder.builders:
+            return model.builder.builders[obj_cls] is build_fn
+    return False
+
+
 @Builder.register(Solver)
 def build_solver(model, solver, conn, rng):
+    future, solved_rng = model.presolved.pop(conn, (None, None))
+    if future is not None and not future.cancel():
+        result = future.result()
+        # continue from where the solve left the random number generator
+        # (only once it is done, as the solver may still be drawing from it)
+        rng.set_state(solved_rng.get_state())
+        return result
     return build_decoders(model, conn, rng)
 
 
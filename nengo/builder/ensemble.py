@@ -1,4 +1,5 @@
 import collections
+import threading
 import warnings
 
 import numpy as np
@@ -9,7 +10,8 @@ from nengo.builder.operator import Copy, DotInc, Reset
 from nengo.dists import Distribution, get_samples
 from nengo.ensemble import Ensemble
 from nengo.exceptions import BuildError, NengoWarning
-from nengo.neurons import Direct
+from nengo.neurons import Direct, RateTable
+from nengo.rc import rc
 from nengo.utils.builder import default_n_eval_points
 
 built_attrs = ['eval_points',
@@ -79,7 +81,54 @@ def gen_eval_points(ens, eval_points, rng, scale_eval_points=True):
 
 def get_activities(built_ens, ens, eval_points):
     x = np.dot(eval_points, built_ens.encoders.T / ens.radius)
-    return ens.neuron_type.rates(x, built_ens.gain, built_ens.bias)
+    return get_rates(ens.neuron_type, x, built_ens.gain, built_ens.bias)
+
+
+def get_rates(neuron_type, x, gain, bias):
+    """Computes ``neuron_type.rates(x, gain, bias)`` for the builder.
+
+    If enabled in the ``rate_table`` section of the RC settings, the rates
+    are interpolated from a `.RateTable` covering the range of input
+    currents, as long as there are many more inputs than tabulated currents.
+    """
+    if not rc.getboolean('rate_table', 'enabled'):
+        return neuron_type.rates(x, gain, bias)
+
+    n_points = rc.getint('rate_table', 'n_points')
+    J = neuron_type.current(x, gain, bias)
+    J_min, J_max = J.min(), J.max()
+    if J.size <= 4 * n_points or not J_min < J_max:
+        return neuron_type.rates(x, gain, bias)
+
+    table = _get_rate_table(neuron_type, J_min, J_max, n_points,
+                            rc.get('rate_table', 'interpolation'),
+                            rc.getfloat('rate_table', 'tolerance'))
+    return table(J)
+
+
+_rate_tables = collections.OrderedDict()
+_rate_tables_lock = threading.Lock()
+_rate_tables_size = 32
+
+
+def _get_rate_table(neuron_type, J_min, J_max, n_points, interpolation,
+                    tolerance):
+    # Connections from the same ensemble usually have the same range of
+    # input currents, so recently used tables are kept for reuse
+    key = (neuron_type, J_min, J_max, n_points, interpolation, tolerance)
+    with _rate_tables_lock:
+        table = _rate_tables.pop(key, None)
+        if table is not None:
+            _rate_tables[key] = table
+            return table
+
+    table = RateTable(neuron_type, J_min, J_max, n_points=n_points,
+                      interpolation=interpolation, tolerance=tolerance)
+    with _rate_tables_lock:
+        _rate_tables[key] = table
+        while len(_rate_tables) > _rate_tables_size:
+            _rate_tables.popitem(last=False)
+    return table
 
 
 def get_gain_bias(ens, rng=np.random):
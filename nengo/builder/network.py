@@ -5,6 +5,7 @@ import numpy as np
 
 import nengo.utils.numpy as npext
 from nengo.builder import Builder
+from nengo.builder.connection import presolve_decoders
 from nengo.connection import Connection
 from nengo.ensemble import Ensemble
 from nengo.network import Network
@@ -32,7 +33,9 @@ def build_network(model, network, progress=None):
     number seeds are assigned to objects that did not have a seed explicitly
     set by the user. Whether the seed was assigned manually or automatically
     is tracked, and the decoder cache is only used when the seed is assigned
-    manually.
+    manually. If ``model.executor`` is set, the decoders of a network's
+    connections are solved for in parallel before step 3
+    (see `.presolve_decoders`).
 
     Parameters
     ----------
@@ -82,6 +85,7 @@ def build_network(model, network, progress=None):
             model.build(subnetwork)
 
         logger.debug("Network step 3: Building connections")
+        presolve_decoders(model, network.connections)
         for conn in network.connections:
             # NB: we do these in the order in which they're defined, and build
             # the learning rule in the connection builder. Because learning
@@ -92,13 +96,14 @@ def build_network(model, network, progress=None):
             # TODO: Except perhaps if the connection being learned
             # is in a subnetwork?
             model.build(conn)
+        model.activities.clear()
 
         logger.debug("Network step 4: Building probes")
         for probe in network.probes:
             model.build(probe)
 
         if context is model.decoder_cache:
-            model.decoder_cache.shrink()
+            model.decoder_cache.shrink_after_build()
 
         if model.toplevel is network:
             progress.step()
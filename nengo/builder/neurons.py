@@ -8,7 +8,9 @@ from nengo.neurons import (AdaptiveLIF, AdaptiveLIFRate, Izhikevich, LIF,
 class SimNeurons(Operator):
     """Set a neuron model output for the given input current.
 
-    Implements ``neurons.step_math(dt, J, output, *states)``.
+    Implements ``neurons.step_math(dt, J, output, *states)``. For `.LIF`
+    neurons, an equivalent step that does not allocate temporary arrays
+    is used instead (see `.lif_step`).
 
     Parameters
     ----------
@@ -73,11 +75,58 @@ class SimNeurons(Operator):
         output = signals[self.output]
         states = [signals[state] for state in self.states]
 
+        if type(self.neurons).step_math == LIF.step_math:
+            return lif_step(self.neurons, dt, J, output, *states)
+
         def step_simneurons():
             self.neurons.step_math(dt, J, output, *states)
         return step_simneurons
 
 
+def lif_step(lif, dt, J, spiked, voltage, refractory_time):
+    """Returns a step function computing ``LIF.step_math`` in place.
+
+    The step gives bit-for-bit the same results as `.LIF.step_math`,
+    but writes all intermediate results for the whole population into
+    preallocated buffers, and only gathers the few neurons that spiked
+    (once per step) instead of indexing with boolean masks.
+    """
+    dtype = np.result_type(J, voltage, refractory_time)
+    delta_t = np.zeros(voltage.shape, dtype=dtype)
+    dv = np.zeros(voltage.shape, dtype=dtype)
+    spiked_mask = np.zeros(voltage.shape, dtype=bool)
+    tau_rc, tau_ref = lif.tau_rc, lif.tau_ref
+    min_voltage = lif.min_voltage
+    amplitude = lif.amplitude / dt
+
+    def step_lif():
+        # see `.LIF.step_math` for the equations
+        np.subtract(refractory_time, dt, out=refractory_time)
+        np.subtract(dt, refractory_time, out=delta_t)
+        np.clip(delta_t, 0, dt, out=delta_t)
+        np.negative(delta_t, out=delta_t)
+        np.divide(delta_t, tau_rc, out=delta_t)
+        np.expm1(delta_t, out=delta_t)
+        np.subtract(J, voltage, out=dv)
+        np.multiply(dv, delta_t, out=dv)
+        np.subtract(voltage, dv, out=voltage)
+
+        np.greater(voltage, 1, out=spiked_mask)
+        spikes = np.flatnonzero(spiked_mask)
+        spiked.fill(0)
+        spiked[spikes] = amplitude
+
+        t_spike = dt + tau_rc * np.log1p(
+            -(voltage[spikes] - 1) / (J[spikes] - 1))
+
+        # same as ``voltage[voltage < min_voltage] = min_voltage``
+        np.maximum(voltage, min_voltage, out=voltage)
+        voltage[spikes] = 0
+        refractory_time[spikes] = tau_ref + t_spike
+
+    return step_lif
+
+
 @Builder.register(NeuronType)
 def build_neurons(model, neurontype, neurons):
     """Builds a `.NeuronType` object into a model.
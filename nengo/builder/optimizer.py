@@ -9,9 +9,12 @@ import numpy as np
 from nengo.builder.neurons import SimNeurons
 from nengo.builder import operator
 from nengo.builder.operator import DotInc, ElementwiseInc, Copy
+from nengo.builder.processes import MergedLinearFilter, SimProcess
 from nengo.builder.signal import Signal
+from nengo.synapses import Alpha, LinearFilter, Lowpass
 from nengo.utils.compat import iteritems, itervalues, zip_longest
-from nengo.utils.graphs import BidirectionalDAG, transitive_closure
+from nengo.utils.graphs import (
+    BidirectionalDAG, transitive_closure, update_transitive_closure)
 from nengo.utils.stdlib import Timer, WeakKeyDefaultDict, WeakSet
 
 logger = logging.getLogger(__name__)
@@ -39,6 +42,17 @@ def optimize(model, dg, max_passes=None):
     about memory alignment will be used to cut the inner loop short in
     many cases and gives a runtime much closer to linear in most cases.
 
+    Merges are only allowed between operators that do not depend on each
+    other, which is checked with the transitive closure of the dependency
+    graph. The closure is computed once in :math:`O(nd + e)` time, where
+    :math:`d` is the largest number of operators depending on any operator.
+    After each pass, it is only updated for the merged operators and the
+    operators they depend on, in :math:`O(ad + e_a)` time for :math:`a` such
+    operators and the :math:`e_a` edges between them. The operators depending
+    on each operator are stored in a tuple, and identical tuples are shared,
+    so the closure takes :math:`O(nd)` memory with a small constant (about
+    2.5 MB instead of 15 MB with sets for 33,000 operators).
+
     Note that this function modifies both ``model`` and ``dg``.
 
     Parameters
@@ -131,12 +145,18 @@ class OpMergePass(object):
                 self.sig2ops[s].add(op)
                 self.base2views[s.base].add(s)
 
+        # All ops depending (directly or indirectly) on each op. This is only
+        # computed once and updated after each pass for the merged ops. The
+        # dependents are stored in tuples, as they are only iterated over.
+        self.dependents = transitive_closure(self.dg.forward, compact=True)
+
         # These variables will be initialized and used on each pass
-        self.dependents = None
         self.only_merge_ops_with_view = None
 
         self.merged = set()
         self.merged_dependents = set()
+        self.merged_ops = []
+        self.replaced_ops = []
         self.opinfo = OpInfo()
 
     def __call__(self, only_merge_ops_with_view):
@@ -149,7 +169,6 @@ class OpMergePass(object):
         """
 
         # --- Initialize pass state
-        self.dependents = transitive_closure(self.dg.forward)
         self.only_merge_ops_with_view = only_merge_ops_with_view
         self.merged.clear()
         self.merged_dependents.clear()
@@ -158,6 +177,15 @@ class OpMergePass(object):
         # --- Do an optimization pass
         self.perform_merges()
 
+        # --- Update dependents for the merged ops and their ancestors
+        # (``dependents`` is not updated during the pass, as the ops
+        # affected by merges are not merged again in the same pass)
+        update_transitive_closure(
+            self.dependents, self.dg, self.merged_ops, self.replaced_ops,
+            compact=True)
+        del self.merged_ops[:]
+        del self.replaced_ops[:]
+
     def perform_merges(self):
         """Go through all operators and merge them where possible.
 
@@ -287,6 +315,8 @@ class OpMergePass(object):
         # Update tracking what has been merged and might be mergeable later
         self.might_merge.difference_update(tomerge.ops)
         self.might_merge.add(merged_op)
+        self.merged_ops.append(merged_op)
+        self.replaced_ops.extend(tomerge.ops)
         self.merged.update(tomerge.ops)
         self.merged_dependents.update(tomerge.all_dependents)
 
@@ -400,6 +430,7 @@ class OpsToMerge(object):
         self.merged_dependents = merged_dependents
         self.dependents = dependents
         self.ops = [initial_op]
+        self.op_set = {initial_op}
         self.optype = type(initial_op)
         self.opinfo = OpInfo()
 
@@ -412,6 +443,7 @@ class OpsToMerge(object):
 
     def add(self, op):
         self.ops.append(op)
+        self.op_set.add(op)
         self.all_signals.update(op.all_signals)
         self.all_dependents.update(self.dependents[op])
 
@@ -449,7 +481,7 @@ class OpMerger(object):
 
         independent_of_ops_tomerge = (
             op not in tomerge.all_dependents
-            and len(tomerge.dependents[op].intersection(tomerge.ops)) == 0)
+            and tomerge.op_set.isdisjoint(tomerge.dependents[op]))
         independent_of_prior_merges = (
             op not in tomerge.merged
             and op not in tomerge.merged_dependents
@@ -715,6 +747,67 @@ class SimNeuronsMerger(Merger):
                 Merger.merge_dicts(J_sigr, out_sigr, states_sigr))
 
 
+@OpMerger.register(SimProcess)
+class SimProcessMerger(Merger):
+    """Merges operators filtering signals with linear filters.
+
+    Filters of the same order are merged, even if their coefficients
+    differ, into a `.MergedLinearFilter` with one set of coefficients
+    per row of the merged signal.
+    """
+
+    # exact types only, since subclasses may change ``make_step``
+    process_types = (LinearFilter, Lowpass, Alpha, MergedLinearFilter)
+
+    @staticmethod
+    def check_signals(op, tomerge):
+        # all operators read the same time signal
+        shared = tomerge.all_signals.intersection(op.all_signals)
+        return shared.issubset([op.t])
+
+    @staticmethod
+    def order(process):
+        if isinstance(process, MergedLinearFilter):
+            return max(SimProcessMerger.order(s) for s in process.synapses)
+        num, den = process.num, process.den
+        if not process.analog and len(num) > 0 and num[0] == 0:
+            num = num[1:]  # removed by LinearFilter.make_step
+        return max(len(num), len(den)) - 1
+
+    @staticmethod
+    def is_mergeable(op1, op2):
+        return (
+            type(op1.process) in SimProcessMerger.process_types
+            and type(op2.process) in SimProcessMerger.process_types
+            and op1.mode == op2.mode
+            and op1.t is op2.t
+            and op1.input is not None and op2.input is not None
+            and op1.output is not None and op2.output is not None
+            and op1.output.ndim == op2.output.ndim > 0
+            and SimProcessMerger.order(op1.process) == SimProcessMerger.order(
+                op2.process)
+            and SigMerger.check([op1.input, op2.input])
+            and SigMerger.check([op1.output, op2.output]))
+
+    @staticmethod
+    def merge(ops):
+        synapses = []
+        sizes = []
+        for op in ops:
+            if isinstance(op.process, MergedLinearFilter):
+                synapses.extend(op.process.synapses)
+                sizes.extend(op.process.sizes)
+            else:
+                synapses.append(op.process)
+                sizes.append(op.output.shape[0])
+
+        input, in_sigr = SigMerger.merge([o.input for o in ops])
+        output, out_sigr = SigMerger.merge([o.output for o in ops])
+        return (SimProcess(MergedLinearFilter(synapses, sizes), input, output,
+                           ops[0].t, mode=ops[0].mode),
+                Merger.merge_dicts(in_sigr, out_sigr))
+
+
 class SigMerger(object):
 
     @staticmethod
@@ -93,7 +93,8 @@ def build_probe(model, probe):
     Notes
     -----
     Sets ``model.params[probe]`` to a list.
-    `.Simulator` appends to that list when running a simulation.
+    `.Simulator` replaces that list with a `.ProbeBuffer`
+    and appends to it when running a simulation.
     """
 
     # find the right parent class in `objtypes`, using `isinstance`
@@ -2,7 +2,7 @@ import numpy as np
 
 from nengo.builder import Builder, Operator, Signal
 from nengo.processes import Process
-from nengo.synapses import Synapse
+from nengo.synapses import LinearFilter, Synapse
 
 
 class SimProcess(Operator):
@@ -93,7 +93,12 @@ class SimProcess(Operator):
         shape_in = input.shape if input is not None else (0,)
         shape_out = output.shape if output is not None else (0,)
         rng = self.process.get_rng(rng)
-        step_f = self.process.make_step(shape_in, shape_out, dt, rng)
+        if isinstance(self.process, Synapse) and output is not None:
+            # filter in the same precision as the simulation
+            step_f = self.process.make_step(
+                shape_in, shape_out, dt, rng, dtype=output.dtype)
+        else:
+            step_f = self.process.make_step(shape_in, shape_out, dt, rng)
         inc = self.mode == 'inc'
 
         def step_simprocess():
@@ -108,6 +113,93 @@ class SimProcess(Operator):
         return step_simprocess
 
 
+class MergedLinearFilter(Synapse):
+    """Several linear filters applied to consecutive rows of one signal.
+
+    The optimizer uses this synapse to merge `.SimProcess` operators that
+    filter different signals with `.LinearFilter` synapses into
+    a single operator. All filters are stepped together in state-space
+    form (transposed direct form II), with one coefficient per row of the
+    signal for each term of the difference equation. Filters of lower order
+    than the others are padded with zero coefficients.
+
+    Parameters
+    ----------
+    synapses : list of LinearFilter
+        The filters, in the order in which they apply to the signal.
+    sizes : list of int
+        Number of rows of the signal that each filter applies to.
+    """
+
+    def __init__(self, synapses, sizes):
+        super(MergedLinearFilter, self).__init__()
+        assert len(synapses) == len(sizes)
+        self.synapses = list(synapses)
+        self.sizes = list(sizes)
+
+    def __repr__(self):
+        return "%s(%d filters)" % (type(self).__name__, len(self.synapses))
+
+    def get_rng(self, rng):
+        # draw from ``rng`` as often as the merged operators would have
+        return [s.get_rng(rng) for s in self.synapses][0]
+
+    def make_step(self, shape_in, shape_out, dt, rng, y0=None,
+                  dtype=np.float64):
+        assert shape_in == shape_out
+        assert shape_out[0] == sum(self.sizes)
+
+        steps = [synapse.make_step((1,), (1,), dt, None, dtype=dtype)
+                 for synapse in self.synapses]
+        order = max(max(len(step.num) - 1, len(step.den)) for step in steps)
+
+        # coefficients of the difference equation for each row
+        coef_shape = (order + 1, shape_out[0]) + (1,) * (len(shape_out) - 1)
+        b = np.zeros(coef_shape, dtype=dtype)
+        a = np.zeros(coef_shape, dtype=dtype)
+        i = 0
+        for step, size in zip(steps, self.sizes):
+            b[:len(step.num), i:i+size] = step.num.reshape(-1, 1)
+            a[1:len(step.den) + 1, i:i+size] = step.den.reshape(-1, 1)
+            i += size
+
+        output = np.zeros(shape_out, dtype=dtype)
+        state = np.zeros((order,) + shape_out, dtype=dtype)
+        tmp = np.zeros(shape_out, dtype=dtype)
+        if y0 is not None:
+            output[...] = y0
+            # state after inputs and outputs have been y0 for all time
+            coefs = np.cumsum((b - a)[:0:-1], axis=0)[::-1]
+            state[...] = coefs * output
+
+        if order <= 1 and not np.any(b[1:]):
+            # only first-order filters without delay (e.g., `.Lowpass`),
+            # which are stepped like `.LinearFilter.Simple`
+            b0 = b[0]
+            a1 = -a[1] if order == 1 else np.zeros_like(b0)
+
+            def step_mergedsimple(t, signal):
+                output[...] *= a1
+                np.multiply(b0, signal, out=tmp)
+                output[...] += tmp
+                return output
+
+            return step_mergedsimple
+
+        def step_mergedlinearfilter(t, signal):
+            np.multiply(b[0], signal, out=output)
+            output[...] += state[0]
+            for k in range(order):
+                np.multiply(b[k+1], signal, out=state[k])
+                np.multiply(a[k+1], output, out=tmp)
+                state[k] -= tmp
+                if k + 1 < order:
+                    state[k] += state[k+1]
+            return output
+
+        return step_mergedlinearfilter
+
+
 @Builder.register(Process)
 def build_process(model, process, sig_in=None, sig_out=None, inc=False):
     """Builds a `.Process` object into a model.
@@ -268,17 +268,34 @@ class SignalDict(dict):
     these arrays never get copied, which wastes time and space.
 
     Use ``init`` to set the ndarray initially.
+
+    Base signals that are not readonly can also be allocated together in
+    a single contiguous block of memory with ``init_arena``. In that case,
+    the ``arena`` attribute holds that block and resetting all signals
+    with ``reset_all`` is a single copy.
+
+    If ``dtype`` is given, the ndarrays of all floating point signals
+    use that data type (e.g., ``np.float32``) instead of the data type
+    of the signal's initial value, except for the base signals in
+    ``keep_dtype`` and their views.
     """
+    def __init__(self, *args, **kwargs):
+        dtype = kwargs.pop('dtype', None)
+        keep_dtype = kwargs.pop('keep_dtype', ())
+        super(SignalDict, self).__init__(*args, **kwargs)
+        self.dtype = None if dtype is None else np.dtype(dtype)
+        self.keep_dtype = set(keep_dtype)
+        self.arena = None
+        self._initial_arena = None
+        self._arena_bases = set()
+
     def __getitem__(self, key):
         try:
             return dict.__getitem__(self, key)
         except KeyError:
             if isinstance(key, Signal) and key.base is not key:
                 # return a view on the base signal
-                base = dict.__getitem__(self, key.base)
-                return np.ndarray(
-                    buffer=base, dtype=key.dtype, shape=key.shape,
-                    offset=key.offset, strides=key.strides)
+                return self._view(key, dict.__getitem__(self, key.base))
             else:
                 raise
 
@@ -305,22 +322,98 @@ class SignalDict(dict):
             raise SignalError("Cannot add signal twice")
 
         x = signal.initial_value
+        dtype = self.signal_dtype(signal)
         if signal.is_view:
             if signal.base not in self:
                 self.init(signal.base)
 
             # get a view onto the base data
-            view = np.ndarray(
-                shape=x.shape, strides=x.strides, offset=signal.offset,
-                dtype=x.dtype, buffer=self[signal.base].data)
-            assert np.array_equal(view, x)
+            view = self._view(signal, self[signal.base])
+            assert np.array_equal(view, x.astype(dtype, copy=False))
             view.setflags(write=not signal.readonly)
             dict.__setitem__(self, signal, view)
         else:
-            x = x.view() if signal.readonly else x.copy()
+            if dtype != x.dtype:
+                x = x.astype(dtype)
+                x.setflags(write=not signal.readonly)
+            elif signal.readonly:
+                x = x.view()
+                try:
+                    # views of this signal may be written to
+                    x.view().setflags(write=True)
+                except ValueError:
+                    # the data is in readonly memory (e.g., it was unpickled)
+                    x = x.copy().view()
+                    x.setflags(write=False)
+            else:
+                x = x.copy()
             dict.__setitem__(self, signal, x)
 
+    def _view(self, signal, base):
+        # Offsets and strides of the signal are in bytes of its own dtype,
+        # so they are converted in case the base is stored with another one
+        dtype = self.signal_dtype(signal)
+        return np.ndarray(
+            buffer=base.data, dtype=dtype, shape=signal.shape,
+            offset=signal.elemoffset * dtype.itemsize,
+            strides=tuple(s * dtype.itemsize for s in signal.elemstrides))
+
+    def signal_dtype(self, signal):
+        """The data type of the ndarray for ``signal``."""
+        if (self.dtype is not None and signal.dtype.kind == 'f'
+                and signal.base not in self.keep_dtype):
+            return self.dtype
+        return signal.dtype
+
     def reset(self, signal):
         """Reset ndarray to the base value of the signal that maps to it"""
         if not signal.readonly:
             self[signal] = signal.initial_value
+
+    def init_arena(self, signals):
+        """Set up permanent mappings for several base signals at once.
+
+        Signals that are not readonly are laid out one after the other,
+        in the order given, in a single contiguous array (``arena``), and
+        each of them is mapped to a view of that array. Readonly signals are
+        initialized with ``init``, because they never change and need no
+        copy of their initial value.
+
+        This can only be called once, and before any of the signals
+        has been initialized.
+        """
+        if self.arena is not None:
+            raise SignalError("Cannot initialize the arena twice")
+
+        offsets = []
+        nbytes = 0
+        for signal in signals:
+            if signal.is_view:
+                raise SignalError("Only base signals can be in the arena")
+            if signal in self:
+                raise SignalError("Cannot add signal twice")
+            if signal.readonly:
+                self.init(signal)
+                continue
+            dtype = self.signal_dtype(signal)
+            nbytes += -nbytes % dtype.alignment
+            offsets.append((signal, nbytes))
+            nbytes += signal.size * dtype.itemsize
+
+        self.arena = np.empty(nbytes, dtype=np.uint8)
+        for signal, offset in offsets:
+            x = np.ndarray(shape=signal.shape, dtype=self.signal_dtype(signal),
+                           buffer=self.arena.data, offset=offset)
+            x[...] = signal.initial_value
+            dict.__setitem__(self, signal, x)
+            self._arena_bases.add(signal)
+        self._initial_arena = self.arena.copy()
+        self._initial_arena.setflags(write=False)
+
+    def reset_all(self):
+        """Reset all ndarrays to the initial values of their signals."""
+        if self.arena is not None:
+            self.arena[...] = self._initial_arena
+        for signal in self:
+            if signal.base not in self._arena_bases:
+                self.reset(signal)
@@ -3,10 +3,16 @@ from numpy.testing import assert_almost_equal
 import pytest
 
 import nengo
-from nengo.builder.optimizer import SigMerger
+from nengo.builder import Model
+from nengo.builder.optimizer import OpMergePass, SigMerger
+from nengo.builder.processes import MergedLinearFilter, SimProcess
 from nengo.builder.signal import Signal
 from nengo.spa.tests.test_thalamus import thalamus_net
 from nengo.tests.test_learning_rules import learning_net
+from nengo.utils.compat import iteritems
+from nengo.utils.graphs import transitive_closure
+from nengo.utils.simulator import operator_dependency_graph
+from nengo.utils.stdlib import Timer
 
 
 def test_sigmerger_check():
@@ -140,3 +146,118 @@ def test_optimizer_does_not_change_result(seed, net):
 
     for probe in probes:
         assert_almost_equal(sim.data[probe], sim_opt.data[probe])
+
+
+@pytest.mark.parametrize("y0", (None, 0.4))
+def test_merged_linear_filter(y0, rng):
+    synapses = [nengo.Lowpass(0.005), nengo.Lowpass(0), nengo.Alpha(0.01),
+                nengo.LinearFilter([1, 2], [0.01, 0.3, 1])]
+    sizes = [2, 1, 3, 2]
+    merged = MergedLinearFilter(synapses, sizes)
+    x = rng.uniform(-1, 1, size=(50, sum(sizes)))
+
+    y = merged.filt(x, dt=0.001, y0=y0)
+    i = 0
+    for synapse, size in zip(synapses, sizes):
+        assert_almost_equal(
+            y[:, i:i+size], synapse.filt(x[:, i:i+size], dt=0.001, y0=y0))
+        i += size
+
+    # first-order filters only
+    merged = MergedLinearFilter(synapses[:2], sizes[:2])
+    y = merged.filt(x[:, :3], dt=0.001, y0=y0)
+    assert np.array_equal(
+        y[:, :2], synapses[0].filt(x[:, :2], dt=0.001, y0=y0))
+
+    # filters without state
+    merged = MergedLinearFilter(synapses[1:2], sizes[:1])
+    y = merged.filt(x[:, :2], dt=0.001, y0=y0)
+    assert np.array_equal(y, x[:, :2])
+
+
+def test_simprocess_merger(seed):
+    with nengo.Network(seed=seed) as model:
+        stim = nengo.Node(np.sin)
+        nodes = [nengo.Node(size_in=2) for _ in range(6)]
+        synapses = [0.005, 0.01, nengo.Alpha(0.005), nengo.Alpha(0.01),
+                    nengo.LinearFilter([1], [0.01, 1]), None]
+        for node, synapse in zip(nodes, synapses):
+            nengo.Connection(stim, node[0], synapse=synapse)
+            nengo.Connection(stim, node[1], synapse=0.02)
+        probes = [nengo.Probe(node) for node in nodes]
+
+    with nengo.Simulator(model, optimize=False) as sim:
+        sim.run(0.1)
+    with nengo.Simulator(model, optimize=True) as sim_opt:
+        sim_opt.run(0.1)
+
+    merged = [op for op in sim_opt.model.operators
+              if isinstance(op, SimProcess)
+              and isinstance(op.process, MergedLinearFilter)]
+    assert len(merged) > 0
+    n_filters = sum(len(op.process.synapses) for op in merged)
+    assert n_filters > len(merged)
+
+    for probe in probes:
+        assert_almost_equal(sim.data[probe], sim_opt.data[probe])
+
+
+def ensemble_array_chain(n_arrays, n_ensembles):
+    with nengo.Network(seed=0) as model:
+        prev = None
+        for _ in range(n_arrays):
+            ea = nengo.networks.EnsembleArray(10, n_ensembles)
+            if prev is not None:
+                nengo.Connection(prev.output, ea.input)
+            nengo.Probe(ea.output, synapse=0.01)
+            prev = ea
+    return model
+
+
+def test_opmergepass_dependents():
+    model = Model()
+    model.build(ensemble_array_chain(3, 8))
+    single_pass = OpMergePass(operator_dependency_graph(model.operators))
+
+    for only_merge_ops_with_view in (True, True, False, True):
+        before = len(single_pass.dg.forward)
+        single_pass(only_merge_ops_with_view)
+        assert {op: set(dependents) for op, dependents in iteritems(
+            single_pass.dependents)} == transitive_closure(
+                single_pass.dg.forward)
+    assert len(single_pass.dg.forward) < before
+
+
+@pytest.mark.benchmark
+@pytest.mark.slow
+def test_optimizer_benchmark(logger):
+    tracemalloc = pytest.importorskip('tracemalloc')
+
+    model = Model()
+    model.build(ensemble_array_chain(100, 32))
+    dg = operator_dependency_graph(model.operators)
+    n_ops = len(dg)
+
+    tracemalloc.start()
+    with Timer() as closure_timer:
+        closure = transitive_closure(dg, compact=True)
+    closure_size, closure_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del closure
+
+    tracemalloc.start()
+    with Timer() as timer:
+        single_pass = OpMergePass(dg)
+        for i in range(10):
+            single_pass(only_merge_ops_with_view=i % 2 == 0)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    logger.info("Optimized %d to %d operators in 10 passes in %.2f s "
+                "(peak memory %.1f MB). Computing the transitive closure "
+                "takes %.2f s and %.1f MB (peak %.1f MB).",
+                n_ops, len(dg), timer.duration, peak / 1e6,
+                closure_timer.duration, closure_size / 1e6,
+                closure_peak / 1e6)
+    assert {op: set(dependents) for op, dependents in iteritems(
+        single_pass.dependents)} == transitive_closure(dg)
@@ -5,7 +5,7 @@ import nengo
 from nengo.builder import Model
 from nengo.builder.signal import Signal, SignalDict
 from nengo.exceptions import SignalError
-from nengo.utils.compat import itervalues
+from nengo.utils.compat import itervalues, pickle
 
 
 def test_signaldict():
@@ -86,6 +86,89 @@ def test_signaldict_reset():
     assert np.allclose(signaldict[two_d], np.array([[1], [1]]))
 
 
+def test_signaldict_arena():
+    """Tests SignalDict's init_arena and reset_all functions."""
+    signaldict = SignalDict()
+    a = Signal([1., 2., 3.], name='a')
+    b = Signal(np.array(4, dtype=np.int32), name='b')
+    c = Signal([[5.], [6.]], name='c')
+    ro = Signal([7., 8.], name='ro', readonly=True)
+    other = Signal([9.], name='other')
+
+    signaldict.init_arena([a, b, ro, c])
+    with pytest.raises(SignalError):
+        signaldict.init_arena([other])
+    signaldict.init(other)
+    view = c[1, :]
+    signaldict.init(view)
+
+    # signals are contiguous views of the arena, with aligned offsets
+    assert signaldict.arena.nbytes == 48
+    for sig in (a, b, c):
+        assert np.array_equal(signaldict[sig], sig.initial_value)
+        assert signaldict[sig].dtype == sig.dtype
+        assert np.may_share_memory(signaldict[sig], signaldict.arena)
+        assert signaldict[sig].ctypes.data % sig.dtype.alignment == 0
+    assert not np.may_share_memory(signaldict[ro], signaldict.arena)
+    assert not np.may_share_memory(signaldict[other], signaldict.arena)
+
+    signaldict[a] = [-1, -2, -3]
+    signaldict[b] = -4
+    signaldict[view] = -6
+    signaldict[other] = -9
+    assert np.array_equal(signaldict[c], [[5], [-6]])
+
+    signaldict.reset_all()
+    for sig in (a, b, c, other, view):
+        assert np.array_equal(signaldict[sig], sig.initial_value)
+
+
+def test_signaldict_dtype():
+    """Tests SignalDict's dtype argument."""
+    signaldict = SignalDict(dtype=np.float32)
+    a = Signal([[1., 2., 3.], [4., 5., 6.]], name='a')
+    b = Signal(np.arange(4), name='b')
+    c = Signal([7.], name='c')
+    ro = Signal([8., 9.], name='ro', readonly=True)
+    a_view = a[:, 1:]
+
+    signaldict.init_arena([a, b])
+    signaldict.init(a_view)
+    signaldict.init(ro)
+    signaldict.init(c)
+    assert SignalDict(dtype=np.float32, keep_dtype=[c]).signal_dtype(c) == (
+        np.float64)
+
+    for sig in (a, c, ro, a_view):
+        assert signaldict[sig].dtype == np.float32
+        assert np.array_equal(signaldict[sig], sig.initial_value)
+    assert signaldict[b].dtype == b.dtype
+    assert not signaldict[ro].flags.writeable
+
+    # views are in the right place after conversion
+    signaldict[a_view] = [[-2, -3], [-5, -6]]
+    assert np.array_equal(signaldict[a], [[1, -2, -3], [4, -5, -6]])
+    assert np.array_equal(signaldict[a[1, :2]], [4, -5])
+
+    signaldict.reset_all()
+    assert np.array_equal(signaldict[a], a.initial_value)
+
+
+def test_signaldict_unpickled_readonly():
+    """Tests views of unpickled readonly signals, whose data may be in
+    readonly memory."""
+    ro = Signal(np.arange(1000.), name='ro', readonly=True)
+    ro, ro_view = pickle.loads(pickle.dumps(
+        (ro, ro[:10]), pickle.HIGHEST_PROTOCOL))
+
+    signaldict = SignalDict()
+    signaldict.init(ro)
+    signaldict.init(ro_view)
+    assert not signaldict[ro].flags.writeable
+    assert signaldict[ro_view].flags.writeable
+    assert np.array_equal(signaldict[ro], np.arange(1000.))
+
+
 def test_assert_named_signals():
     """Make sure assert_named_signals works."""
     Signal(np.array(0.))
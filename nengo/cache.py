@@ -1,13 +1,20 @@
 """Caching capabilities for a faster build process."""
 
+from collections import OrderedDict
 import errno
 import hashlib
+import importlib
+from io import BytesIO
 import logging
+import marshal
 import os
 import shutil
 import struct
 from subprocess import CalledProcessError
 import sys
+import threading
+import time
+import types
 from uuid import uuid1
 import warnings
 
@@ -455,6 +462,594 @@ class WriteableCacheIndex(CacheIndex):
         self._removed_files.clear()
 
 
+class ShardedCacheIndex(CacheIndex):
+    """Cache index split into shards by the first two characters of the keys.
+
+    Like `.CacheIndex`, it maps keys to (filename, start, end) tuples and has
+    to be used in a ``with`` block. Keys have to be strings. Each shard is
+    only loaded when a key in it is looked up for the first time within the
+    ``with`` block, so lookups do not load the whole index.
+
+    This class only provides read access to the cache index. For write
+    access use `.WriteableShardedCacheIndex`.
+
+    Parameters
+    ----------
+    cache_dir : str
+        Path where the cache is stored.
+
+    Attributes
+    ----------
+    cache_dir : str
+        Path where the cache is stored.
+    index_path : str
+        Path to the directory with the shards of the cache index.
+    legacy_index_path : str
+        Path to a potentially existing `.CacheIndex` file. If there are no
+        shards, the entries of this file are used instead. A
+        `.WriteableShardedCacheIndex` moves them into the shards.
+    VERSION (class attribute) : int
+        Highest supported version, and version used to store the shards.
+
+    Notes
+    -----
+    Each shard is stored in two files named after the key prefix: a pickle
+    file (``.pkl``) with the shard as it was when it was last compacted, in
+    the same format as the `.CacheIndex` file followed by the access
+    statistics, and an append-only log (``.log``) of the changes made since
+    then. Each change is a pickled ``(key, value)`` tuple preceded by its
+    length. A value of None removes the key, and a key of None removes all
+    entries for the set of filenames given as value. Accesses are logged as
+    ``(key, n_accesses, last_access)`` tuples.
+    """
+    _INDEX = 'index.d'
+    _SHARD_EXT = '.pkl'
+    _LOG_EXT = '.log'
+    _LOCK_EXT = '.lock'
+    _HEADER = struct.Struct('<I')
+    VERSION = 3
+
+    def __init__(self, cache_dir):
+        super(ShardedCacheIndex, self).__init__(cache_dir)
+        self._shards = {}
+        self._stats = {}
+        self._legacy_index = None
+
+    @property
+    def legacy_index_path(self):
+        return os.path.join(self.cache_dir, CacheIndex._INDEX)
+
+    def __contains__(self, key):
+        return key in self._get_shard(key[:2])
+
+    def __getitem__(self, key):
+        return self._get_shard(key[:2])[key]
+
+    def __enter__(self):
+        self._shards = {}
+        self._stats = {}
+        self._legacy_index = None
+        if (not os.path.isdir(self.index_path)
+                and os.path.exists(self.legacy_index_path)):
+            legacy = CacheIndex(self.cache_dir)
+            with legacy:
+                self._legacy_index = legacy._index
+        return self
+
+    def _shard_path(self, prefix, ext):
+        return os.path.join(self.index_path, prefix + ext)
+
+    def _prefixes(self):
+        """Returns the key prefixes of all stored shards."""
+        if not os.path.isdir(self.index_path):
+            return set()
+        return set(os.path.splitext(f)[0] for f in os.listdir(self.index_path)
+                   if f.endswith((self._SHARD_EXT, self._LOG_EXT)))
+
+    def _get_shard(self, prefix):
+        if self._legacy_index is not None:
+            return self._legacy_index
+        if prefix not in self._shards:
+            self._shards[prefix], self._stats[prefix] = self._load_shard(
+                prefix)
+        return self._shards[prefix]
+
+    def _load_shard(self, prefix):
+        try:
+            return self._read_shard(prefix)
+        except Exception:
+            logger.exception(
+                "Decoder cache index shard %r corrupted. Ignoring it.", prefix)
+            return {}, {}
+
+    def _read_shard(self, prefix):
+        shard = {}
+        stats = {}
+        try:
+            with open(self._shard_path(prefix, self._SHARD_EXT), 'rb') as f:
+                version = pickle.load(f)
+                if (version[0] > self.VERSION
+                        or version[1] > pickle.HIGHEST_PROTOCOL):
+                    raise CacheIOError("Unsupported cache index file format.")
+                shard = pickle.load(f)
+                try:
+                    stats = pickle.load(f)
+                except EOFError:
+                    pass  # compacted without access statistics
+        except IOError as err:
+            if err.errno != errno.ENOENT:
+                raise
+        assert isinstance(shard, dict) and isinstance(stats, dict)
+
+        try:
+            with open(self._shard_path(prefix, self._LOG_EXT), 'rb') as f:
+                log = f.read()
+        except IOError as err:
+            if err.errno != errno.ENOENT:
+                raise
+            log = b''
+        self._apply(shard, stats, self._read_log(log))
+        return shard, stats
+
+    def _read_log(self, log):
+        records = []
+        pos = 0
+        while pos + self._HEADER.size <= len(log):
+            size, = self._HEADER.unpack_from(log, pos)
+            pos += self._HEADER.size
+            if pos + size > len(log):
+                break
+            records.append(pickle.loads(log[pos:pos + size]))
+            pos += size
+        if pos != len(log):
+            # the last change was not completely written
+            logger.debug("Ignoring incomplete cache index log entry.")
+        return records
+
+    def _relpath(self, filename):
+        cache_dir = os.path.realpath(self.cache_dir)
+        path = os.path.realpath(filename)
+        # compare with a trailing separator, so that sibling directories
+        # starting with the same name (e.g., "cache2") do not match
+        if path.startswith(os.path.join(cache_dir, '')):
+            filename = os.path.relpath(path, cache_dir)
+        return filename
+
+    def _apply(self, shard, stats, records):
+        for record in records:
+            if len(record) == 3:
+                key, n_accesses, last_access = record
+                if key in shard:
+                    n, t = stats.get(key, (0, last_access))
+                    stats[key] = (n + n_accesses, max(t, last_access))
+                continue
+
+            key, value = record
+            if key is None:
+                for k in [k for k, v in iteritems(shard)
+                          if self._relpath(v[0]) in value]:
+                    del shard[k]
+                    stats.pop(k, None)
+            else:
+                stats.pop(key, None)
+                if value is None:
+                    shard.pop(key, None)
+                else:
+                    shard[key] = value
+
+    def file_stats(self):
+        """Returns how often and when the files in the cache were used.
+
+        Loads all shards of the index. The access statistics of all entries
+        stored in the same file are combined. Entries without statistics
+        (e.g., entries moved from a `.CacheIndex` file) are not counted.
+
+        Returns
+        -------
+        dict
+            Maps the path of each file, relative to the cache directory, to a
+            tuple of the total number of accesses to its entries and the time
+            of the last access (in seconds since the epoch).
+        """
+        if self._legacy_index is not None:
+            return {}
+        result = {}
+        for prefix in self._prefixes():
+            shard = self._get_shard(prefix)
+            for key, (n, t) in iteritems(self._stats[prefix]):
+                path = self._relpath(shard[key][0])
+                n_total, t_last = result.get(path, (0, t))
+                result[path] = (n_total + n, max(t_last, t))
+        return result
+
+
+class WriteableShardedCacheIndex(ShardedCacheIndex):
+    """Writable cache index split into shards by key prefix.
+
+    This class allows write access to the cache index.
+
+    Changes are appended to the logs of the shards when the ``with`` block
+    is exited, or when `.sync` is called. Each shard is locked against
+    concurrent access with its own file lock while changes are appended, so
+    that writers rarely wait for each other. A shard is compacted (i.e., its
+    log is merged into its pickle file) when its log exceeds
+    ``COMPACT_SIZE`` bytes.
+
+    If a `.CacheIndex` file exists in the cache directory when the ``with``
+    block is entered, its entries are moved into the shards.
+
+    Uses of the entries are counted with `.record_access`, so that the cache
+    can decide which entries to evict (see `.EvictionPolicy`). Setting an
+    entry counts as its first use.
+
+    Parameters
+    ----------
+    cache_dir : str
+        Path where the cache is stored.
+    """
+    COMPACT_SIZE = 2 ** 16
+
+    def __init__(self, cache_dir):
+        super(WriteableShardedCacheIndex, self).__init__(cache_dir)
+        self._updates = {}
+        self._accesses = {}
+        self._removed_files = set()
+
+    def __contains__(self, key):
+        updates = self._updates.get(key[:2], {})
+        if key in updates:
+            return updates[key] is not None
+        return super(WriteableShardedCacheIndex, self).__contains__(key)
+
+    def __getitem__(self, key):
+        value = self._updates.get(key[:2], {}).get(key, False)
+        if value is None:
+            raise KeyError(key)
+        elif value:
+            return value
+        return super(WriteableShardedCacheIndex, self).__getitem__(key)
+
+    def __setitem__(self, key, value):
+        if not isinstance(value, tuple) or len(value) != 3:
+            raise ValueError(
+                "Cache entries must include filename, start, and end.")
+        self._updates.setdefault(key[:2], {})[key] = value
+        self._accesses.get(key[:2], {}).pop(key, None)
+        self.record_access(key)
+
+    def __delitem__(self, key):
+        self._updates.setdefault(key[:2], {})[key] = None
+        self._accesses.get(key[:2], {}).pop(key, None)
+
+    def __enter__(self):
+        safe_makedirs(self.index_path)
+        if os.path.exists(self.legacy_index_path):
+            self._migrate()
+        return super(WriteableShardedCacheIndex, self).__enter__()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.sync()
+
+    def _lock(self, prefix):
+        return FileLock(self._shard_path(prefix, self._LOCK_EXT))
+
+    def _load_shard(self, prefix):
+        try:
+            return self._read_shard(prefix)
+        except Exception:
+            logger.exception(
+                "Decoder cache index shard %r corrupted. Reinitializing it.",
+                prefix)
+            try:
+                with self._lock(prefix):
+                    for ext in (self._SHARD_EXT, self._LOG_EXT):
+                        safe_remove(self._shard_path(prefix, ext))
+            except TimeoutError:
+                pass
+            return {}, {}
+
+    def _migrate(self):
+        """Moves the entries of a `.CacheIndex` file into the shards."""
+        with FileLock(self.legacy_index_path + '.lock'):
+            legacy = CacheIndex(self.cache_dir)
+            try:
+                with legacy:
+                    entries = legacy._index
+            except IOError as err:
+                if err.errno != errno.ENOENT:
+                    raise
+                return  # already migrated by another process
+            except Exception:
+                logger.exception(
+                    "Decoder cache index corrupted. Not migrating it.")
+                entries = {}
+
+            shards = {}
+            for key, value in iteritems(entries):
+                if is_string(key):
+                    shards.setdefault(key[:2], []).append((key, value))
+            for prefix, records in iteritems(shards):
+                with self._lock(prefix):
+                    self._append(prefix, records)
+            safe_remove(legacy.index_path)
+            safe_remove(legacy.legacy_path)
+
+    def record_access(self, key):
+        """Records a use of the entry for ``key``."""
+        accesses = self._accesses.setdefault(key[:2], {})
+        n_accesses, _ = accesses.get(key, (0, None))
+        accesses[key] = (n_accesses + 1, time.time())
+
+    def remove_file_entry(self, filename):
+        """Remove entries mapping to ``filename``."""
+        self._removed_files.add(self._relpath(filename))
+
+    def clear(self):
+        """Removes all entries from the cache index."""
+        self._updates.clear()
+        self._accesses.clear()
+        self._removed_files.clear()
+        self._shards = {}
+        self._stats = {}
+        for prefix in self._prefixes():
+            with self._lock(prefix):
+                for ext in (self._SHARD_EXT, self._LOG_EXT):
+                    safe_remove(self._shard_path(prefix, ext))
+
+    def _append(self, prefix, records):
+        assert len(records) > 0
+        data = []
+        for record in records:
+            pickled = pickle.dumps(record, pickle.HIGHEST_PROTOCOL)
+            data.append(self._HEADER.pack(len(pickled)))
+            data.append(pickled)
+        path = self._shard_path(prefix, self._LOG_EXT)
+        with open(path, 'ab') as f:
+            f.write(b''.join(data))
+            size = f.tell()
+        if size > self.COMPACT_SIZE:
+            self._compact(prefix)
+
+    def _compact(self, prefix):
+        shard, stats = self._read_shard(prefix)
+        path = self._shard_path(prefix, self._SHARD_EXT)
+        with open(path + '.part', 'wb') as f:
+            pickle.dump((self.VERSION, pickle.HIGHEST_PROTOCOL), f, 2)
+            pickle.dump(shard, f, pickle.HIGHEST_PROTOCOL)
+            pickle.dump(stats, f, pickle.HIGHEST_PROTOCOL)
+        replace(path + '.part', path)
+        with open(self._shard_path(prefix, self._LOG_EXT), 'wb'):
+            pass
+
+    def compact(self):
+        """Merges the logs of all shards into their pickle files.
+
+        Each shard is locked by its file lock while it is compacted.
+        """
+        for prefix in self._prefixes():
+            try:
+                with self._lock(prefix):
+                    self._compact(prefix)
+            except TimeoutError:
+                logger.debug("Not compacting cache index shard %r. Lock "
+                             "could not be acquired.", prefix)
+
+    def sync(self):
+        """Write changes to the cache index back to disk.
+
+        Changes to each shard are locked by the shard's file lock.
+        """
+        records = {prefix: list(iteritems(updates))
+                   for prefix, updates in iteritems(self._updates)}
+        for prefix, accesses in iteritems(self._accesses):
+            records.setdefault(prefix, []).extend(
+                (key, n, t) for key, (n, t) in iteritems(accesses))
+        if len(self._removed_files) > 0:
+            removed = frozenset(self._removed_files)
+            for prefix in self._prefixes():
+                records.setdefault(prefix, []).append((None, removed))
+
+        for prefix, shard_records in iteritems(records):
+            if len(shard_records) == 0:
+                continue
+            try:
+                with self._lock(prefix):
+                    self._append(prefix, shard_records)
+            except TimeoutError:
+                warnings.warn(
+                    "Decoder cache index could not acquire lock. "
+                    "Cache index was not synced.")
+                continue
+            if prefix in self._shards:
+                self._apply(
+                    self._shards[prefix], self._stats[prefix], shard_records)
+
+        self._updates.clear()
+        self._accesses.clear()
+        self._removed_files.clear()
+
+
+class MemoryCache(object):
+    """In-memory cache of solver results, evicting least recently used items.
+
+    `.DecoderCache` looks up decoders here before reading them from disk,
+    so that rebuilding the same model in one process does not read the
+    same files over and over. Cached arrays are read-only.
+
+    Parameters
+    ----------
+    size : int or str
+        Maximum total size of the cached arrays, in bytes.
+
+    Attributes
+    ----------
+    hits : int
+        Number of lookups that found an item.
+    misses : int
+        Number of lookups that did not find an item. `.DecoderCache` only
+        looks up decoders that are in its index, so this counts the
+        decoders that were read from disk.
+    size : int
+        Maximum total size of the cached arrays, in bytes.
+    """
+
+    def __init__(self, size):
+        self.size = human2bytes(size) if is_string(size) else size
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()
+        self._nbytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._items)
+
+    @property
+    def nbytes(self):
+        """Total size of the cached arrays, in bytes."""
+        return self._nbytes
+
+    def get(self, key):
+        """Returns the ``(decoders, info)`` stored under ``key``, or None."""
+        with self._lock:
+            item = self._items.pop(key, None)
+            if item is None:
+                self.misses += 1
+                return None
+            self._items[key] = item
+            self.hits += 1
+        decoders, info, _ = item
+        return decoders, dict(info)
+
+    def put(self, key, decoders, info):
+        """Stores ``decoders`` and ``info`` under ``key``.
+
+        Read-only copies of writable arrays are stored, so that the caller
+        can keep using the given arrays. Items larger than the cache are not
+        stored.
+        """
+        nbytes = decoders.nbytes + sum(v.nbytes for v in info.values()
+                                       if isinstance(v, np.ndarray))
+        if nbytes > self.size:
+            return
+        decoders = self._readonly(decoders)
+        info = {k: self._readonly(v) if isinstance(v, np.ndarray) else v
+                for k, v in iteritems(info)}
+
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self._nbytes -= old[2]
+            self._items[key] = (decoders, info, nbytes)
+            self._nbytes += nbytes
+            self._shrink(self.size)
+
+    @staticmethod
+    def _readonly(array):
+        if array.flags.writeable:
+            array = array.copy()
+            array.setflags(write=False)
+        return array
+
+    def shrink(self, limit=None):
+        """Removes least recently used items until the cache meets a limit.
+
+        Parameters
+        ----------
+        limit : int, optional
+            Maximum size of the cache in bytes. Defaults to ``size``.
+        """
+        with self._lock:
+            self._shrink(self.size if limit is None else limit)
+
+    def _shrink(self, limit):
+        while self._nbytes > limit:
+            _, (_, _, nbytes) = self._items.popitem(last=False)
+            self._nbytes -= nbytes
+
+    def clear(self):
+        """Removes all items and resets the statistics."""
+        with self._lock:
+            self._items.clear()
+            self._nbytes = 0
+            self.hits = 0
+            self.misses = 0
+
+    def remove(self, match):
+        """Removes all items whose key satisfies ``match(key)``."""
+        with self._lock:
+            for key in [key for key in self._items if match(key)]:
+                self._nbytes -= self._items.pop(key)[2]
+
+
+class EvictionPolicy(object):
+    """Decides which files `.DecoderCache.shrink` removes first.
+
+    Subclasses implement `.score`. Files with lower scores are removed first.
+    """
+
+    def score(self, size, n_accesses, last_access, now):
+        """Returns the score of a cache file.
+
+        Parameters
+        ----------
+        size : int
+            Size of the file in bytes.
+        n_accesses : int
+            Number of uses of the decoders stored in the file.
+        last_access : float
+            Time of the last use of the decoders stored in the file, in
+            seconds since the epoch.
+        now : float
+            Current time, in seconds since the epoch.
+
+        Returns
+        -------
+        Any comparable object.
+        """
+        raise NotImplementedError("Must be implemented by subclasses")
+
+
+class LRUPolicy(EvictionPolicy):
+    """Removes the least recently used files first."""
+
+    def score(self, size, n_accesses, last_access, now):
+        return last_access
+
+
+class LFUPolicy(EvictionPolicy):
+    """Removes the least frequently used files first.
+
+    Files used equally often are removed in least recently used order.
+    """
+
+    def score(self, size, n_accesses, last_access, now):
+        return n_accesses, last_access
+
+
+class SizeAwareLFUPolicy(EvictionPolicy):
+    """Removes the files with the fewest recent uses per byte first.
+
+    The number of uses of a file is halved every ``half_life`` seconds since
+    its last use, and divided by the size of the file. Thus, large files have
+    to be used more often than small files to stay in the cache, and files
+    that have not been used for a long time are removed even if they were
+    used often before.
+
+    Parameters
+    ----------
+    half_life : float, optional (Default: 604800, i.e. one week)
+        Time in seconds after which the uses of a file count half.
+    """
+
+    def __init__(self, half_life=7 * 24 * 60 * 60.):
+        self.half_life = half_life
+
+    def score(self, size, n_accesses, last_access, now):
+        age = max(now - last_access, 0.)
+        return n_accesses * 0.5 ** (age / self.half_life) / max(size, 1)
+
+
 class DecoderCache(object):
     """Cache for decoders.
 
@@ -474,23 +1069,55 @@ class DecoderCache(object):
         Path to the directory in which the cache will be stored. It will be
         created if it does not exists. Will use the value returned by
         `.get_default_dir`, if ``None``.
+    memory_cache : MemoryCache or None
+        In-memory cache in front of the files. Will use the cache returned
+        by `.get_default_memory_cache`, if ``None``.
+    mmap_size : int or str or None
+        Decoders stored in cache entries of at least this size are
+        memory-mapped from the cache files instead of being read into memory
+        (see ``nengo.utils.nco.read``). Will use the ``mmap_size`` option in
+        the ``decoder_cache`` section of the Nengo RC settings, if ``None``.
+    eviction_policy : EvictionPolicy or None
+        Decides which files are removed first when shrinking the cache. Will
+        use the policy returned by `.get_default_eviction_policy`, if
+        ``None``.
+
+    Attributes
+    ----------
+    memory_cache : MemoryCache
+        In-memory cache in front of the files. Its ``hits`` and ``misses``
+        count the lookups of all decoder caches sharing it.
+    eviction_policy : EvictionPolicy
+        Decides which files are removed first when shrinking the cache.
     """
 
     _CACHE_EXT = '.nco'
 
-    def __init__(self, readonly=False, cache_dir=None):
+    def __init__(self, readonly=False, cache_dir=None, memory_cache=None,
+                 mmap_size=None, eviction_policy=None):
         self.readonly = readonly
         if cache_dir is None:
             cache_dir = self.get_default_dir()
         self.cache_dir = cache_dir
+        self.memory_cache = (get_default_memory_cache() if memory_cache is None
+                             else memory_cache)
+        if mmap_size is None:
+            mmap_size = rc.get('decoder_cache', 'mmap_size')
+        self.mmap_size = (human2bytes(mmap_size) if is_string(mmap_size)
+                          else mmap_size)
+        self.eviction_policy = (get_default_eviction_policy()
+                                if eviction_policy is None
+                                else eviction_policy)
         if readonly:
-            self._index = CacheIndex(cache_dir)
+            self._index = ShardedCacheIndex(cache_dir)
         else:
             safe_makedirs(self.cache_dir)
-            self._index = WriteableCacheIndex(cache_dir)
+            self._index = WriteableShardedCacheIndex(cache_dir)
         self._fragment_size = get_fragment_size(self.cache_dir)
         self._fd = None
         self._in_context = False
+        # guards the index and the open file when solving in several threads
+        self._lock = threading.Lock()
 
     def __enter__(self):
         try:
@@ -498,7 +1125,7 @@ class DecoderCache(object):
                 self._index.__enter__()
             except TimeoutError:
                 self.readonly = True
-                self._index = CacheIndex(self.cache_dir)
+                self._index = ShardedCacheIndex(self.cache_dir)
                 self._index.__enter__()
                 warnings.warn("Decoder cache could not acquire lock and was "
                               "set to readonly mode.")
@@ -514,6 +1141,9 @@ class DecoderCache(object):
     def __exit__(self, exc_type, exc_value, traceback):
         self._in_context = False
         self._close_fd()
+        logger.debug("Memory cache: %d hits, %d misses, %s used.",
+                     self.memory_cache.hits, self.memory_cache.misses,
+                     bytes2human(self.memory_cache.nbytes))
         if self._index is not None:
             rval = self._index.__exit__(exc_type, exc_value, traceback)
             return rval
@@ -548,7 +1178,7 @@ class DecoderCache(object):
         files = []
         for subdir in os.listdir(self.cache_dir):
             path = os.path.join(self.cache_dir, subdir)
-            if os.path.isdir(path):
+            if os.path.isdir(path) and subdir != ShardedCacheIndex._INDEX:
                 files.extend(os.path.join(path, f) for f in os.listdir(path))
         return files
 
@@ -576,22 +1206,42 @@ class DecoderCache(object):
         """Invalidates the cache (i.e. removes all cache files)."""
         if self.readonly:
             raise CacheIOError("Cannot invalidate a readonly cache.")
+        self.memory_cache.remove(lambda key: key[0] == self.cache_dir)
         self._close_fd()
         with self._index:
             for path in self.get_files():
-                self.remove_file(path)
+                safe_remove(path)
+            self._index.clear()
 
-    def shrink(self, limit=None):  # noqa: C901
+    def shrink(self, limit=None, background=False):
         """Reduces the size of the cache to meet a limit.
 
+        Files are removed in the order given by the `.eviction_policy`,
+        based on the uses of their decoders recorded in the cache index.
+
         Parameters
         ----------
         limit : int, optional
             Maximum size of the cache in bytes.
+        background : bool, optional (Default: False)
+            Whether to shrink the cache in a background thread instead of
+            waiting for it. Only one background thread shrinks each cache
+            directory at a time.
+
+        Returns
+        -------
+        threading.Thread or None
+            The thread shrinking the cache, if ``background`` is True.
         """
         if self.readonly:
             logger.info("Tried to shrink a readonly cache.")
-            return
+            return None
+
+        if background:
+            # the thread only sees the files and entries written so far
+            self._close_fd()
+            self._index.sync()
+            return _shrink_in_background(self, limit)
 
         if limit is None:
             limit = rc.get('decoder_cache', 'size')
@@ -600,28 +1250,87 @@ class DecoderCache(object):
 
         self._close_fd()
 
+        fileinfo = self._file_info()
+        excess = sum(size for _, size, _ in fileinfo) - limit
+        if excess <= 0:
+            return None
+
+        try:
+            with self._index:
+                removed = self._remove_file_entries(
+                    self._score_files(fileinfo), excess)
+        except TimeoutError:
+            logger.debug("Not shrinking cache. Lock could not be acquired.")
+            return None
+
+        # the index no longer refers to the files, so removing them cannot
+        # leave dangling entries if the process exits while shrinking
+        for path in removed:
+            safe_remove(path)
+        return None
+
+    def _file_info(self):
+        """Returns ``(path, size, mtime)`` tuples for the files in the cache.
+
+        Sizes are aligned to the fragment size of the file system.
+        """
         fileinfo = []
-        excess = -limit
         for path in self.get_files():
             stat = safe_stat(path)
             if stat is not None:
                 aligned_size = byte_align(stat.st_size, self._fragment_size)
-                excess += aligned_size
-                fileinfo.append((stat.st_atime, aligned_size, path))
+                fileinfo.append((path, aligned_size, stat.st_mtime))
+        return fileinfo
 
-        # Remove the least recently accessed first
-        fileinfo.sort()
+    def _score_files(self, fileinfo):
+        """Scores ``(path, size, mtime)`` tuples with the eviction policy.
 
-        try:
-            with self._index:
-                for _, size, path in fileinfo:
-                    if excess <= 0:
-                        break
-
-                    excess -= size
-                    self.remove_file(path)
-        except TimeoutError:
-            logger.debug("Not shrinking cache. Lock could not be acquired.")
+        Returns ``(score, path, size)`` tuples, lowest score first.
+        """
+        stats = self._index.file_stats()
+        now = time.time()
+        scored = []
+        for path, size, mtime in fileinfo:
+            # files without recorded uses count as used once when they were
+            # last written
+            n_accesses, last_access = stats.get(
+                os.path.relpath(path, self.cache_dir), (1, mtime))
+            score = self.eviction_policy.score(
+                size, n_accesses, last_access, now)
+            scored.append((score, path, size))
+        scored.sort()
+        return scored
+
+    def _remove_file_entries(self, scored, excess):
+        """Removes the index entries of files until ``excess`` bytes are freed.
+
+        Returns the paths of the files that are no longer in the index.
+        """
+        removed = []
+        for _, path, size in scored:
+            if excess <= 0:
+                break
+            excess -= size
+            self._index.remove_file_entry(path)
+            removed.append(path)
+        return removed
+
+    def shrink_after_build(self):
+        """Shrinks the cache as set in the Nengo RC settings.
+
+        Called at the end of each build. The ``shrink`` option in the
+        ``decoder_cache`` section selects whether the cache is shrunk in the
+        ``foreground`` (i.e., the build waits for it; the default), in a
+        ``background`` thread, or only when `.shrink` is called ``manually``.
+        """
+        mode = rc.get('decoder_cache', 'shrink').lower()
+        if mode == 'background':
+            self.shrink(background=True)
+        elif mode == 'foreground':
+            self.shrink()
+        elif mode != 'manually':
+            warnings.warn("Unknown decoder cache shrink mode %r. The cache "
+                          "was not shrunk." % mode)
 
     def remove_file(self, path):
         """Removes the file at ``path`` from the cache."""
@@ -663,13 +1372,32 @@ class DecoderCache(object):
                 return solver_fn(conn, gain, bias, x, targets,
                                  rng=rng, **uncached_kwargs)
 
+            memory_key = (self.cache_dir, key)
             try:
-                path, start, end = self._index[key]
-                if self._fd is not None:
-                    self._fd.flush()
+                with self._lock:
+                    path, start, end = self._index[key]
+                # decoders are only read from memory while they are stored,
+                # so that invalidating or shrinking the files also drops them
+                result = (self.memory_cache.get(memory_key)
+                          if os.path.exists(path) else None)
+                if result is not None:
+                    self._record_access(key)
+                    logger.debug(
+                        "Cache hit [%s]: Loaded decoders from memory.", key)
+                    return result
+                with self._lock:
+                    if self._fd is not None:
+                        self._fd.flush()
+                # large decoders are mapped copy-on-write, so that they are
+                # shared with other processes, but writing to them (e.g.,
+                # to views of their signals) does not change the file
+                mmap_mode = 'c' if end - start >= self.mmap_size else None
                 with open(path, 'rb') as f:
                     f.seek(start)
-                    info, decoders = nco.read(f)
+                    info, decoders = nco.read(f, mmap_mode=mmap_mode)
+                if mmap_mode is not None:
+                    decoders.setflags(write=False)
+                self._record_access(key)
             except Exception as err:
                 if isinstance(err, KeyError):
                     logger.debug("Cache miss [%s].", key)
@@ -678,17 +1406,25 @@ class DecoderCache(object):
                 decoders, info = solver_fn(conn, gain, bias, x, targets,
                                            rng=rng, **uncached_kwargs)
                 if not self.readonly:
-                    fd = self._get_fd()
-                    start = fd.tell()
-                    nco.write(fd, info, decoders)
-                    end = fd.tell()
-                    self._index[key] = (fd.name, start, end)
+                    with self._lock:
+                        fd = self._get_fd()
+                        start = fd.tell()
+                        nco.write(fd, info, decoders)
+                        end = fd.tell()
+                        self._index[key] = (fd.name, start, end)
+                    self.memory_cache.put(memory_key, decoders, info)
             else:
                 logger.debug("Cache hit [%s]: Loaded stored decoders.", key)
+                self.memory_cache.put(memory_key, decoders, info)
             return decoders, info
 
         return cached_solver
 
+    def _record_access(self, key):
+        if not self.readonly:
+            with self._lock:
+                self._index.record_access(key)
+
     def _get_cache_key(
             self, solver, neuron_type, gain, bias, x, targets, rng):
         h = hashlib.sha1()
@@ -700,6 +1436,12 @@ class DecoderCache(object):
             h.update(str(Fingerprint(solver)).encode('utf-8'))
             h.update(str(Fingerprint(neuron_type)).encode('utf-8'))
 
+        if rc.getboolean('rate_table', 'enabled'):
+            # decoders solved with tabulated rates differ slightly
+            h.update(b'rate_table')
+            for option in ('n_points', 'interpolation', 'tolerance'):
+                h.update(rc.get('rate_table', option).encode('utf-8'))
+
         h.update(np.ascontiguousarray(gain).data)
         h.update(np.ascontiguousarray(bias).data)
         h.update(np.ascontiguousarray(x).data)
@@ -742,13 +1484,76 @@ class NoDecoderCache(object):
     def get_size(self):
         return '0 B'
 
-    def shrink(self, limit=0):
+    def shrink(self, limit=0, background=False):
+        pass
+
+    def shrink_after_build(self):
         pass
 
     def invalidate(self):
         pass
 
 
+_shrink_threads = {}
+_shrink_threads_lock = threading.Lock()
+
+
+def _shrink_in_background(decoder_cache, limit):
+    with _shrink_threads_lock:
+        thread = _shrink_threads.get(decoder_cache.cache_dir)
+        if thread is not None and thread.is_alive():
+            return thread
+
+        # the thread uses its own cache, so that it does not close the file
+        # or sync the index of a build running at the same time
+        cache = DecoderCache(cache_dir=decoder_cache.cache_dir,
+                             memory_cache=decoder_cache.memory_cache,
+                             mmap_size=decoder_cache.mmap_size,
+                             eviction_policy=decoder_cache.eviction_policy)
+        thread = threading.Thread(target=cache.shrink, args=(limit,),
+                                  name="DecoderCache.shrink")
+        thread.daemon = True
+        _shrink_threads[decoder_cache.cache_dir] = thread
+        thread.start()
+    return thread
+
+
+def get_default_eviction_policy():
+    """Returns the `.EvictionPolicy` used by decoder caches by default.
+
+    The policy class is set by its full name (e.g.,
+    ``nengo.cache.LRUPolicy``) in the ``eviction_policy`` option in the
+    ``decoder_cache`` section of the Nengo RC settings.
+    """
+    name = rc.get('decoder_cache', 'eviction_policy')
+    try:
+        mod_name, cls_name = name.rsplit('.', 1)
+        return getattr(importlib.import_module(mod_name), cls_name)()
+    except Exception:
+        warnings.warn("Could not create eviction policy %r. Using "
+                      "SizeAwareLFUPolicy instead." % name)
+        return SizeAwareLFUPolicy()
+
+
+_memory_cache = None
+
+
+def get_default_memory_cache():
+    """Returns the `.MemoryCache` shared by decoder caches by default.
+
+    Its size is set from the ``memory_size`` option in the ``decoder_cache``
+    section of the Nengo RC settings.
+    """
+    global _memory_cache
+    size = human2bytes(rc.get('decoder_cache', 'memory_size'))
+    if _memory_cache is None:
+        _memory_cache = MemoryCache(size)
+    elif _memory_cache.size != size:
+        _memory_cache.size = size
+        _memory_cache.shrink()
+    return _memory_cache
+
+
 def get_default_decoder_cache():
     if rc.getboolean('decoder_cache', 'enabled'):
         decoder_cache = DecoderCache(
@@ -756,3 +1561,326 @@ def get_default_decoder_cache():
     else:
         decoder_cache = NoDecoderCache()
     return decoder_cache
+
+
+class _NetworkFingerprinter(object):
+    """Records the objects in a network while it is being pickled.
+
+    Used as the ``persistent_id`` of a pickler. Functions are replaced by
+    the hash of their code, their defaults, closure and attributes, so that
+    networks with lambdas can be fingerprinted; all other objects are
+    pickled normally. The recorded objects are kept alive, so that their
+    ``id`` stays unique while the fingerprint is in use.
+    """
+
+    _atomic_types = (bool, complex, float, type(None), bytes) + tuple(
+        int_types) + tuple(string_types)
+
+    def __init__(self):
+        self.objects = []
+        self._ids = set()
+
+    def __call__(self, obj):
+        if isinstance(obj, self._atomic_types):
+            return None
+        if id(obj) not in self._ids:
+            self._ids.add(id(obj))
+            self.objects.append(obj)
+        if isinstance(obj, types.FunctionType):
+            closure = obj.__closure__ or ()
+            return ('function',
+                    obj.__module__,
+                    getattr(obj, '__qualname__', obj.__name__),
+                    # version 2 has no references that depend on refcounts
+                    hashlib.sha1(marshal.dumps(obj.__code__, 2)).hexdigest(),
+                    obj.__defaults__,
+                    getattr(obj, '__kwdefaults__', None),
+                    tuple(cell.cell_contents for cell in closure),
+                    obj.__dict__)
+        return None
+
+
+def _qualname(obj):
+    return "%s.%s" % (obj.__module__,
+                      getattr(obj, '__qualname__', obj.__name__))
+
+
+class ModelCache(object):
+    """Cache for built and optimized models.
+
+    Stores the `.Model` built from a network, together with its operator
+    dependency graph, in a file named after a hash of the network's
+    structure (including all parameters and seeds), the time step, whether
+    the model was optimized, the Nengo, NumPy and Python versions, the Nengo
+    RC settings affecting the build and the registered builders. A
+    `.Simulator` for an identical network then loads the model from this
+    file instead of building it.
+
+    Only networks with a seed are cached. Objects in the loaded model
+    refer to the objects of the network being simulated, like in a freshly
+    built model. The `.Simulator` runs the operators of the loaded model in
+    the same order as those of the stored model, so both give identical
+    results. Be aware that, like for the `.DecoderCache`, only the code,
+    defaults and closures of functions (e.g., node outputs) are part of the
+    hash, not the global state they use. Networks or models that cannot be
+    pickled (e.g., because of functions defined in a local scope with
+    ``def``) are built as usual.
+
+    Parameters
+    ----------
+    readonly : bool
+        Indicates that already existing models in the cache will be used,
+        but no new models will be written to the disk.
+    cache_dir : str or None
+        Path to the directory in which the cache will be stored. It will be
+        created if it does not exists. Will use the value returned by
+        `.get_default_dir`, if ``None``.
+    """
+
+    _CACHE_EXT = '.model'
+
+    # RC sections that do not change the built model
+    _ignored_rc_sections = (
+        'decoder_cache', 'model_cache', 'progress', 'exceptions')
+
+    def __init__(self, readonly=False, cache_dir=None):
+        self.readonly = readonly
+        if cache_dir is None:
+            cache_dir = self.get_default_dir()
+        self.cache_dir = cache_dir
+        if not readonly:
+            safe_makedirs(self.cache_dir)
+
+    @staticmethod
+    def get_default_dir():
+        """Returns the default location of the cache.
+
+        Returns
+        -------
+        str
+        """
+        return rc.get('model_cache', 'path')
+
+    def get_files(self):
+        """Returns all of the files in the cache.
+
+        Returns
+        -------
+        list of str
+        """
+        if not os.path.isdir(self.cache_dir):
+            return []
+        return [os.path.join(self.cache_dir, f)
+                for f in os.listdir(self.cache_dir)
+                if f.endswith(self._CACHE_EXT)]
+
+    def get_size(self):
+        """Returns the size of the cache with units as a string.
+
+        Returns
+        -------
+        str
+        """
+        return bytes2human(self.get_size_in_bytes())
+
+    def get_size_in_bytes(self):
+        """Returns the size of the cache in bytes as an int.
+
+        Returns
+        -------
+        int
+        """
+        stats = (safe_stat(f) for f in self.get_files())
+        return sum(st.st_size for st in stats if st is not None)
+
+    def invalidate(self):
+        """Invalidates the cache (i.e. removes all cache files)."""
+        if self.readonly:
+            raise CacheIOError("Cannot invalidate a readonly cache.")
+        for path in self.get_files():
+            safe_remove(path)
+
+    def shrink(self, limit=None):
+        """Reduces the size of the cache to meet a limit.
+
+        Parameters
+        ----------
+        limit : int, optional
+            Maximum size of the cache in bytes.
+        """
+        if self.readonly:
+            logger.info("Tried to shrink a readonly cache.")
+            return
+
+        if limit is None:
+            limit = rc.get('model_cache', 'size')
+        if is_string(limit):
+            limit = human2bytes(limit)
+
+        fileinfo = []
+        excess = -limit
+        for path in self.get_files():
+            stat = safe_stat(path)
+            if stat is not None:
+                excess += stat.st_size
+                fileinfo.append((stat.st_atime, stat.st_size, path))
+
+        # Remove the least recently accessed first
+        fileinfo.sort()
+        for _, size, path in fileinfo:
+            if excess <= 0:
+                break
+            excess -= size
+            safe_remove(path)
+
+    def get_key(self, network, dt, optimize):
+        """Returns the key of the model built from a network.
+
+        Parameters
+        ----------
+        network : Network
+            The network to be built.
+        dt : float
+            The time step of the model.
+        optimize : bool
+            Whether the model is optimized.
+
+        Returns
+        -------
+        key : str or None
+            Hash identifying the model, or None if the model cannot be
+            cached.
+        objects : list or None
+            Objects of the network that the cached model may refer to.
+            Has to be passed to `.load` and `.save`.
+        """
+        from nengo.builder import Builder
+        from nengo.version import version
+
+        if network.seed is None:
+            return None, None
+
+        fingerprinter = _NetworkFingerprinter()
+        f = BytesIO()
+        pickler = pickle.Pickler(f, pickle.HIGHEST_PROTOCOL)
+        pickler.persistent_id = fingerprinter
+        try:
+            pickler.dump(network)
+        except Exception as e:
+            logger.debug("Failed to fingerprint network: %s", e)
+            return None, None
+
+        h = hashlib.sha1()
+        h.update(f.getvalue())
+        h.update(str((
+            float(dt),
+            bool(optimize),
+            version,
+            np.__version__,
+            tuple(sys.version_info),
+            [(section, sorted(rc.items(section, raw=True)))
+             for section in sorted(rc.sections())
+             if section not in self._ignored_rc_sections],
+            sorted((_qualname(cls), _qualname(fn))
+                   for cls, fn in iteritems(Builder.builders)),
+            [type(obj).__name__ for obj in fingerprinter.objects],
+        )).encode('utf-8'))
+        return h.hexdigest(), fingerprinter.objects
+
+    def load(self, key, objects, decoder_cache):
+        """Loads a model from the cache.
+
+        Parameters
+        ----------
+        key : str
+            Key returned by `.get_key`.
+        objects : list
+            Objects returned by `.get_key`.
+        decoder_cache : DecoderCache
+            Decoder cache of the loaded model.
+
+        Returns
+        -------
+        (Model, dict) or None
+            The model and its operator dependency graph, or None if the
+            model is not in the cache.
+        """
+        path = self._key2path(key)
+        if not os.path.exists(path):
+            logger.debug("Model cache miss [%s].", key)
+            return None
+
+        def persistent_load(pid):
+            return decoder_cache if pid == 'decoder_cache' else objects[pid]
+
+        try:
+            with open(path, 'rb') as f:
+                unpickler = pickle.Unpickler(f)
+                unpickler.persistent_load = persistent_load
+                model, dg = unpickler.load()
+        except Exception:
+            logger.exception("Corrupted model cache entry [%s].", key)
+            if not self.readonly:
+                safe_remove(path)
+            return None
+
+        if not self.readonly:
+            try:
+                os.utime(path, None)  # mark as recently used for `shrink`
+            except OSError:
+                pass
+        logger.debug("Model cache hit [%s]: Loaded stored model.", key)
+        return model, dg
+
+    def save(self, key, objects, model, dg):
+        """Stores a model in the cache.
+
+        Parameters
+        ----------
+        key : str
+            Key returned by `.get_key`.
+        objects : list
+            Objects returned by `.get_key`.
+        model : Model
+            The model to store.
+        dg : dict
+            The operator dependency graph of the model.
+        """
+        if self.readonly:
+            return
+
+        ids = {id(obj): i for i, obj in enumerate(objects)}
+
+        def persistent_id(obj):
+            if obj is model.decoder_cache:
+                return 'decoder_cache'
+            return ids.get(id(obj))
+
+        path = self._key2path(key)
+        tmp_path = "%s.%s.tmp" % (path, uuid1())
+        try:
+            with open(tmp_path, 'wb') as f:
+                pickler = pickle.Pickler(f, pickle.HIGHEST_PROTOCOL)
+                pickler.persistent_id = persistent_id
+                pickler.dump((model, dg))
+            replace(tmp_path, path)
+        except Exception as e:
+            logger.debug("Failed to store model [%s]: %s", key, e)
+            safe_remove(tmp_path)
+            return
+
+        self.shrink()
+
+    def _key2path(self, key):
+        return os.path.join(self.cache_dir, key + self._CACHE_EXT)
+
+
+def get_default_model_cache():
+    """Returns a `.ModelCache` set up from the Nengo RC settings.
+
+    Returns None if the ``enabled`` option in the ``model_cache`` section
+    is not set.
+    """
+    if not rc.getboolean('model_cache', 'enabled'):
+        return None
+    return ModelCache(rc.getboolean('model_cache', 'readonly'))
@@ -1,6 +1,9 @@
 from __future__ import division
 
+from collections import OrderedDict
+import hashlib
 import logging
+import threading
 import warnings
 
 import numpy as np
@@ -12,8 +15,15 @@ from nengo.utils.compat import range
 logger = logging.getLogger(__name__)
 
 
-def settled_firingrate(step_math, J, states,
-                       dt=0.001, settle_time=0.1, sim_time=1.0):
+# results of settled_firingrate, most recently used last
+_settled_cache = OrderedDict()
+_settled_cache_bytes = 2 ** 26
+_settled_cache_nbytes = 0  # total size of the cached rates
+_settled_lock = threading.Lock()
+
+
+def settled_firingrate(step_math, J, states, dt=0.001, settle_time=0.1,
+                       sim_time=1.0, chunk_size=2 ** 15):
     """Compute firing rates (in Hz) for given vector input, ``x``.
 
     Unlike the default naive implementation, this approach takes into
@@ -22,6 +32,12 @@ def settled_firingrate(step_math, J, states,
     initial transients settle. Then, we run the neurons for a second
     and find the average (which should approximate the firing rate).
 
+    Rows of ``J`` are simulated in chunks of about ``chunk_size`` elements,
+    which is faster for large inputs and bounds the memory used. The last
+    few results are cached, so computing the rates for the same currents
+    again (e.g., when solving for the decoders of several connections
+    from the same ensemble) does not simulate the neurons again.
+
     Parameters
     ---------
     step_math : function
@@ -30,7 +46,45 @@ def settled_firingrate(step_math, J, states,
         a vector of currents to generate firing rates from
     *states : list of ndarrays
         additional state needed by the step function
+    chunk_size : int, optional (Default: 2 ** 15)
+        the approximate number of currents to simulate at once
     """
+    global _settled_cache_nbytes
+
+    key = _settled_key(step_math, J, states, (dt, settle_time, sim_time))
+    if key is not None:
+        with _settled_lock:
+            rates = _settled_cache.pop(key, None)
+            if rates is not None:
+                _settled_cache[key] = rates
+                return rates.copy()
+
+    J = np.asarray(J)
+    rates = np.zeros_like(J)
+    if J.ndim == 0 or J.size == 0:
+        rates[...] = _settled_chunk(
+            step_math, J, states, dt, settle_time, sim_time)
+    else:
+        rows = max(chunk_size // max(J[0].size, 1), 1)
+        for i in range(0, len(J), rows):
+            rates[i:i + rows] = _settled_chunk(
+                step_math, J[i:i + rows], [s[i:i + rows] for s in states],
+                dt, settle_time, sim_time)
+
+    if key is not None and rates.nbytes <= _settled_cache_bytes:
+        with _settled_lock:
+            old = _settled_cache.pop(key, None)
+            if old is not None:
+                _settled_cache_nbytes -= old.nbytes
+            _settled_cache[key] = rates.copy()
+            _settled_cache_nbytes += rates.nbytes
+            while _settled_cache_nbytes > _settled_cache_bytes:
+                _settled_cache_nbytes -= _settled_cache.popitem(
+                    last=False)[1].nbytes
+    return rates
+
+
+def _settled_chunk(step_math, J, states, dt, settle_time, sim_time):
     out = np.zeros_like(J)
     total = np.zeros_like(J)
 
@@ -46,6 +100,26 @@ def settled_firingrate(step_math, J, states,
     return total / float(steps)
 
 
+def _settled_key(step_math, J, states, params):
+    """Returns a key for caching the results of `.settled_firingrate`.
+
+    Returns None if the step function cannot be hashed.
+    """
+    h = hashlib.sha1()
+    for x in [J] + list(states):
+        x = np.ascontiguousarray(x)
+        h.update(str((x.dtype, x.shape)).encode('utf-8'))
+        h.update(x.data)
+    key = (getattr(step_math, '__self__', None),
+           getattr(step_math, '__func__', step_math),
+           params, h.hexdigest())
+    try:
+        hash(key)
+    except TypeError:
+        return None
+    return key
+
+
 class NeuronType(FrozenObject):
     """Base class for Nengo neuron models.
 
@@ -713,6 +787,134 @@ class Izhikevich(NeuronType):
         recovery[spiked > 0] = recovery[spiked > 0] + self.reset_recovery
 
 
+class RateTable(object):
+    """Tabulated approximation of a neuron type's current-to-rate curve.
+
+    The exact rates are computed once at ``n_points`` evenly spaced input
+    currents, and the rates at other currents are interpolated from them.
+    This is much faster than `.NeuronType.rates` when rates are needed for
+    many more currents than ``n_points``, especially for neuron types whose
+    rates are found by simulation (e.g., `.Izhikevich`).
+
+    To estimate the interpolation error, the exact rates are also computed
+    at the midpoint of each interval between samples. Rates in intervals
+    where this error is greater than ``tolerance`` times the largest rate,
+    like the interval containing the firing threshold of `.LIF` neurons,
+    and rates for currents outside ``[J_min, J_max]`` are always
+    computed exactly. If these samples show that the rates are constant
+    at the low or high end of the range (e.g., zero below the firing
+    threshold), only the remaining range is tabulated.
+
+    The neuron type's rates must only depend on the input current.
+
+    Parameters
+    ----------
+    neuron_type : NeuronType
+        The neuron type whose rates are tabulated.
+    J_min, J_max : float
+        The range of input currents covered by the table.
+    n_points : int, optional (Default: 1024)
+        The number of tabulated currents.
+    interpolation : 'linear' or 'cubic', optional (Default: 'linear')
+        Linear interpolation, or cubic Hermite interpolation with slopes
+        estimated from neighbouring samples.
+    tolerance : float, optional (Default: 0.001)
+        Largest acceptable interpolation error, relative to the largest rate.
+
+    Attributes
+    ----------
+    J_min, J_max : float
+        The range of input currents covered by the table.
+    J : (n_points,) ndarray
+        The tabulated input currents, a subset of ``[J_min, J_max]``.
+    rates : (n_points,) ndarray
+        The exact rates at ``J``.
+    errors : (n_points - 1,) ndarray
+        Interpolation error at the midpoint of each interval.
+    exact : (n_points - 1,) ndarray
+        Whether rates are computed exactly in each interval.
+    """
+
+    def __init__(self, neuron_type, J_min, J_max, n_points=1024,
+                 interpolation='linear', tolerance=0.001):
+        if interpolation not in ('linear', 'cubic'):
+            raise ValidationError("Must be 'linear' or 'cubic'",
+                                  attr='interpolation', obj=self)
+        if n_points < 2:
+            raise ValidationError("Must be at least 2",
+                                  attr='n_points', obj=self)
+        if not J_min < J_max:
+            raise ValidationError("Must be greater than J_min (%s)" % J_min,
+                                  attr='J_max', obj=self)
+        self.neuron_type = neuron_type
+        self.interpolation = interpolation
+        self.tolerance = tolerance
+
+        self.J_min, self.J_max = J_min, J_max
+        J, rates = self._sample(J_min, J_max, n_points)
+
+        # only tabulate the range where the rates change (e.g., above the
+        # firing threshold), since rates are constant outside of it
+        varying = (rates[:-2:2] != rates[1::2]) | (rates[1::2] != rates[2::2])
+        if np.any(varying):
+            first = np.argmax(varying)
+            last = len(varying) - 1 - np.argmax(varying[::-1])
+            if first > 0 or last < len(varying) - 1:
+                J, rates = self._sample(J[2 * first], J[2 * last + 2],
+                                        n_points)
+
+        self.J = J[::2]
+        self.rates = rates[::2]
+        self._diffs = np.diff(self.rates)
+        self._slopes = np.gradient(self.rates, self.J[1] - self.J[0])
+
+        idx = np.arange(n_points - 1)
+        self.errors = np.abs(self._interpolate(idx, 0.5) - rates[1::2])
+        self.exact = self.errors > tolerance * np.max(np.abs(self.rates))
+
+    def __call__(self, J):
+        """Returns the rates for the input currents ``J``."""
+        J = np.array(J, dtype=float, copy=False)
+        t = J - self.J[0]
+        t /= self.J[1] - self.J[0]
+        idx = t.astype(np.intp)
+        np.clip(idx, 0, len(self.J) - 2, out=idx)
+        t -= idx
+        np.clip(t, 0, 1, out=t)  # rates are constant outside of self.J
+        rates = self._interpolate(idx, t)
+
+        exact = self.exact[idx] if np.any(self.exact) else None
+        if J.min() < self.J_min or J.max() > self.J_max:
+            outside = (J < self.J_min) | (J > self.J_max)
+            exact = outside if exact is None else exact | outside
+        if exact is not None:
+            rates[exact] = self._exact_rates(J[exact])
+        return rates
+
+    def _exact_rates(self, J):
+        return self.neuron_type.rates(J, 1., 0.)
+
+    def _sample(self, J_min, J_max, n_points):
+        # sample points and the midpoints between them
+        J = np.linspace(J_min, J_max, 2 * n_points - 1)
+        return J, self._exact_rates(J)
+
+    def _interpolate(self, idx, t):
+        if self.interpolation == 'linear':
+            rates = self.rates.take(idx)
+            rates += t * self._diffs.take(idx)
+            return rates
+
+        # cubic Hermite spline
+        r0, r1 = self.rates[idx], self.rates[idx + 1]
+        dJ = self.J[1] - self.J[0]
+        m0, m1 = dJ * self._slopes[idx], dJ * self._slopes[idx + 1]
+        t2 = t * t
+        t3 = t2 * t
+        return ((2 * t3 - 3 * t2 + 1) * r0 + (t3 - 2 * t2 + t) * m0
+                + (3 * t2 - 2 * t3) * r1 + (t3 - t2) * m1)
+
+
 class NeuronTypeParam(Parameter):
     def coerce(self, instance, neurons):
         self.check_type(instance, neurons, NeuronType)
@@ -543,6 +543,7 @@ class FrozenObject(object):
     def __getstate__(self):
         d = dict(self.__dict__)
         d.pop('_paramdict')  # do not pickle the param dict itself
+        d.pop('_FrozenObject__argreprs')  # nor the cached argument reprs
         for k in self._paramdict:
             d[k] = getattr(self, k)
 
@@ -73,8 +73,18 @@ RC_DEFAULTS = {
         'enabled': True,
         'readonly': False,
         'size': '512 MB',
+        'memory_size': '64 MB',
+        'mmap_size': '1 MB',
+        'eviction_policy': 'nengo.cache.SizeAwareLFUPolicy',
+        'shrink': 'foreground',
         'path': nengo.utils.paths.decoder_cache_dir,
     },
+    'model_cache': {
+        'enabled': False,
+        'readonly': False,
+        'size': '1 GB',
+        'path': nengo.utils.paths.model_cache_dir,
+    },
     'progress': {
         'updater': 'auto',  # Deprecated
         'progress_bar': 'auto',
@@ -82,6 +92,12 @@ RC_DEFAULTS = {
     'exceptions': {
         'simplified': True,
     },
+    'rate_table': {
+        'enabled': False,
+        'n_points': 1024,
+        'interpolation': 'linear',
+        'tolerance': 0.001,
+    },
 }
 
 # The RC files in the order in which they will be read.
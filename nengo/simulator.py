@@ -1,30 +1,332 @@
 """Reference simulator for nengo models."""
 
+from copy import deepcopy
 import logging
+import os
+import types
 import warnings
-from collections import Mapping
+from collections import deque, Mapping, OrderedDict
+from uuid import uuid1
 
 import numpy as np
 
 import nengo.utils.numpy as npext
 from nengo.builder import Model
+from nengo.builder.neurons import SimNeurons
+from nengo.builder.operator import DotInc, fuse_steps
 from nengo.builder.optimizer import optimize as opmerge_optimize
 from nengo.builder.signal import SignalDict
-from nengo.cache import get_default_decoder_cache
-from nengo.exceptions import ReadonlyError, SimulatorClosed, ValidationError
-from nengo.utils.compat import range, ResourceWarning
-from nengo.utils.graphs import toposort
+from nengo.builder.transforms import ConvInc
+from nengo.cache import get_default_decoder_cache, get_default_model_cache
+from nengo.exceptions import (
+    NotAddedToNetworkWarning, ReadonlyError, SimulationError, SimulatorClosed,
+    ValidationError)
+from nengo.network import Network
+from nengo.probe import Probe
+from nengo.utils import nco
+from nengo.utils.compat import is_string, pickle, range, ResourceWarning
+from nengo.utils.graphs import levels, toposort
 from nengo.utils.progress import Progress, ProgressTracker
-from nengo.utils.simulator import operator_dependency_graph
+from nengo.utils.simulator import group_incs, operator_dependency_graph
+
+try:
+    from concurrent.futures import ThreadPoolExecutor
+except ImportError:  # Python 2 without the ``futures`` backport
+    ThreadPoolExecutor = None
 
 logger = logging.getLogger(__name__)
 
 
+def parallel_cost(op):
+    """Estimate the cost of running an operator in a separate thread.
+
+    Only operators that spend most of their time in NumPy calls that release
+    the GIL (large matrix products, convolutions, and neuron updates)
+    benefit from running in a separate thread; all other operators have a
+    cost of 0.
+    """
+    if isinstance(op, ConvInc):
+        return op.W.size * op.Y.size // max(op.conv.n_filters, 1)
+    elif isinstance(op, DotInc):
+        return op.A.size
+    elif isinstance(op, SimNeurons):
+        # a neuron update takes a few tens of elementwise operations
+        return 20 * op.J.size
+    return 0
+
+
+def step_state(step, exclude=None):
+    """Find the objects holding the hidden state of a step function.
+
+    Step functions returned by ``make_step`` keep state that is not stored
+    in signals (e.g., filter histories and random number generators) in
+    mutable objects referenced by their closures or, for callable step
+    objects, by their attributes. This function collects these objects:
+    writable arrays, deques, and `numpy.random.RandomState` instances.
+    Functions and callable objects are searched recursively.
+
+    Parameters
+    ----------
+    step : callable
+        The step function.
+    exclude : ndarray, optional (Default: None)
+        Arrays sharing memory with this array (e.g., the signal arena)
+        are not included.
+
+    Returns
+    -------
+    A list of stateful objects, always in the same order for step functions
+    made in the same way.
+    """
+    found = []
+    _find_state(step, exclude, found, set())
+    return found
+
+
+def _find_state(obj, exclude, found, seen):
+    if id(obj) in seen:
+        return
+    seen.add(id(obj))
+
+    if isinstance(obj, np.ndarray):
+        if obj.flags.writeable and (
+                exclude is None or not np.may_share_memory(obj, exclude)):
+            found.append(obj)
+    elif isinstance(obj, (deque, np.random.RandomState)):
+        found.append(obj)
+    else:
+        for child in _referenced(obj):
+            _find_state(child, exclude, found, seen)
+
+
+def _referenced(obj):
+    """Objects referenced by ``obj`` that are searched for state."""
+    if isinstance(obj, (list, tuple)):
+        return obj
+    elif isinstance(obj, types.FunctionType):
+        return [cell.cell_contents for cell in obj.__closure__ or ()]
+    elif isinstance(obj, types.MethodType):
+        return [obj.__self__]
+    elif (not isinstance(obj, type) and callable(obj)
+          and hasattr(obj, '__dict__')):
+        return [obj.__dict__[key] for key in sorted(obj.__dict__)]
+    return []
+
+
+def _get_state(obj):
+    if isinstance(obj, np.ndarray):
+        return np.array(obj)
+    elif isinstance(obj, deque):
+        return [np.array(x) if isinstance(x, np.ndarray) else x for x in obj]
+    else:
+        return obj.get_state()
+
+
+def _set_state(obj, state):
+    if isinstance(obj, np.ndarray):
+        obj[...] = state
+    elif isinstance(obj, deque):
+        obj.clear()
+        obj.extend(np.array(x) if isinstance(x, np.ndarray) else x
+                   for x in state)
+    else:
+        obj.set_state(state)
+
+
+class ProbeBuffer(object):
+    """Preallocated storage for the data recorded by a probe.
+
+    Samples are stored in a contiguous ``(n_samples,) + shape`` array.
+    Storage for a known number of samples can be reserved up front with
+    `.ProbeBuffer.reserve`; otherwise, the buffer grows in chunks as
+    samples are appended.
+
+    Views returned by `.ProbeBuffer.data` remain valid when the buffer grows,
+    since growing copies the recorded samples into a new array and samples
+    that have been recorded are never overwritten.
+
+    Parameters
+    ----------
+    shape : tuple
+        Shape of a single sample.
+    dtype : dtype, optional (Default: ``np.float64``)
+        Data type of the recorded samples.
+    chunk_size : int, optional (Default: 1024)
+        Minimum number of samples to add when growing the buffer.
+    """
+
+    def __init__(self, shape, dtype=np.float64, chunk_size=1024):
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.chunk_size = int(chunk_size)
+        self._buffer = np.empty((0,) + self.shape, dtype=self.dtype)
+        self._n = 0
+
+    def __len__(self):
+        return self._n
+
+    @property
+    def capacity(self):
+        """(int) Number of samples that fit in the allocated storage."""
+        return self._buffer.shape[0]
+
+    @property
+    def data(self):
+        """(ndarray) Read-only view of the recorded samples."""
+        view = self._buffer[:self._n]
+        view.setflags(write=False)
+        return view
+
+    def _resize(self, capacity):
+        buffer = np.empty((capacity,) + self.shape, dtype=self.dtype)
+        buffer[:self._n] = self._buffer[:self._n]
+        self._buffer = buffer
+
+    def append(self, x):
+        """Copy one sample into the buffer, growing it if necessary."""
+        if self._n == self.capacity:
+            self._resize(self.capacity + max(self.capacity, self.chunk_size))
+        self._buffer[self._n] = x
+        self._n += 1
+
+    def allocate(self, n_samples):
+        """Return writable storage for the next ``n_samples`` samples.
+
+        Samples written into the returned array are only considered
+        recorded once they are passed to `.ProbeBuffer.commit`.
+        """
+        self.reserve(n_samples)
+        return self._buffer[self._n:self._n + n_samples]
+
+    def commit(self, n_samples):
+        """Record ``n_samples`` samples written into allocated storage."""
+        assert self._n + n_samples <= self.capacity
+        self._n += int(n_samples)
+
+    def reserve(self, n_samples):
+        """Ensure that ``n_samples`` more samples fit without growing."""
+        if self._n + n_samples > self.capacity:
+            self._resize(self._n + n_samples)
+
+
+class DiskProbeBuffer(ProbeBuffer):
+    """Probe storage that streams samples to a file on disk.
+
+    Samples are written into a memory map of a Nengo cache object (NCO) file,
+    so the operating system writes them to disk in chunks while the
+    simulation is running and the recorded data does not need to fit in
+    memory. `.DiskProbeBuffer.data` returns a lazy, read-only
+    `numpy.memmap` view of the file.
+
+    The file is a valid NCO file whenever `.DiskProbeBuffer.flush` has been
+    called, and can be read later with `nengo.utils.nco.read`.
+
+    Parameters
+    ----------
+    shape : tuple
+        Shape of a single sample.
+    path : str
+        Path of the file to write. Existing files will be overwritten.
+    dtype : dtype, optional (Default: ``np.float64``)
+        Data type of the recorded samples.
+    chunk_size : int, optional (Default: 1024)
+        Minimum number of samples to add when growing the file.
+    metadata : object, optional (Default: None)
+        Picklable object stored along with the samples.
+    """
+
+    def __init__(self, shape, path, dtype=np.float64, chunk_size=1024,
+                 metadata=None):
+        super(DiskProbeBuffer, self).__init__(
+            shape, dtype=dtype, chunk_size=chunk_size)
+        self.path = path
+        self._file = open(path, 'w+b')
+        self._stream = nco.ArrayStream(
+            self._file, metadata, self.dtype, self.shape)
+
+    @property
+    def closed(self):
+        """(bool) Whether the file has been closed."""
+        return self._file.closed
+
+    @property
+    def data(self):
+        if not self.closed:
+            self.flush()
+        return super(DiskProbeBuffer, self).data
+
+    def _resize(self, capacity):
+        if self.closed:
+            raise SimulatorClosed("Cannot record into a closed probe file.")
+        if self._stream.row_bytes > 0:
+            # growing the file keeps the samples recorded so far in place
+            self._buffer = np.memmap(
+                self._file, dtype=self.dtype, mode='r+',
+                offset=self._stream.data_start, shape=(capacity,) + self.shape)
+        else:
+            self._buffer = np.empty((capacity,) + self.shape, self.dtype)
+
+    def flush(self):
+        """Update the file headers to include all recorded samples."""
+        self._stream.update(self._n)
+
+    def close(self):
+        """Flush all samples to disk and close the file.
+
+        Data that has already been recorded remains accessible.
+        """
+        if self.closed:
+            return
+        self.flush()
+        if isinstance(self._buffer, np.memmap):
+            self._buffer.flush()
+        self._file.truncate(self._stream.data_end(self._n))
+        self._file.close()
+
+    def remove(self):
+        """Close the file and delete it from disk.
+
+        On systems that allow deleting files that are memory-mapped, views of
+        the data returned before remain valid until they are deleted.
+        """
+        self.close()
+        try:
+            os.remove(self.path)
+        except OSError as err:
+            logger.warning("Could not remove probe file %r: %s",
+                           self.path, err)
+
+
+def _read_probe_data(fileobj, buf, chunk_bytes=2 ** 20):
+    """Read NPY data from ``fileobj`` into ``buf`` in chunks of rows."""
+    version = np.lib.format.read_magic(fileobj)
+    if version == (1, 0):
+        shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(
+            fileobj)
+    else:
+        shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(
+            fileobj)
+    assert not fortran_order and tuple(shape[1:]) == buf.shape
+
+    n_rows = shape[0]
+    rows = buf.allocate(n_rows)
+    row_bytes = dtype.itemsize * int(np.prod(shape[1:]))
+    if row_bytes > 0:
+        chunk = max(chunk_bytes // row_bytes, 1)
+        for start in range(0, n_rows, chunk):
+            stop = min(start + chunk, n_rows)
+            data = fileobj.read((stop - start) * row_bytes)
+            rows[start:stop] = np.frombuffer(data, dtype=dtype).reshape(
+                rows[start:stop].shape)
+    buf.commit(n_rows)
+
+
 class ProbeDict(Mapping):
     """Map from Probe -> ndarray
 
     This is more like a view on the dict that the simulator manipulates.
-    However, for speed reasons, the simulator uses Python lists,
+    However, for speed reasons, the simulator records into `.ProbeBuffer`
+    instances (or Python lists, for other backends),
     and we want to return NumPy arrays. Additionally, this mapping
     is readonly, which is more appropriate for its purpose.
     """
@@ -38,7 +340,9 @@ class ProbeDict(Mapping):
         if (key not in self._cache
                 or len(self._cache[key]) != len(self.raw[key])):
             rval = self.raw[key]
-            if isinstance(rval, list):
+            if isinstance(rval, ProbeBuffer):
+                rval = rval.data
+            elif isinstance(rval, list):
                 rval = np.asarray(rval)
                 rval.setflags(write=False)
             self._cache[key] = rval
@@ -60,6 +364,40 @@ class ProbeDict(Mapping):
         self._cache.clear()
 
 
+class BatchProbeDict(ProbeDict):
+    """Map from Probe -> ndarray, stacking the data of all trials.
+
+    Probes in the original network map to arrays with a leading trial axis.
+    The probes in the copies of the network for each trial can also be
+    accessed directly.
+
+    Parameters
+    ----------
+    raw : dict
+        The dictionary that the simulator records probe data into.
+    copies : dict
+        Mapping from objects in the original network to the list of their
+        copies, one for each trial.
+    """
+
+    def __init__(self, raw, copies):
+        super(BatchProbeDict, self).__init__(raw)
+        self.copies = copies
+
+    def __getitem__(self, key):
+        if not isinstance(key, Probe) or key not in self.copies:
+            return super(BatchProbeDict, self).__getitem__(key)
+
+        copies = self.copies[key]
+        if (key not in self._cache
+                or self._cache[key].shape[1] != len(self.raw[copies[0]])):
+            rval = np.stack([super(BatchProbeDict, self).__getitem__(c)
+                             for c in copies])
+            rval.setflags(write=False)
+            self._cache[key] = rval
+        return self._cache[key]
+
+
 class Simulator(object):
     """Reference simulator for Nengo models.
 
@@ -95,7 +433,9 @@ class Simulator(object):
         Usually the simulator will build this model for you; however, if you
         want to build the network manually, or you want to inject build
         artifacts in the model before building the network, then you can
-        pass in a `.Model` instance.
+        pass in a `.Model` instance. If None and the model cache is enabled
+        in the Nengo RC settings, a model built before from an identical
+        network is loaded from the `.ModelCache` instead of being built.
     progress_bar : bool or ProgressBar, optional \
                    (Default: True)
         Progress bar for displaying build and simulation progress.
@@ -109,6 +449,31 @@ class Simulator(object):
         that can speed up simulations significantly at the cost of slower
         builds. If running models for very small amounts of time,
         pass ``False`` to disable the optimizer.
+    fuse_steps : bool, optional (Default: False)
+        If ``True``, the step functions of all operators will be combined
+        into a single generated function, with the bodies of simple
+        operators inlined. This speeds up simulations of models with many
+        small operators at the cost of slightly slower resets.
+    n_threads : int, optional (Default: 1)
+        Number of threads used to run the simulation. If greater than 1,
+        large independent operators (e.g., matrix products and neuron
+        updates) will run concurrently in a thread pool. NumPy releases the
+        GIL during these computations, so they can make use of multiple
+        cores. Decoders are also solved for in parallel while building.
+        On Python 2, this requires the ``futures`` package.
+    probe_dir : str, optional (Default: None)
+        If not None, probe data will be streamed to files in this directory
+        while the simulation is running, instead of being kept in memory.
+        Each probe is written to a Nengo cache object (``.nco``) file and
+        ``data`` will provide memory-mapped views of these files.
+        This is useful when probed data does not fit in memory.
+    dtype : dtype, optional (Default: None)
+        Data type used to simulate all floating point signals (e.g.,
+        ``np.float32``). Single precision halves the memory used by the
+        simulation and the memory bandwidth needed to run it, at the cost
+        of accuracy. The model is always built in double precision.
+        If None, signals are simulated with the data type they were built
+        with (usually ``np.float64``).
 
     Attributes
     ----------
@@ -122,9 +487,20 @@ class Simulator(object):
     dg : dict
         A dependency graph mapping from each `.Operator` to the operators
         that depend on that operator.
+    dtype : numpy.dtype or None
+        Data type used to simulate floating point signals, or None if
+        signals are simulated with the data type they were built with.
+    fuse_steps : bool
+        Whether the step functions of all operators are combined into
+        a single generated function.
     model : Model
         The `.Model` containing the signals and operators necessary to
         simulate the network.
+    n_threads : int
+        Number of threads used to run the simulation.
+    probe_dir : str or None
+        Directory to which probe data is streamed, or None if probe data
+        is kept in memory.
     signals : SignalDict
         The `.SignalDict` mapping from `.Signal` instances to NumPy arrays.
 
@@ -139,41 +515,52 @@ class Simulator(object):
     # would skip all test whose names start with 'test_pes'.
     unsupported = []
 
+    # Number of steps that `.Simulator.run_steps` runs between progress
+    # updates, without any per-step bookkeeping
+    _block_steps = 100
+
+    # Minimum `.parallel_cost` of an operator to run it in a separate thread
+    # when ``n_threads > 1``
+    _parallel_min_cost = 50000
+
     def __init__(
             self, network,
-            dt=0.001, seed=None, model=None, progress_bar=True, optimize=True):
+            dt=0.001, seed=None, model=None, progress_bar=True, optimize=True,
+            fuse_steps=False, n_threads=1, probe_dir=None, dtype=None):
         self.closed = True  # Start closed in case constructor raises exception
         self.progress_bar = progress_bar
+        self.fuse_steps = fuse_steps
+        self.n_threads = n_threads
+        self.probe_dir = probe_dir
+        self.dtype = None if dtype is None else np.dtype(dtype)
+
+        self._executor = None
+        if n_threads > 1:
+            if ThreadPoolExecutor is None:
+                raise ValidationError(
+                    "Running in multiple threads requires the 'futures' "
+                    "package on Python 2", attr='n_threads', obj=self)
+            self._executor = ThreadPoolExecutor(max_workers=n_threads - 1)
 
         if model is None:
             self.model = Model(dt=float(dt),
                                label="%s, dt=%f" % (network, dt),
                                decoder_cache=get_default_decoder_cache())
+            model_cache = (None if network is None
+                           else get_default_model_cache())
         else:
             self.model = model
-
-        pt = ProgressTracker(progress_bar, Progress("Building", "Build"))
-        with pt:
-            if network is not None:
-                # Build the network into the model
-                self.model.build(network,
-                                 progress=pt.next_stage("Building", "Build"))
-
-            # Order the steps (they are made in `Simulator.reset`)
-            self.dg = operator_dependency_graph(self.model.operators)
-
-            if optimize:
-                with pt.next_stage(
-                        'Building (running optimizer)', 'Optimization'):
-                    opmerge_optimize(self.model, self.dg)
-
-        self._step_order = [op for op in toposort(self.dg)
+            model_cache = None
+        self._build(network, dt, optimize, model_cache)
+
+        # Steps are ordered by the position of their operators in the model
+        # when they do not depend on each other, so that a model loaded from
+        # the model cache runs its steps in the same order as when it was
+        # built (and gives bit-identical results)
+        index = {op: i for i, op in enumerate(self.model.operators)}
+        self._step_order = [op for op in toposort(self.dg, key=index.get)
                             if hasattr(op, 'make_step')]
-
-        # -- map from Signal.base -> ndarray
-        self.signals = SignalDict()
-        for op in self.model.operators:
-            op.init_signals(self.signals)
+        self._init_signals()
 
         # Add built states to the probe dictionary
         self._probe_outputs = self.model.params
@@ -190,6 +577,70 @@ class Simulator(object):
         self.closed = False
         self.reset(seed=seed)
 
+    def _build(self, network, dt, optimize, model_cache):
+        """Build ``network`` into the model, or load it from ``model_cache``.
+
+        Sets ``model`` and ``dg``. Newly built models are stored in
+        ``model_cache``, if it is not None.
+        """
+        cached = cache_key = None
+        if model_cache is not None:
+            cache_key, cache_objects = model_cache.get_key(
+                network, dt, optimize)
+            if cache_key is not None:
+                cached = model_cache.load(
+                    cache_key, cache_objects, self.model.decoder_cache)
+
+        if cached is not None:
+            # The model was built and optimized before; use the cached one
+            label = self.model.label
+            self.model, self.dg = cached
+            self.model.label = label
+            return
+
+        pt = ProgressTracker(self.progress_bar, Progress("Building", "Build"))
+        with pt:
+            if network is not None:
+                # Build the network into the model, solving for decoders
+                # in our threads
+                executor = self.model.executor
+                if executor is None:
+                    self.model.executor = self._executor
+                try:
+                    self.model.build(network, progress=pt.next_stage(
+                        "Building", "Build"))
+                finally:
+                    self.model.executor = executor
+
+            # Order the steps (they are made in `Simulator.reset`)
+            self.dg = operator_dependency_graph(self.model.operators)
+
+            if optimize:
+                with pt.next_stage(
+                        'Building (running optimizer)', 'Optimization'):
+                    opmerge_optimize(self.model, self.dg)
+
+        if cache_key is not None:
+            model_cache.save(cache_key, cache_objects, self.model, self.dg)
+
+    def _init_signals(self):
+        """Allocate the signals used by the operators."""
+        # -- map from Signal.base -> ndarray
+        # Base signals are laid out in one arena in the order in which
+        # the operators use them, so that consecutive steps touch nearby
+        # memory and a reset is a single copy
+        # (time stays in double precision so that it can be compared
+        # exactly with times given to processes and nodes)
+        self.signals = SignalDict(
+            dtype=self.dtype, keep_dtype=[self.model.time])
+        bases = OrderedDict()
+        for op in self._step_order + self.model.operators:
+            for sig in op.all_signals:
+                bases.setdefault(sig.base, None)
+        self.signals.init_arena(bases)
+        for op in self.model.operators:
+            op.init_signals(self.signals)
+
     def __del__(self):
         """Raise a ResourceWarning if we are deallocated while open."""
         if not self.closed:
@@ -232,6 +683,32 @@ class Simulator(object):
         """
         self.closed = True
         self.signals = None  # signals may no longer exist on some backends
+        self._close_probe_buffers()
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def _close_probe_buffers(self, remove=False):
+        for probe in self.model.probes:
+            buf = self._probe_outputs.get(probe, None)
+            if isinstance(buf, DiskProbeBuffer):
+                if remove:
+                    buf.remove()
+                else:
+                    buf.close()
+
+    def _make_probe_buffer(self, probe):
+        sig = self.model.sig[probe]['in']
+        dtype = self.signals.signal_dtype(sig)
+        if self.probe_dir is None:
+            return ProbeBuffer(sig.shape, dtype)
+
+        path = os.path.join(self.probe_dir, "probe%d_%s.nco" % (
+            self.model.probes.index(probe), uuid1()))
+        metadata = {'probe': str(probe), 'dt': self.dt,
+                    'sample_every': probe.sample_every}
+        return DiskProbeBuffer(
+            sig.shape, path, dtype=dtype, metadata=metadata)
 
     def _probe(self):
         """Copy all probed signals to buffers."""
@@ -241,8 +718,8 @@ class Simulator(object):
             period = (1 if probe.sample_every is None else
                       probe.sample_every / self.dt)
             if self.n_steps % period < 1:
-                tmp = self.signals[self.model.sig[probe]['in']].copy()
-                self._probe_outputs[probe].append(tmp)
+                self._probe_outputs[probe].append(
+                    self.signals[self.model.sig[probe]['in']])
 
     def _probe_step_time(self):
         self._n_steps = self.signals[self.model.step].item()
@@ -266,21 +743,181 @@ class Simulator(object):
             self.seed = seed
 
         # reset signals
-        for key in self.signals:
-            self.signals.reset(key)
+        self.signals.reset_all()
 
         # rebuild steps (resets ops with their own state, like Processes)
         self.rng = np.random.RandomState(self.seed)
-        self._steps = [op.make_step(self.signals, self.dt, self.rng)
-                       for op in self._step_order]
+        self._op_steps = [op.make_step(self.signals, self.dt, self.rng)
+                          for op in self._step_order]
+        self._steps = self._op_steps
+        if self._executor is not None:
+            self._steps = self._make_parallel_steps(self._steps)
+        elif self.fuse_steps:
+            self._steps = [fuse_steps(
+                self._step_order, self._steps, self.signals, self.dt)]
 
         # clear probe data
+        self._close_probe_buffers(remove=True)
+        for probe in self.model.probes:
+            self._probe_outputs[probe] = self._make_probe_buffer(probe)
+        self.data.reset()
+
+        self._probe_step_time()
+
+    def save_state(self, path):
+        """Save the current state of the simulator to a file.
+
+        The state includes the values of all signals (including the
+        current step and time), the probed data, and the hidden state of
+        all step functions (see `.step_state`). Node functions are searched
+        for hidden state in the same way, so state that they keep elsewhere
+        (e.g., in global variables) is not saved.
+
+        A saved state can be loaded into the simulator that saved it with
+        `.Simulator.load_state`, for example to run several experiments
+        starting from the end of one long warm-up simulation.
+
+        Probe data is written after the other state in NPY format, directly
+        from the probe buffers, so probe data streamed to disk (see
+        ``probe_dir``) is not read into memory at once.
+
+        Parameters
+        ----------
+        path : str or file
+            Path or binary file object to write to.
+        """
+        if self.closed:
+            raise SimulatorClosed("Cannot save state of closed Simulator.")
+
+        if is_string(path):
+            with open(path, 'wb') as f:
+                return self.save_state(f)
+
+        step_states = [[_get_state(obj) for obj in
+                        step_state(step, exclude=self.signals.arena)]
+                       for step in self._op_steps]
+        state = {
+            'structure': self._state_structure(),
+            'seed': self.seed,
+            'arena': np.array(self.signals.arena),
+            'steps': step_states,
+        }
+        pickle.dump(state, path, pickle.HIGHEST_PROTOCOL)
+        for probe in self.model.probes:
+            np.lib.format.write_array(
+                path, self._probe_outputs[probe].data, allow_pickle=False)
+
+    def load_state(self, path):
+        """Load a state saved with `.Simulator.save_state`.
+
+        The state must have been saved by this simulator. Loading it
+        restores the simulator to the point at which the state was saved,
+        so a simulation can be continued from that point several times.
+
+        Parameters
+        ----------
+        path : str or file
+            Path or binary file object to read from.
+        """
+        if self.closed:
+            raise SimulatorClosed("Cannot load state into closed Simulator.")
+
+        if is_string(path):
+            with open(path, 'rb') as f:
+                return self.load_state(f)
+
+        state = pickle.load(path)
+
+        objs = [step_state(step, exclude=self.signals.arena)
+                for step in self._op_steps]
+        if (state['structure'] != self._state_structure()
+                or [len(o) for o in objs] != [len(s) for s in state['steps']]):
+            raise SimulationError(
+                "Saved state does not match the model of this simulator")
+
+        self.seed = state['seed']
+        self.signals.arena[...] = state['arena']
+        for step_objs, step_states in zip(objs, state['steps']):
+            for obj, obj_state in zip(step_objs, step_states):
+                _set_state(obj, obj_state)
+
+        self._close_probe_buffers(remove=True)
         for probe in self.model.probes:
-            self._probe_outputs[probe] = []
+            buf = self._make_probe_buffer(probe)
+            _read_probe_data(path, buf)
+            self._probe_outputs[probe] = buf
         self.data.reset()
 
         self._probe_step_time()
 
+    def _state_structure(self):
+        return {
+            'dt': self.dt,
+            'operators': [type(op).__name__ for op in self._step_order],
+            'arena_bytes': self.signals.arena.nbytes,
+            'probes': [self.model.sig[probe]['in'].shape
+                       for probe in self.model.probes],
+        }
+
+    def _make_parallel_steps(self, step_fns):
+        """Combine step functions so that independent operators run
+        concurrently.
+
+        Operators are grouped into levels of the dependency graph.
+        In each level with at least two groups of expensive operators
+        (see `.parallel_cost`), all but one of these groups run in the thread
+        pool while the remaining operators run in the calling thread.
+        Other levels run serially (and are fused if ``fuse_steps`` is set).
+        """
+        fns = dict(zip(self._step_order, step_fns))
+
+        def serial_steps(ops):
+            if self.fuse_steps and len(ops) > 1:
+                return [fuse_steps(
+                    ops, [fns[op] for op in ops], self.signals, self.dt)]
+            return [fns[op] for op in ops]
+
+        steps = []
+        serial = []
+        for level in levels(self.dg, self._step_order):
+            heavy, light = [], []
+            for group in group_incs(level):
+                cost = max(parallel_cost(op) for op in group)
+                if cost >= self._parallel_min_cost:
+                    heavy.append([fns[op] for op in group])
+                else:
+                    light.extend(group)
+
+            if len(heavy) < 2:
+                serial.extend(level)
+            else:
+                steps.extend(serial_steps(serial))
+                serial = []
+                steps.append(self._make_level_step(
+                    heavy[1:], heavy[0] + serial_steps(light)))
+        steps.extend(serial_steps(serial))
+        return steps
+
+    def _make_level_step(self, thread_groups, local_fns):
+        submit = self._executor.submit
+
+        def run_group(fns):
+            # NumPy error handling is thread-local
+            with np.errstate(invalid='raise', divide='ignore'):
+                for fn in fns:
+                    fn()
+
+        def step_parallel():
+            futures = [submit(run_group, fns) for fns in thread_groups]
+            try:
+                for fn in local_fns:
+                    fn()
+            finally:
+                for future in futures:
+                    future.result()
+
+        return step_parallel
+
     def run(self, time_in_seconds, progress_bar=None):
         """Simulate for the given length of time.
 
@@ -334,14 +971,96 @@ class Simulator(object):
             For more control over the progress bar, pass in a ``ProgressBar``
             instance.
         """
+        if self.closed:
+            raise SimulatorClosed("Simulator cannot run because it is closed.")
+
         if progress_bar is None:
             progress_bar = self.progress_bar
 
+        # preallocate probe storage for all samples taken during this run
+        for probe in self.model.probes:
+            period = (1 if probe.sample_every is None else
+                      probe.sample_every / self.dt)
+            self._probe_outputs[probe].reserve(int(steps // period) + 1)
+
         with ProgressTracker(progress_bar, Progress(
                 "Simulating", "Simulation", steps)) as pt:
-            for i in range(steps):
-                self.step()
-                pt.total_progress.step()
+            old_err = np.seterr(invalid='raise', divide='ignore')
+            try:
+                for start in range(0, steps, self._block_steps):
+                    n_steps = min(self._block_steps, steps - start)
+                    self._run_block(n_steps)
+                    pt.total_progress.step(n_steps)
+            finally:
+                np.seterr(**old_err)
+
+    def _run_block(self, n_steps):
+        """Run ``n_steps`` steps, recording probe data after each step.
+
+        Unlike `.Simulator.step`, this does not check whether the simulator
+        is closed or set the NumPy error handling; ``run_steps`` does this
+        once for all blocks. Probe sampling is scheduled before running
+        the block, so only the operator step functions and copying of the
+        probed signals remain in the inner loop.
+        """
+        every_step, sparse, schedule = self._schedule_probes(n_steps)
+
+        step_fns = self._steps
+        n_done = 0
+        try:
+            for i in range(n_steps):
+                for step_fn in step_fns:
+                    step_fn()
+                for rows, sig in every_step:
+                    rows[i] = sig
+                for rows, j, sig in sparse[i]:
+                    rows[j] = sig
+                n_done += 1
+        finally:
+            for buf, idxs in schedule:
+                buf.commit(np.searchsorted(idxs, n_done))
+            self._probe_step_time()
+
+    def _schedule_probes(self, n_steps):
+        """Allocate probe storage for the next ``n_steps`` steps.
+
+        Returns
+        -------
+        every_step : list
+            ``(rows, sig)`` pairs for probes that sample on every step, which
+            copy ``sig`` to ``rows[i]`` after the ``i``-th step.
+        sparse : list
+            For each step, the ``(rows, j, sig)`` tuples of the other probes
+            sampling after that step, which copy ``sig`` to ``rows[j]``.
+        schedule : list
+            ``(buf, idxs)`` pairs with the buffer of each sampling probe and
+            the steps on which it samples.
+        """
+        steps = np.arange(self._n_steps + 1, self._n_steps + n_steps + 1)
+
+        every_step = []
+        sparse = [[] for _ in range(n_steps)]
+        schedule = []
+        sample_idxs = {}
+        for probe in self.model.probes:
+            period = (1 if probe.sample_every is None else
+                      probe.sample_every / self.dt)
+            if period not in sample_idxs:
+                sample_idxs[period] = np.flatnonzero(steps % period < 1)
+            idxs = sample_idxs[period]
+            if len(idxs) == 0:
+                continue
+
+            buf = self._probe_outputs[probe]
+            rows = buf.allocate(len(idxs))
+            sig = self.signals[self.model.sig[probe]['in']]
+            schedule.append((buf, idxs))
+            if len(idxs) == n_steps:
+                every_step.append((rows, sig))
+            else:
+                for j, i in enumerate(idxs):
+                    sparse[i].append((rows, j, sig))
+        return every_step, sparse, schedule
 
     def step(self):
         """Advance the simulator by 1 step (``dt`` seconds)."""
@@ -379,3 +1098,71 @@ class Simulator(object):
         period = 1 if sample_every is None else sample_every / self.dt
         steps = np.arange(1, self.n_steps + 1)
         return self.dt * steps[steps % period < 1]
+
+
+class BatchSimulator(Simulator):
+    """Simulates several independent trials of a network at once.
+
+    The network is copied once for each trial and all copies are built into
+    a single model. The optimizer merges equivalent operators of all trials,
+    so each simulation step makes a few wide NumPy calls instead of
+    repeating the same small calls for each trial, which is much faster than
+    running separate simulators for each trial.
+
+    Batching relies on the optimizer, so ``optimize`` must not be False;
+    without it, the trials run one after another in each step, which is no
+    faster than running them in separate simulators.
+
+    Processes without a seed (e.g., noise) draw from separate random number
+    streams in each trial. If the network has a seed, the built objects
+    (e.g., encoders and decoders) are the same in all trials; otherwise,
+    each trial is built with different seeds.
+
+    Parameters
+    ----------
+    network : Network
+        The network to simulate.
+    n_trials : int
+        Number of independent trials to simulate.
+    **kwargs
+        Additional arguments are passed to `.Simulator`.
+
+    Attributes
+    ----------
+    data : BatchProbeDict
+        Maps each `.Probe` in ``network`` to an array of shape
+        ``(n_trials, n_samples) + probe_shape``.
+    n_trials : int
+        Number of simulated trials.
+    trials : list of Network
+        The copy of ``network`` used for each trial.
+    """
+
+    def __init__(self, network, n_trials, **kwargs):
+        if n_trials < 1:
+            raise ValidationError("Must be at least 1 (got %d)" % n_trials,
+                                  attr='n_trials', obj=self)
+        self.n_trials = n_trials
+        if not kwargs.get('optimize', True):
+            warnings.warn("BatchSimulator only vectorizes the trials when "
+                          "the optimizer is enabled (optimize=True).")
+
+        batch = Network(label="%s x %d" % (network, n_trials),
+                        seed=network.seed, add_to_container=False)
+        self.trials = []
+        copies = {obj: [] for obj in network.all_objects}
+        for _ in range(n_trials):
+            memo = {}
+            with warnings.catch_warnings():
+                # copies are added to the batch network below
+                warnings.simplefilter(
+                    'ignore', category=NotAddedToNetworkWarning)
+                trial = deepcopy(network, memo)
+            batch.networks.append(trial)
+            self.trials.append(trial)
+            for obj in copies:
+                copies[obj].append(memo[id(obj)])
+        self.copies = copies
+
+        super(BatchSimulator, self).__init__(batch, **kwargs)
+        self.data = BatchProbeDict(self._probe_outputs, copies)
@@ -8,7 +8,7 @@ from nengo.exceptions import ValidationError
 from nengo.params import (BoolParam, NdarrayParam, NumberParam, Parameter,
                           Unconfigurable)
 from nengo.utils.compat import is_number
-from nengo.utils.filter_design import cont2discrete
+from nengo.utils.filter_design import cont2discrete, lfilter, tf2ss
 from nengo.utils.numpy import as_shape
 
 
@@ -222,6 +222,68 @@ class LinearFilter(Synapse):
         y = np.polyval(self.num, w) / np.polyval(self.den, w)
         return y
 
+    def apply(self, x, d=None, dt=None, rng=np.random, copy=True, **kwargs):
+        """Run the filter on a given input.
+
+        Same as `.Process.apply`, but filters the whole input at once
+        (see `.LinearFilter.filt`).
+        """
+        shape_in = as_shape(np.asarray(x[0]).shape, min_dim=1)
+        shape_out = as_shape(self.default_size_out if d is None else d)
+        if shape_in == shape_out:
+            dt = self.default_dt if dt is None else dt
+            output = x
+            if copy:
+                output = np.zeros((len(x),) + shape_out)
+                output[...] = np.reshape(x, output.shape)
+            if self._lfilter(output, dt, y0=0, **kwargs):
+                return output
+        return super(LinearFilter, self).apply(
+            x, d=d, dt=dt, rng=rng, copy=copy, **kwargs)
+
+    def filt(self, x, dt=None, axis=0, y0=None, copy=True, filtfilt=False):
+        """Filter ``x`` with this synapse model.
+
+        Same as `.Synapse.filt`, but the whole signal is filtered at once
+        with `.lfilter` instead of one sample at a time, which is much
+        faster for long signals.
+        """
+        dt = self.default_dt if dt is None else dt
+        filtered = np.array(x, copy=copy)
+        filt_view = np.rollaxis(filtered, axis=axis)
+        if y0 is None:
+            y0 = filt_view[0]
+
+        if self._lfilter(filt_view, dt, y0, filtfilt=filtfilt):
+            return filtered
+        return super(LinearFilter, self).filt(
+            filtered, dt=dt, axis=axis, y0=y0, copy=False, filtfilt=filtfilt)
+
+    def _lfilter(self, x, dt, y0, filtfilt=False, **kwargs):
+        """Filter ``x`` in place along the first axis with `.lfilter`.
+
+        Returns False without changing ``x`` if that is not possible.
+        """
+        if not isinstance(x, np.ndarray) or x.dtype.kind != 'f':
+            return False
+        shape = as_shape(x.shape[1:], min_dim=1)
+        step = self.make_step(shape, shape, dt, None, dtype=x.dtype, **kwargs)
+        if not isinstance(step, LinearFilter.Step):
+            return False
+
+        b, a = _padded_tf(step.num, step.den)
+        # state after inputs and outputs have been y0 for all time
+        coefs = np.cumsum((b - a)[:0:-1])[::-1]
+        zi = coefs.reshape((-1,) + (1,) * (x.ndim - 1)) * (
+            np.asarray(y0) * np.ones(x.shape[1:]))
+
+        y, zf = lfilter(b, a, x, zi, axis=0)
+        x[...] = y
+        if filtfilt:
+            x = x[::-1]
+            x[...], _ = lfilter(b, a, x, zf, axis=0)
+        return True
+
     def make_step(self, shape_in, shape_out, dt, rng, y0=None,
                   dtype=np.float64, method='zoh'):
         """Returns a `.Step` instance that implements the linear filter."""
@@ -310,35 +372,63 @@ class LinearFilter(Synapse):
     class General(Step):
         """An LTI step function for any given transfer function.
 
-        Implements a discrete-time LTI system using the difference equation
-        [1]_ for the given transfer function (num, den).
+        Implements a discrete-time LTI system in state-space form.
+        The system is realized in observable canonical form (the transpose
+        of the controllable canonical form given by `.tf2ss`), in which the
+        state is a combination of past inputs and outputs [1]_. The state
+        and the current input are stored together in a preallocated array,
+        so that each step is a single matrix multiply with no allocations.
 
         References
         ----------
-        .. [1] https://en.wikipedia.org/wiki/Digital_filter#Difference_equation
+        .. [1] https://en.wikipedia.org/wiki/Digital_filter#Direct_form_II
         """
         def __init__(self, num, den, output, y0=None):
             super(LinearFilter.General, self).__init__(num, den, output)
-            self.x = collections.deque(maxlen=len(num))
-            self.y = collections.deque(maxlen=len(den))
+            b, a = _padded_tf(num, den)
+            order = len(a) - 1
+
+            # [state, input] -> [next state, output]
+            A, B, C, D = tf2ss(b, a)
+            self.M = np.zeros((order + 1, order + 1), dtype=output.dtype)
+            self.M[:order, :order] = A.T
+            self.M[:order, order] = C.ravel()
+            self.M[order, :order] = B.ravel()
+            self.M[order, order] = D[0]
+
+            self.xu = np.zeros((order + 1,) + output.shape, dtype=output.dtype)
+            self.yx = np.zeros_like(self.xu)
             if y0 is not None:
                 self.output[...] = y0
-                for _ in num:
-                    self.x.appendleft(np.array(self.output))
-                for _ in den:
-                    self.y.appendleft(np.array(self.output))
+                # state after inputs and outputs have been y0 for all time
+                coefs = np.cumsum((b - a)[:0:-1])[::-1]
+                for k, coef in enumerate(coefs):
+                    self.xu[k] = coef * self.output
 
         def __call__(self, t, signal):
-            self.output[...] = 0
+            n = len(self.M)
+            self.xu[-1] = signal
+            np.dot(self.M, self.xu.reshape(n, -1),
+                   out=self.yx.reshape(n, -1))
+            self.output[...] = self.yx[-1]
+            self.xu, self.yx = self.yx, self.xu
+            return self.output
 
-            self.x.appendleft(np.array(signal))
-            for k, xk in enumerate(self.x):
-                self.output += self.num[k] * xk
-            for k, yk in enumerate(self.y):
-                self.output -= self.den[k] * yk
-            self.y.appendleft(np.array(self.output))
 
-            return self.output
+def _padded_tf(num, den):
+    """Coefficients of the difference equation implemented by a `.Step`.
+
+    Returns the numerator ``b`` and the denominator ``a`` (including the
+    leading 1 dropped by `.LinearFilter.make_step`) padded with zeros to
+    the same length.
+    """
+    order = max(len(num) - 1, len(den))
+    b = np.zeros(order + 1)
+    b[:len(num)] = num
+    a = np.zeros(order + 1)
+    a[0] = 1.
+    a[1:len(den) + 1] = den
+    return b, a
 
 
 class Lowpass(LinearFilter):
@@ -1,6 +1,7 @@
 import errno
 import multiprocessing
 import os
+import time
 import timeit
 from subprocess import CalledProcessError
 
@@ -9,8 +10,11 @@ from numpy.testing import assert_equal
 import pytest
 
 import nengo
-from nengo.cache import (CacheIndex, DecoderCache, Fingerprint,
-                         get_fragment_size, WriteableCacheIndex)
+from nengo.cache import (
+    CacheIndex, DecoderCache, Fingerprint, LFUPolicy, LRUPolicy, MemoryCache,
+    ModelCache, ShardedCacheIndex, SizeAwareLFUPolicy,
+    get_default_eviction_policy, get_fragment_size, WriteableCacheIndex,
+    WriteableShardedCacheIndex)
 from nengo.exceptions import CacheIOWarning, FingerprintError
 from nengo.solvers import LstsqL2
 from nengo.utils.compat import int_types
@@ -102,7 +106,9 @@ def test_decoder_cache(tmpdir):
 def test_corrupted_decoder_cache(tmpdir):
     cache_dir = str(tmpdir)
 
-    with DecoderCache(cache_dir=cache_dir) as cache:
+    # without a memory cache, so that the files are read
+    with DecoderCache(cache_dir=cache_dir,
+                      memory_cache=MemoryCache(0)) as cache:
         solver_mock = SolverMock()
         cache.wrap_solver(solver_mock)(**get_solver_test_args())
         assert SolverMock.n_calls[solver_mock] == 1
@@ -116,21 +122,100 @@ def test_corrupted_decoder_cache(tmpdir):
         assert SolverMock.n_calls[solver_mock] == 2
 
 
+def test_decoder_memory_cache(monkeypatch, tmpdir):
+    memory_cache = MemoryCache('1 KB')
+    cache_dirs = [str(tmpdir.join('a')), str(tmpdir.join('b'))]
+    solver_mock = SolverMock()
+
+    with DecoderCache(cache_dir=cache_dirs[0],
+                      memory_cache=memory_cache) as cache:
+        decoders1, info1 = cache.wrap_solver(solver_mock)(
+            **get_solver_test_args())
+    assert len(memory_cache) == 1
+    assert memory_cache.nbytes == decoders1.nbytes
+
+    # a new cache for the same directory reads from memory, not from disk
+    with monkeypatch.context() as m:
+        m.setattr(nengo.utils.nco, 'read', None)
+        with DecoderCache(cache_dir=cache_dirs[0],
+                          memory_cache=memory_cache) as cache:
+            decoders2, info2 = cache.wrap_solver(solver_mock)(
+                **get_solver_test_args())
+    assert SolverMock.n_calls[solver_mock] == 1
+    assert (memory_cache.hits, memory_cache.misses) == (1, 0)
+    assert np.array_equal(decoders2, decoders1)
+    assert not decoders2.flags.writeable
+    assert info2 == info1
+
+    # the solver's arrays are not changed by storing them
+    assert decoders1.flags.writeable
+    decoders1[...] = 0
+    assert np.any(decoders2 != 0)
+
+    # caches for other directories do not share items
+    with DecoderCache(cache_dir=cache_dirs[1],
+                      memory_cache=memory_cache) as cache:
+        cache.wrap_solver(solver_mock)(**get_solver_test_args())
+        assert SolverMock.n_calls[solver_mock] == 2
+        assert len(memory_cache) == 2
+        cache.invalidate()
+        assert len(memory_cache) == 1
+
+    # least recently used items are evicted to meet the size limit
+    with DecoderCache(cache_dir=cache_dirs[0],
+                      memory_cache=memory_cache) as cache:
+        for i in range(1, 9):
+            cache.wrap_solver(solver_mock)(**get_solver_test_args(
+                gain=np.ones(10) * i))
+    assert len(memory_cache) == 1024 // decoders1.nbytes
+    assert memory_cache.nbytes <= 1024
+    memory_cache.shrink(0)
+    assert len(memory_cache) == 0
+
+
+def test_decoder_cache_mmap(tmpdir):
+    cache_dir = str(tmpdir)
+    solver_mock = SolverMock()
+    args = get_weight_solver_test_args()
+
+    with DecoderCache(cache_dir=cache_dir,
+                      memory_cache=MemoryCache(0), mmap_size=0) as cache:
+        decoders1, _ = cache.wrap_solver(solver_mock)(**args)
+        decoders2, _ = cache.wrap_solver(solver_mock)(**args)
+    assert SolverMock.n_calls[solver_mock] == 1
+    assert isinstance(decoders2.base, np.memmap)
+    assert not decoders2.flags.writeable
+    assert np.array_equal(decoders1, decoders2)
+
+    # entries smaller than mmap_size are read into memory
+    with DecoderCache(cache_dir=cache_dir, memory_cache=MemoryCache(0),
+                      mmap_size='1 MB') as cache:
+        decoders3, _ = cache.wrap_solver(solver_mock)(**args)
+    assert SolverMock.n_calls[solver_mock] == 1
+    assert not isinstance(decoders3.base, np.memmap)
+    assert np.array_equal(decoders1, decoders3)
+
+
 def test_corrupted_decoder_cache_index(tmpdir):
     cache_dir = str(tmpdir)
+    index_dir = os.path.join(cache_dir, ShardedCacheIndex._INDEX)
+    solver_mock = SolverMock()
 
-    with DecoderCache(cache_dir=cache_dir):
-        pass  # Initialize cache with required files
-    assert len(os.listdir(cache_dir)) == 2  # index, index.lock
+    with DecoderCache(cache_dir=cache_dir,
+                      memory_cache=MemoryCache(0)) as cache:
+        cache.wrap_solver(solver_mock)(**get_solver_test_args())
+    prefix, = [f[:2] for f in os.listdir(index_dir) if f.endswith('.log')]
 
-    # Write corrupted index
-    with open(os.path.join(cache_dir, CacheIndex._INDEX), 'w') as f:
+    # Write corrupted shard
+    with open(os.path.join(index_dir, prefix + '.pkl'), 'w') as f:
         f.write('(d')  # empty dict, but missing '.' at the end
 
-    # Try to load index
-    with DecoderCache(cache_dir=cache_dir):
-        pass
-    assert len(os.listdir(cache_dir)) == 2  # index, index.lock
+    # The shard is reinitialized and the decoders are solved for again
+    with DecoderCache(cache_dir=cache_dir,
+                      memory_cache=MemoryCache(0)) as cache:
+        cache.wrap_solver(solver_mock)(**get_solver_test_args())
+    assert SolverMock.n_calls[solver_mock] == 2
+    assert not os.path.exists(os.path.join(index_dir, prefix + '.pkl'))
 
 
 def test_decoder_cache_invalidation(tmpdir):
@@ -162,20 +247,21 @@ def test_decoder_cache_size_includes_overhead(tmpdir):
         assert cache.get_size_in_bytes() % fragment_size == 0
 
 
-def test_decoder_cache_shrinking(tmpdir):
+class TwoDaysAgo(object):
+    @staticmethod
+    def time():
+        return time.time() - 60 * 60 * 24 * 2
+
+
+def test_decoder_cache_shrinking(monkeypatch, tmpdir):
     cache_dir = str(tmpdir)
     solver_mock = SolverMock()
     another_solver = SolverMock()
 
-    with DecoderCache(cache_dir=cache_dir) as cache:
-        cache.wrap_solver(solver_mock)(**get_solver_test_args())
-
-        # Ensure differing time stamps (depending on the file system the
-        # timestamp resolution might be as bad as 1 day).
-        for path in cache.get_files():
-            timestamp = os.stat(path).st_atime
-            timestamp -= 60 * 60 * 24 * 2  # 2 days
-            os.utime(path, (timestamp, timestamp))
+    with monkeypatch.context() as m:
+        m.setattr(nengo.cache, 'time', TwoDaysAgo)
+        with DecoderCache(cache_dir=cache_dir) as cache:
+            cache.wrap_solver(solver_mock)(**get_solver_test_args())
 
     with DecoderCache(cache_dir=cache_dir) as cache:
         cache.wrap_solver(another_solver)(**get_solver_test_args(
@@ -233,6 +319,87 @@ def test_decoder_cache_shrink_threadsafe(monkeypatch, tmpdir):
         cache.shrink(limit)
 
 
+def test_decoder_cache_shrink_by_uses(tmpdir):
+    solver_mock = SolverMock()
+    another_solver = SolverMock()
+    args = get_solver_test_args()
+    another_args = get_solver_test_args(solver=nengo.solvers.LstsqNoise())
+    cache = DecoderCache(cache_dir=str(tmpdir), memory_cache=MemoryCache(0),
+                         eviction_policy=LFUPolicy())
+    with cache:
+        cache.wrap_solver(solver_mock)(**args)
+    for _ in range(3):
+        with cache:
+            cache.wrap_solver(another_solver)(**another_args)
+    with cache:
+        cache.wrap_solver(solver_mock)(**args)
+
+    # the first decoders were used less often, even though more recently
+    cache.shrink(cache.get_size_in_bytes() - 1)
+    with cache:
+        cache.wrap_solver(another_solver)(**another_args)
+        cache.wrap_solver(solver_mock)(**args)
+    assert SolverMock.n_calls[another_solver] == 1
+    assert SolverMock.n_calls[solver_mock] == 2
+
+
+def test_decoder_cache_shrink_in_background(tmpdir):
+    cache = DecoderCache(cache_dir=str(tmpdir))
+    with cache:
+        cache.wrap_solver(SolverMock())(**get_solver_test_args())
+        thread = cache.shrink(0, background=True)
+    thread.join()
+    assert cache.get_files() == []
+    with cache._index:
+        assert cache._index.file_stats() == {}
+
+    readonly = DecoderCache(readonly=True, cache_dir=str(tmpdir))
+    assert readonly.shrink(0, background=True) is None
+
+
+def test_decoder_cache_shrink_after_build(monkeypatch, tmpdir):
+    assert nengo.RC_DEFAULTS['decoder_cache']['shrink'] == 'foreground'
+
+    calls = []
+    monkeypatch.setattr(
+        DecoderCache, 'shrink',
+        lambda self, background=False: calls.append(background))
+    cache = DecoderCache(cache_dir=str(tmpdir))
+    for mode in ['foreground', 'background', 'manually']:
+        monkeypatch.setattr(
+            nengo.cache.rc, 'get', lambda section, option: mode)
+        cache.shrink_after_build()
+    assert calls == [False, True]
+
+
+def test_eviction_policies():
+    now = 1e9
+    small = (1024, 10, now - 3600)
+    large = (1024 * 1024, 10, now - 3600)
+    recent = (1024, 1, now)
+    old = (1024, 20, now - 365 * 24 * 3600)
+
+    def order(policy, *files):
+        return sorted(files, key=lambda f: policy.score(*(f + (now,))))
+
+    assert order(LRUPolicy(), small, recent, old) == [old, small, recent]
+    assert order(LFUPolicy(), small, recent, old) == [recent, small, old]
+    assert order(SizeAwareLFUPolicy(), small, large, recent, old) == [
+        old, large, recent, small]
+
+
+def test_default_eviction_policy(monkeypatch):
+    monkeypatch.setattr(
+        nengo.cache.rc, 'get', lambda section, option: 'nengo.cache.LRUPolicy')
+    assert isinstance(get_default_eviction_policy(), LRUPolicy)
+
+    monkeypatch.setattr(
+        nengo.cache.rc, 'get', lambda section, option: 'nengo.cache.NoPolicy')
+    with pytest.warns(UserWarning, match="Could not create eviction policy"):
+        policy = get_default_eviction_policy()
+    assert isinstance(policy, SizeAwareLFUPolicy)
+
+
 def test_decoder_cache_with_E_argument_to_solver(tmpdir):
     cache_dir = str(tmpdir)
     solver_mock = SolverMock()
@@ -314,7 +481,7 @@ def test_cache_works(tmpdir, RefSimulator, seed):
     assert len(os.listdir(cache_dir)) == 0
     with RefSimulator(model, model=nengo.builder.Model(
             dt=0.001, decoder_cache=DecoderCache(cache_dir=cache_dir))):
-        assert len(os.listdir(cache_dir)) == 3  # index, index.lock, and *.nco
+        assert len(os.listdir(cache_dir)) == 2  # index.d and *.nco
 
 
 def test_cache_not_used_without_seed(tmpdir, RefSimulator):
@@ -327,7 +494,69 @@ def test_cache_not_used_without_seed(tmpdir, RefSimulator):
     assert len(os.listdir(cache_dir)) == 0
     with RefSimulator(model, model=nengo.builder.Model(
             dt=0.001, decoder_cache=DecoderCache(cache_dir=cache_dir))):
-        assert len(os.listdir(cache_dir)) == 2  # index, index.lock
+        assert len(os.listdir(cache_dir)) == 1  # index.d
+
+
+def test_model_cache(monkeypatch, tmpdir, seed):
+    model_cache = ModelCache(cache_dir=str(tmpdir))
+    monkeypatch.setattr(
+        nengo.simulator, 'get_default_model_cache', lambda: model_cache)
+
+    def make_network(n_neurons=10, seed=seed):
+        with nengo.Network(seed=seed) as net:
+            u = nengo.Node(lambda t: np.sin(8 * t))
+            a = nengo.Ensemble(n_neurons, 1)
+            nengo.Connection(u, a)
+            net.p = nengo.Probe(a, synapse=0.01)
+        return net
+
+    net = make_network()
+    with nengo.Simulator(net) as sim:
+        sim.run(0.1)
+    assert len(model_cache.get_files()) == 1
+
+    # an identical network loads the model instead of building it
+    net2 = make_network()
+    with monkeypatch.context() as m:
+        m.setattr(nengo.builder.Model, 'build', None)
+        with nengo.Simulator(net2) as sim2:
+            sim2.run(0.1)
+    assert sim2.model.toplevel is net2
+    assert str(net2) in sim2.model.label
+    assert np.array_equal(sim.data[net.p], sim2.data[net2.p])
+    assert len(model_cache.get_files()) == 1
+
+    # changes to the network, dt or the optimizer make a new model
+    key = model_cache.get_key(net2, 0.001, True)[0]
+    assert model_cache.get_key(make_network(), 0.001, True)[0] == key
+    assert model_cache.get_key(make_network(11), 0.001, True)[0] != key
+    assert model_cache.get_key(net2, 0.002, True)[0] != key
+    assert model_cache.get_key(net2, 0.001, False)[0] != key
+
+    # unseeded networks are not cached
+    with nengo.Simulator(make_network(seed=None)):
+        pass
+    assert len(model_cache.get_files()) == 1
+
+    model_cache.shrink(0)
+    assert len(model_cache.get_files()) == 0
+
+
+def test_corrupted_model_cache(tmpdir, seed):
+    model_cache = ModelCache(cache_dir=str(tmpdir))
+    with nengo.Network(seed=seed) as net:
+        nengo.Ensemble(10, 1)
+    model = nengo.builder.Model()
+    model.build(net)
+
+    key, objects = model_cache.get_key(net, model.dt, False)
+    model_cache.save(key, objects, model, {})
+    path, = model_cache.get_files()
+    with open(path, 'w') as f:
+        f.write('corrupted')
+
+    assert model_cache.load(key, objects, model.decoder_cache) is None
+    assert len(model_cache.get_files()) == 0
 
 
 def build_many_ensembles(cache_dir, RefSimulator):
@@ -663,8 +892,120 @@ def test_writeablecacheindex_warning(monkeypatch, tmpdir):
 
 def test_shrink_does_not_fail_if_lock_cannot_be_acquired(tmpdir):
     cache = DecoderCache(cache_dir=str(tmpdir))
-    cache._index._lock.timeout = 1.
     with cache:
         cache.wrap_solver(SolverMock())(**get_solver_test_args())
-    with cache._index._lock:
-        cache.shrink(limit=0)
+    prefix, = cache._index._prefixes()
+    with cache._index._lock(prefix):
+        with pytest.warns(UserWarning, match="could not acquire lock"):
+            cache.shrink(limit=0)
+
+
+def test_shardedcacheindex(tmpdir):
+    index = WriteableShardedCacheIndex(cache_dir=str(tmpdir))
+    with index:
+        index['aa0'] = ("file0", 0, 0)
+        index['aa1'] = ("file1", 0, 0)
+        index['bb0'] = (os.path.join(str(tmpdir), "file1"), 0, 1)
+        index['cc0'] = ("file2", 0, 0)
+        del index['aa1']
+        assert index['aa0'] == ("file0", 0, 0)
+        assert 'aa1' not in index
+    assert index._prefixes() == {'aa', 'bb', 'cc'}
+
+    # only the shards that are looked up are loaded
+    index = ShardedCacheIndex(cache_dir=str(tmpdir))
+    with index:
+        assert index['aa0'] == ("file0", 0, 0)
+        assert 'aa1' not in index
+        assert list(index._shards) == ['aa']
+        with pytest.raises(TypeError):
+            index['aa2'] = ("file", 0, 0)
+
+    # entries of removed files are removed from all shards
+    index = WriteableShardedCacheIndex(cache_dir=str(tmpdir))
+    with index:
+        index.remove_file_entry("file0")
+        index.remove_file_entry(os.path.join(str(tmpdir), "file1"))
+        assert index['cc0'] == ("file2", 0, 0)
+    with ShardedCacheIndex(cache_dir=str(tmpdir)) as index:
+        assert 'aa0' not in index, "Fails on relative paths"
+        assert 'bb0' not in index, "Fails on absolute paths"
+        assert index['cc0'] == ("file2", 0, 0)
+
+
+def test_shardedcacheindex_relpath(tmpdir):
+    cache_dir = str(tmpdir.mkdir("cache"))
+    sibling_dir = str(tmpdir.mkdir("cache2"))
+    index = ShardedCacheIndex(cache_dir=cache_dir)
+    assert index._relpath(os.path.join(cache_dir, "file0")) == "file0"
+    assert index._relpath("file0") == "file0"
+    path = os.path.join(sibling_dir, "file0")
+    assert index._relpath(path) == path
+
+
+def test_shardedcacheindex_compaction(tmpdir):
+    index = WriteableShardedCacheIndex(cache_dir=str(tmpdir))
+    index.COMPACT_SIZE = 1024
+    for i in range(100):
+        with index:
+            index['aa%d' % i] = ("file%d" % i, 0, i)
+    log_path = index._shard_path('aa', index._LOG_EXT)
+    assert 0 < os.path.getsize(log_path) <= 1024
+    assert os.path.exists(index._shard_path('aa', index._SHARD_EXT))
+
+    # incomplete changes at the end of the log are ignored
+    with open(log_path, 'ab') as f:
+        f.write(b'\xff\x00\x00\x00')
+    with ShardedCacheIndex(cache_dir=str(tmpdir)) as index:
+        for i in range(100):
+            assert index['aa%d' % i] == ("file%d" % i, 0, i)
+
+    index = WriteableShardedCacheIndex(cache_dir=str(tmpdir))
+    index.compact()
+    assert os.path.getsize(log_path) == 0
+    with index:
+        assert index['aa99'] == ("file99", 0, 99)
+
+
+def test_shardedcacheindex_migrates_cacheindex(tmpdir):
+    with WriteableCacheIndex(cache_dir=str(tmpdir)) as index:
+        index['aa0'] = ("file0", 0, 0)
+        index['bb0'] = ("file1", 0, 0)
+
+    with ShardedCacheIndex(cache_dir=str(tmpdir)) as index:
+        assert index['aa0'] == ("file0", 0, 0)
+
+    with WriteableShardedCacheIndex(cache_dir=str(tmpdir)) as index:
+        assert index['bb0'] == ("file1", 0, 0)
+    assert not os.path.exists(index.legacy_index_path)
+    assert index._prefixes() == {'aa', 'bb'}
+
+
+def test_shardedcacheindex_access_stats(tmpdir):
+    index = WriteableShardedCacheIndex(cache_dir=str(tmpdir))
+    with index:
+        index['aa0'] = ("file0", 0, 0)
+        index['aa1'] = ("file0", 0, 1)
+        index['bb0'] = ("file1", 0, 0)
+    with index:
+        index.record_access('aa0')
+        index.record_access('aa0')
+        index.record_access('cc0')  # not in the index
+    with ShardedCacheIndex(cache_dir=str(tmpdir)) as readonly:
+        stats = readonly.file_stats()
+    assert sorted(stats) == ["file0", "file1"]
+    assert stats["file0"][0] == 4
+    assert stats["file1"][0] == 1
+    assert stats["file0"][1] >= stats["file1"][1]
+
+    # compaction keeps the statistics, and changing an entry resets them
+    index.compact()
+    with index:
+        assert index.file_stats() == stats
+        index['bb0'] = ("file2", 0, 0)
+        del index['aa1']
+    with index:
+        new_stats = index.file_stats()
+    assert sorted(new_stats) == ["file0", "file2"]
+    assert new_stats["file0"][0] == 3
+    assert new_stats["file2"][0] == 1
@@ -10,6 +10,7 @@ from nengo.dists import UniformHypersphere
 from nengo.exceptions import BuildError, ObsoleteError, ValidationError
 from nengo.solvers import LstsqL2
 from nengo.processes import Piecewise
+from nengo.utils.functions import vectorized
 from nengo.utils.testing import allclose
 
 
@@ -1034,6 +1035,33 @@ def test_function_returns_none_error(Simulator):
             pass
 
 
+def test_vectorized_function(Simulator, seed):
+    calls = []
+
+    def product(x):
+        calls.append(np.shape(x))
+        return x[..., 0] * x[..., 1]
+
+    def build(function):
+        with nengo.Network(seed=seed) as model:
+            a = nengo.Ensemble(50, 3)
+            conn = nengo.Connection(a[:2], nengo.Node(size_in=1),
+                                    function=function)
+        with Simulator(model) as sim:
+            return sim.data[conn].weights
+
+    decoders = build(product)
+    assert len(calls) > 100
+    del calls[:]
+    assert np.allclose(build(vectorized(product)), decoders)
+    assert len(calls) == 3  # size check, all points, and first point
+    assert len(calls[1]) == 2 and calls[1][1] == 2
+
+    # functions that do not accept arrays of points are caught
+    with pytest.raises(BuildError, match="does not give the same results"):
+        build(vectorized(lambda x: x[0] * x[1]))
+
+
 def test_connection_none_error():
     with nengo.Network():
         a = nengo.Node([0])
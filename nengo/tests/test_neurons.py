@@ -1,8 +1,11 @@
+from collections import OrderedDict
+
 import numpy as np
 import pytest
 
 import nengo
-from nengo.exceptions import BuildError, SimulationError
+from nengo.builder.neurons import lif_step
+from nengo.exceptions import BuildError, SimulationError, ValidationError
 from nengo.neurons import (
     AdaptiveLIF,
     AdaptiveLIFRate,
@@ -12,7 +15,9 @@ from nengo.neurons import (
     LIFRate,
     NeuronType,
     NeuronTypeParam,
+    RateTable,
     RectifiedLinear,
+    settled_firingrate,
     Sigmoid,
     SpikingRectifiedLinear,
 )
@@ -49,6 +54,28 @@ def test_lif_builtin(rng):
     assert np.allclose(sim_rates, math_rates, atol=1, rtol=0.02)
 
 
+@pytest.mark.parametrize('lif', (
+    LIF(), LIF(tau_ref=0), LIF(min_voltage=-np.inf, amplitude=0.3)))
+@pytest.mark.parametrize('dtype', (np.float32, np.float64))
+def test_lif_step(lif, dtype, rng):
+    """Test that the builder's LIF step matches step_math exactly."""
+    dt = 1e-3
+    n = 100
+    J = np.zeros(n, dtype=dtype)
+    spiked, voltage, reftime = [np.zeros(n, dtype=dtype) for _ in range(3)]
+    spiked2, voltage2, reftime2 = [
+        np.zeros(n, dtype=dtype) for _ in range(3)]
+    step = lif_step(lif, dt, J, spiked2, voltage2, reftime2)
+
+    for _ in range(500):
+        J[...] = rng.uniform(-5, 20, size=n)
+        lif.step_math(dt, J, spiked, voltage, reftime)
+        step()
+        assert np.array_equal(spiked, spiked2)
+        assert np.array_equal(voltage, voltage2)
+        assert np.array_equal(reftime, reftime2)
+
+
 @pytest.mark.parametrize('dt', (0.001, 0.002))
 def test_lif(Simulator, plt, rng, logger, dt):
     """Test that the dynamic model approximately matches the rates."""
@@ -296,6 +323,43 @@ def test_izhikevich(Simulator, plt, seed, rng):
     plot(rz, "Resonator", 6)
 
 
+def test_settled_firingrate(monkeypatch, rng):
+    izh = Izhikevich()
+    J = rng.uniform(-5, 30, size=(20, 30))
+    n_steps = []
+
+    def step_math(dt, J, output, voltage, recovery):
+        n_steps.append(J.size)
+        izh.step_math(dt, J, output, voltage, recovery)
+
+    def rates(**kwargs):
+        kwargs.setdefault('chunk_size', J.size)
+        kwargs.setdefault('sim_time', 0.5)
+        del n_steps[:]
+        return settled_firingrate(
+            step_math, J, [np.zeros_like(J), np.zeros_like(J)],
+            settle_time=0.01, **kwargs)
+
+    reference = rates()
+    assert sum(n_steps) == 510 * J.size
+
+    # cached results are returned without simulating
+    assert np.array_equal(rates(), reference)
+    assert len(n_steps) == 0
+
+    # simulating in chunks does not change the rates
+    monkeypatch.setattr(nengo.neurons, '_settled_cache', OrderedDict())
+    monkeypatch.setattr(nengo.neurons, '_settled_cache_nbytes', 0)
+    assert np.array_equal(rates(chunk_size=100), reference)
+    assert max(n_steps) == 3 * J.shape[1]
+
+    # the least recently used results are evicted to stay within the limit
+    monkeypatch.setattr(nengo.neurons, '_settled_cache_bytes', J.nbytes)
+    rates(sim_time=0.4)
+    assert len(nengo.neurons._settled_cache) == 1
+    assert nengo.neurons._settled_cache_nbytes == J.nbytes
+
+
 @pytest.mark.parametrize("max_rate,intercept", [(300., 0.0), (100., 1.1)])
 def test_sigmoid_response_curves(Simulator, max_rate, intercept):
     """Check the sigmoid response curve monotonically increases.
@@ -538,6 +602,66 @@ def test_gain_bias(rng, nl_nodirect, generic):
     assert np.allclose(intercepts, intercepts0, atol=tolerance)
 
 
+@pytest.mark.parametrize('interpolation', ('linear', 'cubic'))
+@pytest.mark.parametrize('neuron_type', (
+    LIFRate(), LIF(tau_ref=0.005), RectifiedLinear(), Sigmoid()))
+def test_rate_table(interpolation, neuron_type, rng):
+    J = rng.uniform(-2, 10, size=(1000, 5))
+    table = RateTable(neuron_type, J.min(), J.max(), n_points=256,
+                      interpolation=interpolation, tolerance=1e-3)
+    rates = neuron_type.rates(J, 1., 0.)
+    assert np.all(table.errors[~table.exact] <= 1e-3 * rates.max())
+    assert np.allclose(table(J), rates, atol=2e-3 * rates.max())
+
+    # rates outside the table are computed exactly
+    J = np.array([-5., 20.])
+    assert np.array_equal(table(J), neuron_type.rates(J, 1., 0.))
+
+    with pytest.raises(ValidationError):
+        RateTable(neuron_type, 0, 1, interpolation='nearest')
+    with pytest.raises(ValidationError):
+        RateTable(neuron_type, 1, 1)
+
+
+def test_rate_table_build(Simulator, monkeypatch, seed):
+    with nengo.Network(seed=seed) as net:
+        a = nengo.Ensemble(100, 1, neuron_type=LIFRate())
+        conn = nengo.Connection(a, a)
+
+        conn2 = nengo.Connection(a, a, function=np.square)
+
+    with Simulator(net) as sim:
+        decoders = sim.data[conn].weights
+
+    settings = {'enabled': 'True', 'n_points': '128', 'tolerance': '0.01'}
+    defaults = {k: nengo.rc.get('rate_table', k) for k in settings}
+    n_tables = [0]
+
+    class CountedRateTable(RateTable):
+        def __init__(self, *args, **kwargs):
+            n_tables[0] += 1
+            super(CountedRateTable, self).__init__(*args, **kwargs)
+
+    monkeypatch.setattr(
+        nengo.builder.ensemble, 'RateTable', CountedRateTable)
+    monkeypatch.setattr(
+        nengo.builder.ensemble, '_rate_tables', OrderedDict())
+    try:
+        for k, v in settings.items():
+            nengo.rc.set('rate_table', k, v)
+        with Simulator(net) as sim:
+            table_decoders = sim.data[conn].weights
+            assert sim.data[conn2].weights.shape == decoders.shape
+    finally:
+        for k, v in defaults.items():
+            nengo.rc.set('rate_table', k, v)
+
+    assert not np.array_equal(decoders, table_decoders)
+    assert np.allclose(decoders, table_decoders, atol=0.01 * decoders.max())
+    # both connections use the same table
+    assert n_tables[0] == 1
+
+
 def test_argreprs():
     """Test repr() for each neuron type."""
 
@@ -1,3 +1,5 @@
+import os
+
 import pkg_resources
 
 import numpy as np
@@ -9,8 +11,12 @@ from nengo.builder import Model
 from nengo.builder.ensemble import BuiltEnsemble
 from nengo.builder.operator import DotInc
 from nengo.builder.signal import Signal
-from nengo.exceptions import ObsoleteError, SimulatorClosed, ValidationError
-from nengo.utils.compat import range, ResourceWarning
+from nengo.cache import NoDecoderCache
+from nengo.exceptions import (
+    ObsoleteError, SimulationError, SimulatorClosed, ValidationError)
+from nengo.utils import nco
+from nengo.utils.compat import iteritems, range, ResourceWarning
+from nengo.utils.numpy import rmse
 from nengo.utils.progress import ProgressBar
 
 
@@ -61,6 +67,239 @@ def test_probedict():
     assert np.all(probedict.get("list") == np.asarray(raw.get("list")))
 
 
+def test_probebuffer():
+    buf = nengo.simulator.ProbeBuffer((2,), chunk_size=3)
+    assert len(buf) == 0 and buf.data.shape == (0, 2)
+
+    for i in range(4):
+        buf.append([i, -i])
+    assert len(buf) == 4 and buf.capacity == 6
+    old = buf.data
+
+    buf.reserve(10)
+    assert buf.capacity == 14
+    buf.append([4, -4])
+    assert np.array_equal(buf.data[:, 0], np.arange(5))
+    assert np.array_equal(old[:, 1], -np.arange(4))
+    assert not buf.data.flags.writeable
+
+
+def test_probe_dir(RefSimulator, tmpdir):
+    with nengo.Network(seed=0) as model:
+        u = nengo.Node(np.sin)
+        a = nengo.Ensemble(10, 1)
+        nengo.Connection(u, a)
+        up = nengo.Probe(u)
+        ap = nengo.Probe(a, sample_every=0.003)
+
+    with RefSimulator(model) as sim:
+        sim.run(0.1)
+        u_mem, a_mem = sim.data[up], sim.data[ap]
+
+    probe_dir = str(tmpdir.mkdir("probes"))
+    state_path = str(tmpdir.join("state.pkl"))
+    with RefSimulator(model, probe_dir=probe_dir) as sim:
+        sim.run(0.05)
+        assert isinstance(sim.data[up], np.memmap)
+        sim.save_state(state_path)
+        sim.step()
+        sim.run(0.049)
+        assert np.array_equal(sim.data[up], u_mem)
+        assert np.array_equal(sim.data[ap], a_mem)
+
+        # resets and loaded states replace the files of the old data
+        sim.reset()
+        sim.load_state(state_path)
+        assert len(os.listdir(probe_dir)) == 2
+        assert np.array_equal(sim.data[up], u_mem[:50])
+        sim.run(0.05)
+
+    assert np.array_equal(sim.data[up], u_mem)
+    for probe, path in ((up, sim.model.params[up].path),
+                        (ap, sim.model.params[ap].path)):
+        with open(path, 'rb') as f:
+            metadata, data = nco.read(f)
+        assert metadata['probe'] == str(probe)
+        assert np.array_equal(data, sim.data[probe])
+
+
+def test_run_steps_matches_step(RefSimulator):
+    with nengo.Network(seed=0) as model:
+        u = nengo.Node(lambda t: np.sin(10 * t))
+        a = nengo.Ensemble(20, 1)
+        nengo.Connection(u, a)
+        probes = [nengo.Probe(u), nengo.Probe(a, synapse=0.01),
+                  nengo.Probe(a.neurons, sample_every=0.0025),
+                  nengo.Probe(u, sample_every=0.2)]
+
+    with RefSimulator(model) as sim:
+        for _ in range(257):
+            sim.step()
+        stepped = [np.array(sim.data[p]) for p in probes]
+
+        sim.reset()
+        sim.run_steps(57)
+        sim.run_steps(200)
+        assert sim.n_steps == 257 and np.allclose(sim.time, 0.257)
+        for p, x in zip(probes, stepped):
+            assert np.array_equal(sim.data[p], x)
+
+
+def test_run_steps_error_keeps_recorded_data(RefSimulator):
+    def fail(t):
+        if t > 0.15:
+            raise SimulationError("failed")
+        return t
+
+    with nengo.Network() as model:
+        u = nengo.Node(fail)
+        up = nengo.Probe(u)
+        up2 = nengo.Probe(u, sample_every=0.004)
+
+    with RefSimulator(model) as sim:
+        with pytest.raises(SimulationError):
+            sim.run(0.2)
+        assert len(sim.data[up]) == 150
+        assert np.array_equal(sim.data[up2][:, 0], sim.data[up][3::4, 0])
+
+
+@pytest.mark.parametrize('optimize', (True, False))
+def test_fuse_steps(RefSimulator, optimize):
+    with nengo.Network(seed=0) as model:
+        u = nengo.Node(lambda t: [np.sin(10 * t), np.cos(10 * t)])
+        a = nengo.Ensemble(30, 2)
+        b = nengo.networks.EnsembleArray(10, 2)
+        nengo.Connection(u, a)
+        nengo.Connection(a[::-1], b.input, function=lambda x: x ** 2)
+        nengo.Connection(u[0], b.input[1], transform=-1, synapse=None)
+        probes = [nengo.Probe(a, synapse=0.01),
+                  nengo.Probe(b.output, synapse=0.01),
+                  nengo.Probe(a.neurons)]
+
+    data = []
+    for fuse in (False, True):
+        with RefSimulator(model, optimize=optimize, fuse_steps=fuse) as sim:
+            sim.run(0.1)
+            if fuse:
+                assert len(sim._steps) == 1
+        data.append([sim.data[p] for p in probes])
+
+    for x, y in zip(*data):
+        assert np.array_equal(x, y)
+
+
+@pytest.mark.parametrize('fuse', (True, False))
+def test_n_threads(RefSimulator, monkeypatch, fuse):
+    with nengo.Network(seed=0) as model:
+        u = nengo.Node(lambda t: np.sin(10 * t))
+        ens = [nengo.Ensemble(50, 1) for _ in range(4)]
+        probes = []
+        for a, b in zip(ens[:-1], ens[1:]):
+            nengo.Connection(u, a)
+            nengo.Connection(a, b, solver=nengo.solvers.LstsqL2(weights=True))
+            nengo.Connection(a, b, function=np.square)
+            probes.append(nengo.Probe(b, synapse=0.01))
+            probes.append(nengo.Probe(b.neurons))
+
+    with RefSimulator(model, optimize=False) as sim:
+        sim.run(0.1)
+    expected = [sim.data[p] for p in probes]
+
+    # run all matrix products and neuron updates in threads
+    monkeypatch.setattr(RefSimulator, '_parallel_min_cost', 0)
+    with RefSimulator(model, optimize=False, n_threads=3,
+                      fuse_steps=fuse) as sim:
+        assert len(sim._steps) < len(sim._step_order)
+        sim.run(0.1)
+    for p, x in zip(probes, expected):
+        assert np.allclose(sim.data[p], x)
+
+
+def test_presolve_decoders(RefSimulator, tmpdir):
+    futures = pytest.importorskip('concurrent.futures')
+
+    with nengo.Network(seed=0) as model:
+        ens = [nengo.Ensemble(50, 1) for _ in range(4)]
+        conns = []
+        for a, b in zip(ens[:-1], ens[1:]):
+            conns.append(nengo.Connection(a, b, function=np.square))
+            conns.append(nengo.Connection(
+                a, b, transform=nengo.dists.Uniform(-1, 1),
+                solver=nengo.solvers.LstsqL2(weights=True)))
+
+    with RefSimulator(model) as sim:
+        expected = [sim.data[conn].weights for conn in conns]
+
+    cache = nengo.cache.DecoderCache(cache_dir=str(tmpdir))
+    with futures.ThreadPoolExecutor(max_workers=2) as executor:
+        for _ in range(2):  # fill the cache, then read from it
+            built = Model(decoder_cache=cache, executor=executor)
+            built.build(model)
+            assert len(built.presolved) == 0
+            for conn, weights in zip(conns, expected):
+                assert np.array_equal(built.params[conn].weights, weights)
+
+    with RefSimulator(model, n_threads=2) as sim:
+        assert sim.model.executor is None
+        for conn, weights in zip(conns, expected):
+            assert np.array_equal(sim.data[conn].weights, weights)
+
+
+def test_presolve_decoders_rng(seed):
+    futures = pytest.importorskip('concurrent.futures')
+
+    # the transform is sampled from the random number generator after the
+    # solver has drawn its noise from it
+    with nengo.Network(seed=seed) as model:
+        ens = [nengo.Ensemble(200, 1) for _ in range(4)]
+        conns = [nengo.Connection(a, b, transform=nengo.dists.Uniform(-1, 1),
+                                  solver=nengo.solvers.LstsqNoise())
+                 for a, b in zip(ens[:-1], ens[1:])]
+
+    built = Model(decoder_cache=NoDecoderCache())
+    built.build(model)
+    expected = [built.params[conn].weights for conn in conns]
+
+    with futures.ThreadPoolExecutor(max_workers=2) as executor:
+        built = Model(decoder_cache=NoDecoderCache(), executor=executor)
+        built.build(model)
+    for conn, weights in zip(conns, expected):
+        assert np.array_equal(built.params[conn].weights, weights)
+
+
+def test_batch_simulator(seed):
+    with nengo.Network(seed=seed) as model:
+        u = nengo.Node(lambda t: np.sin(10 * t))
+        noise = nengo.Node(nengo.processes.WhiteNoise())
+        a = nengo.Ensemble(20, 1)
+        nengo.Connection(u, a)
+        up = nengo.Probe(u)
+        ap = nengo.Probe(a, synapse=0.01)
+        noisep = nengo.Probe(noise)
+
+    with nengo.Simulator(model) as sim:
+        sim.run(0.05)
+    n_trials = 3
+    with nengo.simulator.BatchSimulator(model, n_trials) as batch_sim:
+        batch_sim.run(0.05)
+        assert len(batch_sim._step_order) < n_trials * len(sim._step_order)
+
+    assert batch_sim.data[ap].shape == (n_trials,) + sim.data[ap].shape
+    for i in range(n_trials):
+        assert np.allclose(batch_sim.data[up][i], sim.data[up])
+        assert np.allclose(batch_sim.data[ap][i], sim.data[ap])
+        trial_probe = batch_sim.copies[ap][i]
+        assert np.array_equal(batch_sim.data[trial_probe],
+                              batch_sim.data[ap][i])
+    assert not np.allclose(batch_sim.data[noisep][0],
+                           batch_sim.data[noisep][1])
+
+    with pytest.raises(ValidationError):
+        nengo.simulator.BatchSimulator(model, 0)
+    with pytest.warns(UserWarning, match="optimizer"):
+        nengo.simulator.BatchSimulator(model, 2, optimize=False).close()
+
+
 def test_probedict_with_repeated_simulator_runs(RefSimulator):
     with nengo.Network() as model:
         ens = nengo.Ensemble(10, 1)
@@ -72,6 +311,8 @@ def test_probedict_with_repeated_simulator_runs(RefSimulator):
         assert len(sim.data[p]) == 10
         sim.run(0.01)
         assert len(sim.data[p]) == 20
+        sim.step()
+        assert len(sim.data[p]) == 21
 
 
 def test_close_function(Simulator):
@@ -352,3 +593,73 @@ def test_sample_every_trange(Simulator, sample_every):
             sim.trange(dt=sample_every), np.squeeze(sim.data[p]))
     assert np.allclose(
         sim.trange(sample_every=sample_every), np.squeeze(sim.data[p]))
+
+
+@pytest.mark.parametrize('fuse', [False, True])
+def test_save_load_state(fuse, tmpdir, seed):
+    with nengo.Network(seed=seed) as net:
+        stim = nengo.Node(nengo.processes.WhiteSignal(1.0, high=10))
+        ens = nengo.Ensemble(20, 1, noise=nengo.processes.WhiteNoise())
+        nengo.Connection(stim, ens, synapse=nengo.Alpha(0.01))
+        p = nengo.Probe(ens, synapse=nengo.synapses.Triangle(0.01))
+        p_spikes = nengo.Probe(ens.neurons, sample_every=0.003)
+
+    path = str(tmpdir.join("state.pkl"))
+    with nengo.Simulator(net, fuse_steps=fuse) as sim:
+        sim.run(0.1)
+        sim.save_state(path)
+        sim.run(0.1)
+        data = sim.data[p].copy()
+        spikes = sim.data[p_spikes].copy()
+
+        for _ in range(2):
+            sim.load_state(path)
+            assert sim.n_steps == 100
+            assert np.allclose(sim.time, 0.1)
+            assert len(sim.data[p]) == 100
+            sim.run(0.1)
+            assert np.array_equal(sim.data[p], data)
+            assert np.array_equal(sim.data[p_spikes], spikes)
+
+    with nengo.Network() as other:
+        nengo.Ensemble(5, 1)
+    with nengo.Simulator(other) as sim:
+        with pytest.raises(SimulationError):
+            sim.load_state(path)
+
+
+def test_dtype(seed):
+    with nengo.Network(seed=seed) as net:
+        stim = nengo.Node(lambda t: np.sin(8 * t))
+        a = nengo.Ensemble(100, 1)
+        b = nengo.Ensemble(100, 1, neuron_type=nengo.AdaptiveLIF())
+        nengo.Connection(stim, a)
+        c = nengo.Ensemble(100, 1)
+        nengo.Connection(a, b, synapse=nengo.Alpha(0.005))
+        conn = nengo.Connection(b, c, learning_rule_type=nengo.PES())
+        nengo.Connection(c, conn.learning_rule)
+        nengo.Connection(stim, conn.learning_rule, transform=-1)
+        p = nengo.Probe(c, synapse=0.02)
+        p_spikes = nengo.Probe(a.neurons)
+
+    with nengo.Simulator(net) as sim64:
+        sim64.run(0.5)
+    assert sim64.dtype is None
+    assert sim64.data[p].dtype == np.float64
+
+    with nengo.Simulator(net, dtype=np.float32) as sim32:
+        sim32.run(0.5)
+        assert sim32.dtype == np.float32
+        for sig, x in iteritems(sim32.signals):
+            if sig is sim32.model.time:
+                assert x.dtype == np.float64
+            elif sig.dtype.kind == 'f':
+                assert x.dtype == np.float32, sig
+            else:
+                assert x.dtype == sig.dtype
+        assert sim32.data[p].dtype == np.float32
+        assert sim32.data[p_spikes].dtype == np.float32
+
+    assert np.allclose(sim32.trange(), sim64.trange())
+    # occasional spikes shift by a step, but the decoded values agree
+    assert rmse(sim32.data[p], sim64.data[p]) < 0.005
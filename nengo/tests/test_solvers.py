@@ -3,6 +3,9 @@ TODO:
   - add a test to test each solver many times on different populations,
     and record the error.
 """
+from collections import OrderedDict
+import sys
+
 import numpy as np
 import pytest
 
@@ -84,6 +87,86 @@ def test_cholesky(rng):
     assert np.allclose(x0, x2)
 
 
+@pytest.mark.parametrize('use_scipy', (True, False))
+def test_cholesky_factor_cache(use_scipy, monkeypatch, rng):
+    if use_scipy:
+        pytest.importorskip('scipy')
+    else:
+        monkeypatch.setitem(sys.modules, 'scipy.linalg', None)
+    monkeypatch.setattr(lstsq, '_factor_cache', OrderedDict())
+    monkeypatch.setattr(lstsq, '_factor_cache_nbytes', 0)
+
+    A, b = get_system(500, 50, 2, rng=rng)
+    c = rng.normal(size=(500, 3))
+    sigma = 0.1 * A.max()
+
+    # only matrices that cannot change are cached
+    lstsq.Cholesky()(A, b, sigma)
+    assert len(lstsq._factor_cache) == 0
+    A.setflags(write=False)
+
+    x0, _ = lstsq.Cholesky()(A, np.hstack([b, c]), sigma)
+    assert len(lstsq._factor_cache) == 1
+    x1, _ = lstsq.Cholesky()(A, b, sigma)
+    x2, _ = lstsq.Cholesky()(A, c, sigma)
+    assert len(lstsq._factor_cache) == 1
+    assert np.allclose(x0, np.hstack([x1, x2]))
+
+    lstsq.Cholesky()(A, b, 2 * sigma)
+    lstsq.Cholesky(transpose=True)(A, b, sigma)
+    assert len(lstsq._factor_cache) == 3
+
+    # factors are cached by identity, not by the values of the matrix
+    A2 = A.copy()
+    A2[0, 0] += 1
+    A2.setflags(write=False)
+    x3, _ = lstsq.Cholesky()(A2, b, sigma)
+    assert len(lstsq._factor_cache) == 4
+    assert not np.allclose(x3, x1)
+
+    # factors of freed matrices are dropped
+    del A2
+    lstsq.Cholesky()(A, b, 3 * sigma)
+    assert len(lstsq._factor_cache) == 4
+
+    # factors are evicted to stay within the limit
+    factor_bytes = A.shape[1] ** 2 * A.itemsize
+    monkeypatch.setattr(lstsq, '_factor_cache_bytes', 2 * factor_bytes)
+    lstsq.Cholesky()(A, b, 4 * sigma)
+    assert len(lstsq._factor_cache) == 2
+    assert lstsq._factor_cache_nbytes == 2 * factor_bytes
+
+
+def test_cholesky_factor_shared_by_connections(monkeypatch, seed):
+    monkeypatch.setattr(lstsq, '_factor_cache', OrderedDict())
+    monkeypatch.setattr(lstsq, '_factor_cache_nbytes', 0)
+
+    with nengo.Network(seed=seed) as model:
+        a = nengo.Ensemble(50, 2)
+        b = nengo.Ensemble(50, 1)
+        conns = [nengo.Connection(a, b, function=lambda x: x[0] * x[1]),
+                 nengo.Connection(a, b, function=lambda x: x[0] ** 2),
+                 nengo.Connection(a[1], b)]
+        nengo.Connection(a, b[0], function=lambda x: x[1],
+                         eval_points=np.ones((10, 2)))
+
+    built = nengo.builder.Model()
+    built.build(model)
+    # the connections using the ensemble's evaluation points share a factor
+    # (the one with its own evaluation points is not cached)
+    assert len(lstsq._factor_cache) == 1
+    assert built.activities == {}
+
+    # sharing gives the same decoders as solving each connection separately
+    monkeypatch.setattr(lstsq, '_factor_cache_bytes', 0)
+    unshared = nengo.builder.Model()
+    unshared.build(model)
+    assert len(lstsq._factor_cache) == 1
+    for conn in conns:
+        assert np.allclose(built.params[conn].weights,
+                           unshared.params[conn].weights)
+
+
 def test_conjgrad(rng):
     A, b = get_system(1000, 100, 2, rng=rng)
     sigma = 0.1 * A.max()
@@ -107,6 +107,29 @@ def test_step_errors():
         LinearFilter.Simple([1], [1, 2], output)
 
 
+@pytest.mark.parametrize('y0', [None, 0.3])
+def test_general_step(y0, rng):
+    """Compares the state-space step with the difference equation"""
+    num = np.array([0.2, -0.1, 0.05])
+    den = np.array([-1.2, 0.5, -0.1])  # without the leading 1
+    shape = (2, 3)
+    x = rng.normal(size=(100,) + shape)
+
+    output = np.zeros(shape)
+    step = LinearFilter.General(num, den, output, y0=y0)
+    assert step.M.shape == (4, 4)
+    y = np.array([np.array(step(i, xi)) for i, xi in enumerate(x)])
+
+    y0 = 0 if y0 is None else y0
+    xs = [y0 * np.ones(shape)] * len(num) + list(x)
+    ys = [y0 * np.ones(shape)] * len(den)
+    for i in range(len(x)):
+        k = i + len(num)
+        ys.append(sum(num[j] * xs[k - j] for j in range(len(num)))
+                  - sum(den[j] * ys[-1 - j] for j in range(len(den))))
+    assert np.allclose(y, ys[len(den):])
+
+
 def test_filt(plt, rng):
     dt = 1e-3
     tend = 3.
@@ -149,6 +172,40 @@ def test_filtfilt(plt, rng):
     assert np.allclose(x, y)
 
 
+@pytest.mark.parametrize('synapse', [
+    Lowpass(0.01), Alpha(0.005), LinearFilter([1], [1, 0]),
+    LinearFilter([1, 2], [0.001, 0.05, 1])])
+def test_filt_whole_signal(synapse, rng):
+    """Compares filtering whole signals with filtering one step at a time"""
+    dt = 1e-3
+    x = rng.normal(size=(200, 3))
+    for y0 in [None, 0, 0.3]:
+        for axis in [0, 1]:
+            xa = x if axis == 0 else x.T
+            for filtfilt in [False, True]:
+                y = synapse.filt(xa, dt=dt, axis=axis, y0=y0,
+                                 filtfilt=filtfilt)
+                y_ref = nengo.synapses.Synapse.filt(
+                    synapse, xa, dt=dt, axis=axis, y0=y0, filtfilt=filtfilt)
+                assert np.allclose(y, y_ref)
+
+    y = synapse.apply(x, d=3, dt=dt)
+    y_ref = nengo.Process.apply(synapse, x, d=3, dt=dt)
+    assert y.shape == y_ref.shape
+    assert np.allclose(y, y_ref)
+
+
+def test_apply_list_in_place():
+    """Filtering a list in place falls back to `.Process.apply`"""
+    synapse = Lowpass(0.01)
+    x = [np.array([1.]), np.array([2.]), np.array([3.])]
+    y = synapse.apply(x, copy=False)
+    assert y is x
+    y_ref = nengo.Process.apply(
+        synapse, [np.array([1.]), np.array([2.]), np.array([3.])], copy=False)
+    assert np.allclose(y, y_ref)
+
+
 def test_lti_lowpass(rng, plt):
     dt = 1e-3
     tend = 3.
@@ -205,6 +205,94 @@ def tf2ss(num, den):
     return A, B, C, D
 
 
+def lfilter(b, a, x, zi, axis=0):
+    """Filter data along one dimension with an IIR or FIR filter.
+
+    Uses ``scipy.signal.lfilter`` if SciPy is installed,
+    and `.block_lfilter` otherwise.
+
+    Parameters
+    ----------
+    b, a : array_like
+        Numerator and denominator coefficients of the filter, with
+        ``len(b) == len(a)`` and ``a[0] == 1``.
+    x : ndarray
+        The signal to filter.
+    zi : ndarray
+        Initial state of the filter (transposed direct form II), with
+        ``len(a) - 1`` along ``axis`` and the shape of ``x`` otherwise.
+    axis : int, optional (Default: 0)
+        The axis along which to filter.
+
+    Returns
+    -------
+    y : ndarray
+        The filtered signal.
+    zf : ndarray
+        The final state of the filter.
+    """
+    if len(a) == 1:
+        return b[0] * x, zi
+
+    try:
+        import scipy.signal
+    except ImportError:
+        return block_lfilter(b, a, x, zi, axis=axis)
+    return scipy.signal.lfilter(b, a, x, axis=axis, zi=zi)
+
+
+def block_lfilter(b, a, x, zi, axis=0, block_size=64):
+    """Filter data along one dimension with an IIR or FIR filter.
+
+    Same as `.lfilter`, but only uses NumPy. The filter is written in
+    state-space form, and each block of ``block_size`` samples is filtered
+    with matrix products that give the block's outputs and final state
+    from its inputs and initial state.
+    """
+    b, a = asarray(b, dtype=float), asarray(a, dtype=float)
+    assert len(b) == len(a) and a[0] == 1
+    order = len(a) - 1
+    x = np.rollaxis(np.asarray(x), axis)
+    if order == 0:
+        return np.rollaxis(b[0] * x, 0, axis + 1), zi
+
+    # transposed direct form II (observable canonical form)
+    A = zeros((order, order))
+    A[:, 0] = -a[1:]
+    A[:-1, 1:] = eye(order - 1)
+    B = b[1:] - b[0] * a[1:]
+
+    # powers[j] == A**j
+    n = len(x)
+    length = max(min(block_size, n), 1)
+    powers = [eye(order)]
+    for _ in range(length):
+        powers.append(dot(A, powers[-1]))
+
+    # outputs from initial state (obs) and from inputs (impulse responses)
+    obs = array([p[0] for p in powers[:length]])
+    h = r_[b[0], dot(obs[:-1], B)]
+    impulse = zeros((length, length))
+    for i in range(length):
+        impulse[i:, i] = h[:length - i]
+    # final state from inputs
+    ctrl = array([dot(powers[length - 1 - i], B) for i in range(length)]).T
+
+    x2 = x.reshape((n, -1))
+    y = np.empty(x2.shape, dtype=np.result_type(x2, b))
+    state = np.array(np.rollaxis(np.asarray(zi), axis), dtype=float).reshape(
+        (order, -1))
+    for start in range(0, n, length):
+        u = x2[start:start + length]
+        m = len(u)
+        y[start:start + m] = dot(obs[:m], state) + dot(impulse[:m, :m], u)
+        state = dot(powers[m], state) + dot(ctrl[:, length - m:], u)
+
+    y = np.rollaxis(y.reshape(x.shape), 0, axis + 1)
+    zf = np.rollaxis(state.reshape((order,) + x.shape[1:]), 0, axis + 1)
+    return y, zf
+
+
 def _none_to_empty_2d(arg):
     if arg is None:
         return zeros((0, 0))
@@ -28,6 +28,49 @@ def function_name(func):
     return getattr(func, "__name__", func.__class__.__name__)
 
 
+def vectorized(func):
+    """Declares that a connection function accepts many points at once.
+
+    When solving for decoders, the builder normally calls the function
+    of a `.Connection` once for each evaluation point. Functions marked with
+    this decorator are instead called once with all evaluation points, as
+    an ``(n_eval_points, size_in)`` array, and must return an
+    ``(n_eval_points, size_out)`` array (or an ``(n_eval_points,)`` array
+    if ``size_out`` is 1). They must still accept a single point, as
+    that is how Nengo determines the function's output size.
+
+    To catch functions that are not actually vectorized, the builder checks
+    that the result for the first point matches calling the function
+    on that point alone.
+
+    Parameters
+    ----------
+    func : callable
+        The function (or callable object) to mark as vectorized.
+
+    Returns
+    -------
+    callable
+        ``func`` itself.
+
+    Examples
+    --------
+
+    >>> @vectorized
+    ... def product(x):
+    ...     return x[..., 0] * x[..., 1]
+    >>> nengo.Connection(a, b, function=product)  # doctest: +SKIP
+    """
+    target = getattr(func, '__func__', func)
+    target._nengo_vectorized = True
+    return func
+
+
+def is_vectorized(func):
+    """Whether ``func`` has been marked with `.vectorized`."""
+    return getattr(func, '_nengo_vectorized', False)
+
+
 def piecewise(data):
     """Create a piecewise constant function from a dictionary.
 
@@ -35,6 +35,8 @@ ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
 SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 """
 
+import heapq
+import itertools
 from collections import defaultdict
 
 from .compat import iteritems
@@ -101,15 +103,21 @@ class BidirectionalDAG(object):
             self.forward[e].add(merged_vertex)
 
 
-def toposort(edges):
+def toposort(edges, key=None):
     """Topological sort algorithm by Kahn[1]
 
-    Complexity is O(nodes + vertices).
+    Complexity is O(nodes + vertices), or O(nodes log nodes + vertices)
+    if ``key`` is given.
 
     Parameters
     ----------
     edges : dict
         Dict of the form {a: {b, c}} where b and c depend on a
+    key : callable, optional
+        If given, nodes that can be sorted at the same time are sorted in
+        the order of ``key(node)``. If ``key`` returns a different value
+        for each node, the order does not depend on the iteration order
+        of ``edges`` and its sets.
 
     Returns
     -------
@@ -132,18 +140,27 @@ def toposort(edges):
     """
     incoming_edges = reverse_edges(edges)
     incoming_edges = {k: set(val) for k, val in iteritems(incoming_edges)}
-    vertices = {v for v in edges
-                if v not in incoming_edges or not incoming_edges[v]}
+    vertices = [v for v in edges
+                if v not in incoming_edges or not incoming_edges[v]]
+    if key is None:
+        pop, push = vertices.pop, vertices.append
+    else:
+        # the counter breaks ties without comparing the nodes themselves
+        counter = itertools.count()
+        vertices = [(key(v), next(counter), v) for v in vertices]
+        heapq.heapify(vertices)
+        pop = lambda: heapq.heappop(vertices)[2]
+        push = lambda v: heapq.heappush(vertices, (key(v), next(counter), v))
     ordered = []
 
     while vertices:
-        n = vertices.pop()
+        n = pop()
         ordered.append(n)
         for m in edges.get(n, ()):
             assert n in incoming_edges[m]
             incoming_edges[m].remove(n)
             if not incoming_edges[m]:
-                vertices.add(m)
+                push(m)
     if any(incoming_edges.get(v, None) for v in edges):
         raise BuildError(
             "Input graph has cycles. This usually occurs because "
@@ -152,7 +169,7 @@ def toposort(edges):
     return ordered
 
 
-def transitive_closure(edges, topo_sorted=None):
+def transitive_closure(edges, topo_sorted=None, compact=False):
     """Constructs the transitive closure of a directed acyclic graph (DAG).
 
     The complexity is O(nodes + vertices).
@@ -165,12 +182,17 @@ def transitive_closure(edges, topo_sorted=None):
     topo_sorted : sequence, optional
         The topological sorting of the vertices. If not passed in, the
         algorithm will do a topological sort.
+    compact : bool, optional (Default: False)
+        If True, the vertices reachable from each vertex are stored in a
+        tuple instead of a frozenset. This takes about a sixth of the memory,
+        but testing whether a vertex is in the tuple takes linear time.
 
     Returns
     -------
     The transitive closure using the same data structure as `edges`: a dict
     of the form ``{a: {b, c}}`` where ``b`` and ``c`` are nodes that either
-    directly or indirectly depend on ``a``.
+    directly or indirectly depend on ``a``. If ``compact`` is True, the
+    values are tuples instead of sets.
     """
     if topo_sorted is None:
         topo_sorted = toposort(edges)
@@ -178,19 +200,125 @@ def transitive_closure(edges, topo_sorted=None):
     sets = {}
     reachables = {}
     for vertex in reversed(topo_sorted):
-        reachables[vertex] = set(edges[vertex])
+        reachable = set(edges[vertex])
         for edge in edges[vertex]:
-            reachables[vertex].update(reachables[edge])
-        reachables[vertex] = frozenset(reachables[vertex])
+            reachable.update(reachables[edge])
 
         # We try to reuse existing sets as this can significantly reduce
         # memory in some cases (which is important in the OpMergeOptimizer).
-        if reachables[vertex] in sets:
-            reachables[vertex] = sets[reachables[vertex]]
-        sets[reachables[vertex]] = reachables[vertex]
+        reachables[vertex] = _share(reachable, sets, compact)
     return reachables
 
 
+def update_transitive_closure(reachables, dag, changed, removed=(),
+                              compact=False):
+    """Updates a transitive closure after some vertices of a DAG changed.
+
+    Only the changed vertices and their ancestors can reach different
+    vertices than before, so only their sets are recomputed. The complexity
+    is O(a * r + e_a), where a is the number of these vertices, r is the
+    size of their reachable sets and e_a is the number of edges between them,
+    instead of O(n * r + e) for recomputing the closure of all n vertices
+    with `.transitive_closure`.
+
+    Parameters
+    ----------
+    reachables : dict
+        The transitive closure of the graph before the change, of the form
+        returned by `.transitive_closure`. It is updated in place.
+    dag : BidirectionalDAG
+        The graph after the change.
+    changed : iterable
+        Vertices that were added to the graph or whose outgoing edges
+        changed (e.g., the vertex replacing merged vertices).
+    removed : iterable, optional
+        Vertices that were removed from the graph.
+    compact : bool, optional (Default: False)
+        Whether ``reachables`` stores tuples instead of frozensets
+        (see `.transitive_closure`).
+    """
+    affected = set()
+    stack = [v for v in changed if v in dag.forward]
+    while stack:
+        vertex = stack.pop()
+        if vertex not in affected:
+            affected.add(vertex)
+            stack.extend(dag.backward[vertex])
+
+    for vertex in removed:
+        reachables.pop(vertex, None)
+
+    sets = {}
+    edges = {v: dag.forward[v].intersection(affected) for v in affected}
+    for vertex in reversed(toposort(edges)):
+        reachable = set(dag.forward[vertex])
+        for edge in dag.forward[vertex]:
+            reachable.update(reachables[edge])
+        reachables[vertex] = _share(reachable, sets, compact)
+
+
+def _share(reachable, sets, compact):
+    """Returns a shared frozenset or tuple with the elements of ``reachable``.
+
+    For tuples, ``sets`` only keeps the hashes of the frozensets, so that
+    their memory is freed right away.
+    """
+    frozen = frozenset(reachable)
+    if not compact:
+        return sets.setdefault(frozen, frozen)
+
+    candidates = sets.setdefault(hash(frozen), [])
+    for candidate in candidates:
+        if len(candidate) == len(frozen) and frozen.issuperset(candidate):
+            return candidate
+    candidate = tuple(frozen)
+    candidates.append(candidate)
+    return candidate
+
+
+def levels(edges, topo_sorted=None):
+    """Groups the vertices of a directed acyclic graph (DAG) into levels.
+
+    Each vertex is placed in the level following the last level containing
+    a vertex that it depends on, so vertices in the same level do not
+    depend on each other. The complexity is O(nodes + vertices).
+
+    Parameters
+    ----------
+    edges : dict
+        Dict of the form ``{a: {b, c}}`` where ``b`` and ``c`` depend on ``a``.
+        Must not contain cycles.
+    topo_sorted : sequence, optional
+        The topological sorting of the vertices. If not passed in, the
+        algorithm will do a topological sort.
+
+    Returns
+    -------
+    A list of levels, where each level is a list of vertices that only
+    depend on vertices in previous levels. Vertices in each level are
+    ordered as in ``topo_sorted``.
+
+    Example
+    -------
+
+    >>> levels({1: {2, 3}, 2: {4}, 3: {4}, 4: set()}, [1, 2, 3, 4])
+    [[1], [2, 3], [4]]
+    """
+    if topo_sorted is None:
+        topo_sorted = toposort(edges)
+
+    level = {}
+    result = []
+    for vertex in topo_sorted:
+        i = level.setdefault(vertex, 0)
+        if i == len(result):
+            result.append([])
+        result[i].append(vertex)
+        for edge in edges[vertex]:
+            level[edge] = max(level.get(edge, 0), i + 1)
+    return result
+
+
 def reverse_edges(edges):
     """Reverses direction of dependence dict.
 
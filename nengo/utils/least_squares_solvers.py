@@ -8,6 +8,10 @@ For example::
 
 from __future__ import absolute_import
 
+from collections import OrderedDict
+import threading
+import weakref
+
 import numpy as np
 
 import nengo.utils.numpy as npext
@@ -16,6 +20,14 @@ from nengo.params import (
     BoolParam, FrozenObject, IntParam, NdarrayParam, NumberParam, Parameter)
 
 
+# Cholesky factors of recently solved systems, most recently used last,
+# keyed by the identity of the activities
+_factor_cache = OrderedDict()
+_factor_cache_bytes = 2 ** 26
+_factor_cache_nbytes = 0  # total size of the cached factors
+_factor_lock = threading.Lock()
+
+
 def format_system(A, Y):
     assert Y.ndim > 0
     m, n = A.shape
@@ -53,32 +65,108 @@ class Cholesky(LeastSquaresSolver):
             # transpose if matrix is fat, but not if sigmas for each neuron
             transpose = m < n and sigma.size == 1
 
-        if transpose:
-            # substitution: x = A'*xbar, G*xbar = b where G = A*A' + lambda*I
-            G = np.dot(A, A.T)
-            b = Y
-        else:
-            # multiplication by A': G*x = A'*b where G = A'*A + lambda*I
-            G = np.dot(A.T, A)
-            b = np.dot(A.T, Y)
-
-        # add L2 regularization term 'lambda' = m * sigma**2
-        np.fill_diagonal(G, G.diagonal() + m * sigma**2)
+        # substitution: x = A'*xbar, G*xbar = b where G = A*A' + lambda*I
+        # multiplication by A': G*x = A'*b where G = A'*A + lambda*I
+        b = Y if transpose else np.dot(A.T, Y)
 
-        try:
+        factor, inverse = cholesky_factor(A, sigma, transpose)
+        if inverse:
+            X = np.dot(factor, np.dot(factor.T, b))
+        else:
             import scipy.linalg
-            factor = scipy.linalg.cho_factor(G, overwrite_a=True)
             X = scipy.linalg.cho_solve(factor, b)
-        except ImportError:
-            L = np.linalg.cholesky(G)
-            L = np.linalg.inv(L.T)
-            X = np.dot(L, np.dot(L.T, b))
 
         X = np.dot(A.T, X) if transpose else X
         info = {'rmses': rmses(A, X, Y)}
         return X, info
 
 
+def cholesky_factor(A, sigma, transpose=False):
+    """Returns the Cholesky factor of the regularized Gram matrix of ``A``.
+
+    The Gram matrix is ``G = A'*A + lambda*I`` (or ``G = A*A' + lambda*I``
+    if ``transpose``), where ``lambda = m * sigma**2``. Factors are cached
+    for ``A`` that are not writeable, keyed by the identity of ``A`` rather
+    than its contents. The builder passes the same read-only activities to
+    all connections using the evaluation points of an ensemble (see
+    `.build_decoders`), so these connections factorize ``G`` only once.
+
+    Returns
+    -------
+    factor : tuple or ndarray
+        The factor as returned by ``scipy.linalg.cho_factor``, or the
+        inverse of the transposed lower triangular factor if Scipy is not
+        available (such that ``inv(G) = factor * factor'``).
+    inverse : bool
+        Whether ``factor`` is the inverse factor.
+    """
+    A = np.ascontiguousarray(A)
+    key = None
+    if not A.flags.writeable:
+        key = (id(A), bool(transpose), np.asarray(sigma).tobytes())
+        value = _get_factor(key, A)
+        if value is not None:
+            return value
+
+    m = A.shape[0]
+    G = np.dot(A, A.T) if transpose else np.dot(A.T, A)
+
+    # add L2 regularization term 'lambda' = m * sigma**2
+    np.fill_diagonal(G, G.diagonal() + m * sigma**2)
+
+    try:
+        import scipy.linalg
+        factor = scipy.linalg.cho_factor(G, overwrite_a=True)
+        factor[0].setflags(write=False)
+        value = (factor, False)
+    except ImportError:
+        L = np.linalg.cholesky(G)
+        L = np.linalg.inv(L.T)
+        L.setflags(write=False)
+        value = (L, True)
+
+    if key is not None:
+        _put_factor(key, A, value)
+    return value
+
+
+def _get_factor(key, A):
+    global _factor_cache_nbytes
+
+    with _factor_lock:
+        item = _factor_cache.pop(key, None)
+        if item is None:
+            return None
+        value, nbytes, ref = item
+        if ref() is not A:
+            # the matrix was freed and another one got the same id
+            _factor_cache_nbytes -= nbytes
+            return None
+        _factor_cache[key] = item
+        return value
+
+
+def _put_factor(key, A, value):
+    global _factor_cache_nbytes
+
+    nbytes = value[0].nbytes if value[1] else value[0][0].nbytes
+    if nbytes > _factor_cache_bytes:
+        return
+
+    with _factor_lock:
+        # drop the factors of freed matrices, as they will not be used again
+        for k in [k for k, item in _factor_cache.items() if item[2]() is None]:
+            _factor_cache_nbytes -= _factor_cache.pop(k)[1]
+
+        old = _factor_cache.pop(key, None)
+        if old is not None:
+            _factor_cache_nbytes -= old[1]
+        _factor_cache[key] = (value, nbytes, weakref.ref(A))
+        _factor_cache_nbytes += nbytes
+        while _factor_cache_nbytes > _factor_cache_bytes:
+            _factor_cache_nbytes -= _factor_cache.popitem(last=False)[1][1]
+
+
 class ConjgradScipy(LeastSquaresSolver):
     """Solve a least-squares system using Scipy's conjugate gradient.
 
@@ -31,6 +31,11 @@ into one file. The start and end of each subfile will be stored in a cache
 index, but can also be recovered from reading the headers of the NCO files in
 order as each one gives the start of the next header (corresponding to the
 end of the array data).
+
+NCO files can also be written incrementally with an `.ArrayStream`, which
+reserves a fixed size NPY header so that the array can grow along its first
+axis without moving the array data. Such files are read with `.read` like
+any other NCO file.
 """
 
 from __future__ import absolute_import
@@ -102,6 +107,88 @@ HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
 ALIGNMENT = 16
 
 
+def _write_header(fileobj, start, pickle_start, pickle_end,
+                  array_start, array_end):
+    header = struct.pack(
+        HEADER_FORMAT, MAGIC_STRING, 0, pickle_start, pickle_end,
+        array_start, array_end)
+    fileobj.seek(start)
+    fileobj.write(header)
+
+
+def _npy_header(dtype, shape, size=None):
+    header = "{'descr': %r, 'fortran_order': False, 'shape': %r, }" % (
+        np.lib.format.dtype_to_descr(dtype), tuple(int(d) for d in shape))
+    n_prefix = len(np.lib.format.MAGIC_PREFIX) + 4  # version and length
+    if size is None:
+        size = byte_align(n_prefix + len(header) + 1, ALIGNMENT)
+    header = header.ljust(size - n_prefix - 1) + '\n'
+    return (np.lib.format.magic(1, 0) + struct.pack('<H', len(header))
+            + ensure_bytes(header))
+
+
+class ArrayStream(object):
+    """Writes a Nengo cache object whose array grows along its first axis.
+
+    The header and metadata are written when the stream is created.
+    Array data must then be written by the caller (usually through a
+    memory map) starting at ``data_start``, after which `.ArrayStream.update`
+    rewrites the headers to describe the number of rows written so far.
+
+    Parameters
+    ----------
+    fileobj : file-like object
+        File object to write the data to. Must be opened for reading
+        and writing.
+    metadata : object
+        Python object with metadata (will be pickled).
+    dtype : dtype
+        Data type of the array.
+    shape : tuple
+        Shape of the array without the first (growing) axis.
+
+    Attributes
+    ----------
+    data_start : int
+        Offset of the first array element in the file.
+    row_bytes : int
+        Number of bytes in one row of the array.
+    """
+
+    def __init__(self, fileobj, metadata, dtype, shape):
+        self.fileobj = fileobj
+        self.dtype = np.dtype(dtype)
+        self.shape = tuple(shape)
+        self.row_bytes = self.dtype.itemsize * int(np.prod(self.shape))
+
+        self.start = fileobj.tell()
+        self.pickle_start = byte_align(self.start + HEADER_SIZE, ALIGNMENT)
+        fileobj.seek(self.pickle_start)
+        pickle.dump(metadata, fileobj, pickle.HIGHEST_PROTOCOL)
+        self.pickle_end = fileobj.tell()
+
+        # Reserve enough space for the NPY header of the largest array
+        self.array_start = byte_align(self.pickle_end, ALIGNMENT)
+        self.npy_header_size = len(
+            _npy_header(self.dtype, (np.iinfo(np.int64).max,) + self.shape))
+        self.data_start = self.array_start + self.npy_header_size
+        self.update(0)
+
+    def data_end(self, n_rows):
+        """Offset in the file after the first ``n_rows`` rows."""
+        return self.data_start + n_rows * self.row_bytes
+
+    def update(self, n_rows):
+        """Update the headers to describe an array with ``n_rows`` rows."""
+        self.fileobj.seek(self.array_start)
+        self.fileobj.write(_npy_header(
+            self.dtype, (n_rows,) + self.shape, size=self.npy_header_size))
+        _write_header(self.fileobj, self.start, self.pickle_start,
+                      self.pickle_end, self.array_start,
+                      self.data_end(n_rows))
+        self.fileobj.flush()
+
+
 def write(fileobj, metadata, array):
     """Writes a Nengo cache object.
 
@@ -125,21 +212,25 @@ def write(fileobj, metadata, array):
     np.save(fileobj, array)
     array_end = fileobj.tell()
 
-    header = struct.pack(
-        HEADER_FORMAT, MAGIC_STRING, 0, pickle_start, pickle_end,
-        array_start, array_end)
-    fileobj.seek(start)
-    fileobj.write(header)
+    _write_header(fileobj, start, pickle_start, pickle_end,
+                  array_start, array_end)
     fileobj.seek(array_end)
 
 
-def read(fileobj):
+def read(fileobj, mmap_mode=None):
     """Reads a Nengo cache object.
 
     Parameters
     ----------
     fileobj : file-like object
         The file object to read from.
+    mmap_mode : {None, 'r', 'c'}, optional (Default: None)
+        If not None, the array is not read into memory, but memory-mapped
+        from the file with the given mode (see `numpy.memmap`). The array
+        data is then only read from the file when it is accessed, and is
+        shared with other processes mapping the same file. ``fileobj`` has
+        to be a file on disk in that case. Empty arrays and arrays of
+        Python objects are read into memory regardless.
 
     Returns
     -------
@@ -158,5 +249,30 @@ def read(fileobj):
             "NCO protocol version {} is not supported.".format(version))
 
     metadata = pickle.load(Subfile(fileobj, pickle_start, pickle_end))
-    array = np.load(Subfile(fileobj, array_start, array_end))
+    if mmap_mode is None:
+        array = np.load(Subfile(fileobj, array_start, array_end))
+    else:
+        array = _mmap_array(fileobj, array_start, array_end, mmap_mode)
     return metadata, array
+
+
+def _mmap_array(fileobj, start, end, mode):
+    subfile = Subfile(fileobj, start, end)
+    version = np.lib.format.read_magic(subfile)
+    if version == (1, 0):
+        header = np.lib.format.read_array_header_1_0(subfile)
+    else:
+        header = np.lib.format.read_array_header_2_0(subfile)
+    shape, fortran_order, dtype = header
+
+    if dtype.hasobject or np.prod(shape) == 0:
+        subfile.seek(0)
+        return np.load(subfile)
+
+    # the array data is aligned, as the NPY header is padded to a multiple
+    # of 16 bytes and the NPY data starts at an aligned offset
+    array = np.memmap(fileobj, dtype=dtype, mode=mode,
+                      offset=start + subfile.tell(), shape=shape,
+                      order='F' if fortran_order else 'C')
+    fileobj.seek(end)
+    return array.view(np.ndarray)
@@ -1,7 +1,11 @@
 from collections import defaultdict
 import itertools
+import multiprocessing
 
-from .compat import iteritems
+import numpy as np
+
+from .compat import iteritems, pickle
+from ..exceptions import ValidationError
 from .graphs import add_edges
 from .stdlib import groupby
 
@@ -97,3 +101,149 @@ def validate_ops(sets, ups, incs):
         for sig, sig2 in itertools.combinations(base_group, 2):
             assert not sig.may_share_memory(sig2), (
                 "%s shares memory with %s" % (sig, sig2))
+
+
+def group_incs(operators):
+    """Groups operators so that operators incrementing the same memory
+    are in the same group.
+
+    Operators in the same level of the dependency graph (see
+    `nengo.utils.graphs.levels`) do not depend on each other, but
+    increments of the same signal must not run concurrently. Each group
+    returned by this function can be run independently of the other groups.
+
+    Parameters
+    ----------
+    operators : list of Operator
+        Operators in the order in which they are to be run.
+
+    Returns
+    -------
+    A list of groups, where each group is a list of operators ordered
+    as in ``operators``.
+    """
+    # union-find over operator indices, joining operators with common
+    # incremented base signals
+    parent = list(range(len(operators)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    first_inc = {}
+    for i, op in enumerate(operators):
+        for sig in op.incs:
+            j = first_inc.setdefault(sig.base, i)
+            parent[find(i)] = find(j)
+
+    groups = {}
+    result = []
+    for i, op in enumerate(operators):
+        root = find(i)
+        if root not in groups:
+            groups[root] = []
+            result.append(groups[root])
+        groups[root].append(op)
+    return result
+
+
+def _run_trials(model, probes, seeds, duration):
+    from nengo.simulator import Simulator
+
+    results = []
+    with Simulator(None, model=model, seed=seeds[0], optimize=False,
+                   progress_bar=False) as sim:
+        for i, seed in enumerate(seeds):
+            if i > 0:
+                sim.reset(seed=seed)
+            sim.run(duration, progress_bar=False)
+            results.append([np.array(sim.data[p]) for p in probes])
+    return results
+
+
+def _run_pickled_trials(pickled, seeds, duration):
+    model, probes = pickle.loads(pickled)
+    return _run_trials(model, probes, seeds, duration)
+
+
+def run_sweep(network, seeds, duration, probes=None, n_workers=None,
+              dt=0.001, optimize=True):
+    """Runs a network once for each of several simulator seeds.
+
+    The network is built (and optimized) only once. The built model is
+    then sent to ``n_workers`` processes, each of which simulates a subset
+    of the seeds, resetting its simulator with each seed in turn with
+    `.Simulator.reset`. Decoders are therefore solved only once, and
+    the seeds only affect stochastic processes that do not have their own
+    seed (e.g., noise).
+
+    Running ``run_sweep(network, [seed], duration)`` gives the same probe
+    data as running ``nengo.Simulator(network, seed=seed)`` for
+    ``duration`` seconds.
+
+    Parameters
+    ----------
+    network : Network
+        The network to simulate. The built model must be picklable, so
+        node functions must be defined at module level (not lambdas).
+    seeds : iterable of int
+        Simulator seeds, one for each trial.
+    duration : float
+        Length of each trial, in seconds.
+    probes : iterable of Probe, optional (Default: None)
+        The probes to gather data from. If None, all probes in the network.
+    n_workers : int, optional (Default: None)
+        Number of worker processes. If None, the number of CPUs is used.
+        If 1, all trials are run in the current process. On Python 2,
+        multiple workers require the ``futures`` package.
+    dt : float, optional (Default: 0.001)
+        The length of a simulator timestep, in seconds.
+    optimize : bool, optional (Default: True)
+        Whether to run the operator merging optimizer on the built model.
+
+    Returns
+    -------
+    dict
+        Maps each probe to an array of shape ``(len(seeds), n_samples, ...)``
+        with the data gathered in each trial.
+    """
+    from nengo.builder import Model
+    from nengo.builder.optimizer import optimize as opmerge_optimize
+    from nengo.cache import get_default_decoder_cache, NoDecoderCache
+
+    seeds = list(seeds)
+    if len(seeds) == 0:
+        raise ValidationError("Must provide at least one seed",
+                              attr='seeds')
+    probes = list(network.all_probes if probes is None else probes)
+    if n_workers is None:
+        n_workers = multiprocessing.cpu_count()
+    n_workers = max(min(n_workers, len(seeds)), 1)
+
+    model = Model(dt=float(dt), label="%s, dt=%f" % (network, dt),
+                  decoder_cache=get_default_decoder_cache())
+    model.build(network)
+    if optimize:
+        opmerge_optimize(model, operator_dependency_graph(model.operators))
+    # workers do not build anything, so they do not need the cache
+    model.decoder_cache = NoDecoderCache()
+
+    chunks = [[seeds[i] for i in idxs]
+              for idxs in np.array_split(np.arange(len(seeds)), n_workers)]
+    if n_workers == 1:
+        results = [_run_trials(model, probes, seeds, duration)]
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+
+        pickled = pickle.dumps((model, probes), pickle.HIGHEST_PROTOCOL)
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            futures = [executor.submit(
+                _run_pickled_trials, pickled, chunk, duration)
+                for chunk in chunks]
+            results = [f.result() for f in futures]
+
+    trials = [trial for chunk in results for trial in chunk]
+    return {p: np.stack([trial[i] for trial in trials])
+            for i, p in enumerate(probes)}
@@ -1,7 +1,8 @@
 import numpy as np
 import pytest
 
-from nengo.utils.filter_design import expm, cont2discrete
+from nengo.utils.filter_design import (
+    block_lfilter, cont2discrete, expm, lfilter)
 
 
 def test_expm(rng):
@@ -41,3 +42,17 @@ def test_cont2discrete_zoh(dt):
     num1, den1, _ = cont2discrete((num, den), dt)
     assert np.allclose(num0, num1)
     assert np.allclose(den0, den1)
+
+
+@pytest.mark.parametrize('order', [0, 1, 2, 3])
+def test_block_lfilter(order, rng):
+    pytest.importorskip('scipy')
+    b = rng.uniform(-1, 1, size=order + 1)
+    a = np.r_[1, 0.5 * rng.uniform(-1, 1, size=order) / (order + 1)]
+    for axis in [0, 1]:
+        x = rng.normal(size=(150, 4) if axis == 0 else (4, 150))
+        zi = rng.normal(size=(order, 4) if axis == 0 else (4, order))
+        y, zf = block_lfilter(b, a, x, zi, axis=axis, block_size=16)
+        y_ref, zf_ref = lfilter(b, a, x, zi, axis=axis)
+        assert np.allclose(y, y_ref)
+        assert np.allclose(zf, zf_ref)
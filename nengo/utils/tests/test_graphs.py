@@ -12,6 +12,14 @@ def test_toposort():
     assert graphs.toposort(edges) == ['a', 'b', 'c']
 
 
+def test_toposort_key():
+    edges = graphs.graph({'a': {'d'}, 'b': {'d'}, 'c': set(), 'd': set()})
+    order = ['c', 'b', 'a', 'd']
+    assert graphs.toposort(edges, key=order.index) == order
+    order = ['b', 'a', 'c', 'd']
+    assert graphs.toposort(edges, key=order.index) == order
+
+
 def test_transitive_closure():
     edges = graphs.graph(
         {'a': {}, 'b': {'c', 'd'}, 'c': set(), 'd': {'e', }, 'e': set()})
@@ -19,6 +27,44 @@ def test_transitive_closure():
         'a': set(), 'b': {'c', 'd', 'e'}, 'c': set(), 'd': {'e'}, 'e': set()}
 
 
+def test_update_transitive_closure():
+    dag = graphs.BidirectionalDAG(graphs.graph(
+        {'a': {'b'}, 'b': set(), 'c': {'d'}, 'd': set(), 'e': {'c'}}))
+    reachables = graphs.transitive_closure(dag.forward)
+
+    # merge independent 'b' and 'c' into 'bc', so 'a' now reaches 'd'
+    dag.merge({'b', 'c'}, 'bc')
+    graphs.update_transitive_closure(
+        reachables, dag, changed=['bc'], removed=['b', 'c'])
+    assert reachables == graphs.transitive_closure(dag.forward) == {
+        'a': {'bc', 'd'}, 'bc': {'d'}, 'd': set(), 'e': {'bc', 'd'}}
+
+
+def test_transitive_closure_compact():
+    dag = graphs.BidirectionalDAG(graphs.graph(
+        {'a': {'b'}, 'b': set(), 'c': {'d'}, 'd': set(), 'e': {'c'},
+         'f': {'c', 'd'}}))
+    reachables = graphs.transitive_closure(dag.forward, compact=True)
+    assert all(isinstance(v, tuple) for v in reachables.values())
+    assert reachables['e'] is reachables['f']  # equal tuples are shared
+    assert {k: set(v) for k, v in reachables.items()} == (
+        graphs.transitive_closure(dag.forward))
+
+    dag.merge({'b', 'c'}, 'bc')
+    graphs.update_transitive_closure(
+        reachables, dag, changed=['bc'], removed=['b', 'c'], compact=True)
+    assert {k: set(v) for k, v in reachables.items()} == {
+        'a': {'bc', 'd'}, 'bc': {'d'}, 'd': set(), 'e': {'bc', 'd'},
+        'f': {'bc', 'd'}}
+
+
+def test_levels():
+    edges = graphs.graph(
+        {'a': {'b', 'c'}, 'b': {'d'}, 'c': set(), 'd': set(), 'e': {'d'}})
+    result = graphs.levels(edges, ['a', 'e', 'b', 'c', 'd'])
+    assert result == [['a', 'e'], ['b', 'c'], ['d']]
+
+
 def test_add_edges():
     edges = graphs.graph({'a': {'b', 'c'}})
     graphs.add_edges(edges, [('a', 'd'), ('b', 'c')])
@@ -103,3 +103,60 @@ def test_nco_roundtrip(tmpdir):
 
     assert pickle_data == pickle_data2
     assert_equal(array, array2)
+
+
+def test_array_stream(tmpdir):
+    tmpfile = tmpdir.join('test.nco')
+
+    metadata = {'label': 'stream'}
+    array = np.arange(24.).reshape(6, 2, 2)
+
+    with tmpfile.open('w+b') as f:
+        stream = nco.ArrayStream(f, metadata, array.dtype, array.shape[1:])
+        f.seek(stream.data_start)
+        f.write(array[:2].tobytes())
+        stream.update(2)
+        f.seek(0)
+        assert_equal(nco.read(f)[1], array[:2])
+
+        f.seek(stream.data_end(2))
+        f.write(array[2:].tobytes())
+        stream.update(len(array))
+
+    with tmpfile.open('rb') as f:
+        metadata2, array2 = nco.read(f)
+
+    assert metadata == metadata2
+    assert_equal(array, array2)
+
+
+@pytest.mark.parametrize('mmap_mode', ['r', 'c'])
+def test_nco_mmap(tmpdir, mmap_mode):
+    tmpfile = tmpdir.join('test.nco')
+
+    arrays = [np.arange(12.).reshape(3, 4),
+              np.asfortranarray(np.arange(12).reshape(3, 4)),
+              np.zeros((0, 3))]
+
+    with tmpfile.open('wb') as f:
+        for i, array in enumerate(arrays):
+            nco.write(f, {'i': i}, array)
+
+    with tmpfile.open('rb') as f:
+        for i, array in enumerate(arrays):
+            metadata, array2 = nco.read(f, mmap_mode=mmap_mode)
+            assert metadata == {'i': i}
+            assert type(array2) is np.ndarray
+            assert array2.dtype == array.dtype
+            assert_equal(array2, array)
+            mapped = isinstance(array2.base, np.memmap)
+            assert mapped == (i < 2)
+            if mapped:
+                assert array2.ctypes.data % nco.ALIGNMENT == 0
+
+    # arrays stay valid after the file has been closed
+    assert_equal(array2, arrays[-1])
+    with tmpfile.open('rb') as f:
+        array2 = nco.read(f, mmap_mode=mmap_mode)[1]
+    assert_equal(array2, arrays[0])
+    assert array2.flags.writeable == (mmap_mode == 'c')
@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+import nengo
+from nengo.builder.operator import Copy, DotInc, Reset
+from nengo.builder.signal import Signal
+from nengo.utils.simulator import group_incs, run_sweep
+
+
+def test_group_incs():
+    x = Signal(np.zeros(4), name='x')
+    y = Signal(np.zeros(4), name='y')
+    z = Signal(np.zeros(2), name='z')
+    A = Signal(np.eye(2), name='A')
+
+    ops = [Copy(x[:2], z, inc=True),
+           Reset(x),
+           DotInc(A, z, y[:2]),
+           Copy(x[2:], y[2:], inc=True),
+           Copy(x[:2], z, inc=False)]
+    assert group_incs(ops) == [[ops[0]], [ops[1]], [ops[2], ops[3]], [ops[4]]]
+
+    ops.append(DotInc(A, x[:2], z))
+    ops.append(Copy(z, y[:2], inc=True))
+    assert group_incs(ops) == [
+        [ops[0], ops[5]], [ops[1]], [ops[2], ops[3], ops[6]], [ops[4]]]
+
+
+@pytest.mark.parametrize('n_workers', [1, 2])
+def test_run_sweep(n_workers, seed):
+    pytest.importorskip('concurrent.futures')
+
+    with nengo.Network(seed=seed) as net:
+        stim = nengo.Node(np.sin)
+        ens = nengo.Ensemble(20, 1, noise=nengo.processes.WhiteNoise())
+        nengo.Connection(stim, ens)
+        p = nengo.Probe(ens, synapse=0.01)
+        p_spikes = nengo.Probe(ens.neurons)
+
+    seeds = [seed, seed + 1, seed + 2]
+    data = run_sweep(net, seeds, 0.05, n_workers=n_workers)
+    assert set(data) == {p, p_spikes}
+    assert data[p].shape == (3, 50, 1)
+    assert data[p_spikes].shape == (3, 50, 20)
+
+    for i, s in enumerate(seeds):
+        with nengo.Simulator(net, seed=s) as sim:
+            sim.run(0.05)
+        assert np.allclose(data[p][i], sim.data[p])
+        assert np.array_equal(data[p_spikes][i], sim.data[p_spikes])
+    assert not np.allclose(data[p][0], data[p][1])
+
+    data = run_sweep(net, seeds[:1], 0.05, probes=[p], n_workers=n_workers)
+    assert list(data) == [p]